@@ -0,0 +1,302 @@
+"""检测流程分阶段基准
+    python benchmarks/bench_pipeline.py [--runs 20] [--rows 5000] [--baseline benchmarks/baseline.json]
+                                        [--threshold 0.25] [--update-baseline] [--stage 名称 ...]
+
+在无显示环境（Linux 即可）下用合成字体、JSON 字体索引夹具和系统快照夹具分别测量：
+    registry_build     从夹具建立字体索引
+    registry_lookup    get_segoe_font_name（索引已建好）
+    version_probe      get_segoe_emoji_version
+    char_check         逐个检查 config.UNICODE_TEST_CHARS 中的示例字符
+    catalogue_cold     test_unicode_support，不使用缓存（解析字体并对完整目录打分）
+    catalogue_warm     test_unicode_support，命中缓存
+    version_infer      用版本索引按码位统计覆盖位图并推断实际支持版本
+    fallback_chain     合并两个字体的回退链（各字体命中缓存）并查询提供每个示例字符的字体
+    detect             detect_unicode_info 完整流程（命中缓存）
+    table_population   向界面表格填充 --rows 行（需要 PySide6，使用 offscreen 平台）
+    table_sort_filter  按版本排序、按状态筛选再恢复（需要 PySide6）
+    export_report      将表格导出为报告（需要 PySide6）
+
+每个阶段记录耗时的 p50/p90/p99（毫秒）和一次运行的 Python 内存峰值（tracemalloc，KB），
+结果写入 JSON。与基线比较时，p50 或内存峰值超过基线 (1 + threshold) 倍的阶段视为回归，
+以非零状态退出。基线不存在或指定 --update-baseline 时写入新基线。
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from synthetic_font import write_font  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# 低于该绝对差值的变化视为噪声，避免微秒级阶段误报
+MIN_DELTA_MS = 0.05
+MIN_DELTA_KB = 64
+
+# 索引夹具中用于模拟真实注册表规模的字体数量
+FIXTURE_FONT_COUNT = 2000
+
+# QApplication 和窗口必须在整个基准期间保持引用
+_qt_objects = []
+
+FIXTURE_SNAPSHOT = {"os_name": "Windows", "major": 10, "minor": 0, "build": 22631,
+                    "arch": "x64", "python_version": "3.11.4"}
+
+
+def percentile(sorted_samples, fraction):
+    """线性插值百分位数"""
+    if len(sorted_samples) == 1:
+        return sorted_samples[0]
+    pos = (len(sorted_samples) - 1) * fraction
+    low = int(pos)
+    high = min(low + 1, len(sorted_samples) - 1)
+    return sorted_samples[low] + (sorted_samples[high] - sorted_samples[low]) * (pos - low)
+
+
+def measure(func, runs, setup=None):
+    """返回阶段的耗时统计和内存峰值"""
+    samples = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+
+    # 内存单独测一次，tracemalloc 会拖慢计时
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(samples, 0.50), 4),
+        "p90_ms": round(percentile(samples, 0.90), 4),
+        "p99_ms": round(percentile(samples, 0.99), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "peak_kb": round(peak / 1024.0, 1),
+    }
+
+
+def build_fixture(tmp):
+    """生成合成字体、字体索引夹具和缓存目录，返回字体路径"""
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    # 真实的 emoji 字体同样映射 ZWJ 和变体选择符
+    codepoints = sorted({ord(ch) for sequence in catalog.sequences for ch in sequence})
+    ligatures = [sequence for sequence in catalog.sequences if "\u200D" in sequence]
+
+    fonts_dir = os.path.join(tmp, "Fonts")
+    os.makedirs(fonts_dir)
+    font_path = os.path.join(fonts_dir, "seguiemj.ttf")
+    write_font(font_path, codepoints, family="Segoe UI Emoji", ligatures=ligatures)
+    # 回退字体：只有基本多文种平面的符号
+    write_font(os.path.join(fonts_dir, "seguisym.ttf"), [cp for cp in codepoints if cp < 0x10000],
+               family="Segoe UI Symbol")
+
+    fonts = [{"family": f"Fixture Font {i}", "style": "Regular", "path": f"Fonts/fixture{i}.ttf"}
+             for i in range(FIXTURE_FONT_COUNT)]
+    fonts.append({"family": "Segoe UI Emoji", "style": "Regular", "path": "Fonts/seguiemj.ttf"})
+    fonts.append({"family": "Segoe UI Symbol", "style": "Regular", "path": "Fonts/seguisym.ttf"})
+    fixture_path = os.path.join(tmp, "fonts.json")
+    with open(fixture_path, "w", encoding="utf-8") as f:
+        json.dump({"fonts": fonts}, f)
+
+    os.environ["WINDIR"] = tmp
+    os.environ["UNICODE_CHECKER_FONT_FIXTURE"] = fixture_path
+    os.environ["UNICODE_CHECKER_CACHE_DIR"] = os.path.join(tmp, "cache")
+    return font_path, fixture_path
+
+
+def build_rows(count):
+    """按目录条目构造 count 行表格数据（不足时循环使用）"""
+    from emoji_catalog import format_coverage, load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    rows = []
+    for i in range(count):
+        entry_id = i % len(catalog.sequences)
+        supported = 0 if i % 7 == 0 else 1
+        rows.append({
+            "version": catalog.version_of(entry_id),
+            "char": catalog.sequences[entry_id],
+            "name": catalog.names[entry_id],
+            "status": format_coverage(supported, 1),
+            "coverage": supported * 100.0,
+            "release_date": "",
+        })
+    return rows
+
+
+def core_stages(font_path, fixture_path):
+    from config import UNICODE_TEST_CHARS
+    from detection import (
+        detect_unicode_info, determine_actual_unicode_support, load_fallback_chain, test_unicode_support
+    )
+    from font_coverage import FontCoverage
+    from font_registry import FontRegistry, JsonFixtureBackend
+    from utils import SystemSnapshot, get_segoe_emoji_version, get_segoe_font_name
+
+    snapshot = SystemSnapshot.from_dict(FIXTURE_SNAPSHOT)
+    samples = [info["char"] for info in UNICODE_TEST_CHARS.values()]
+    font = FontCoverage(font_path)
+
+    def char_check():
+        for char in samples:
+            font.supports_sequence(char)
+
+    def fallback_chain():
+        chain = load_fallback_chain(families=["Segoe UI Emoji", "Segoe UI Symbol"])
+        chain.merged_result()
+        for char in samples:
+            chain.font_for(char)
+
+    get_segoe_font_name()
+    load_fallback_chain(families=["Segoe UI Emoji", "Segoe UI Symbol"])
+    _, _, font_result = test_unicode_support(font_path)
+    # 去掉目录统计，强制走版本索引
+    coverage_only = {"coverage": font_result["coverage"]}
+    return [
+        ("registry_build", lambda: FontRegistry(JsonFixtureBackend(fixture_path)).index(), None),
+        ("registry_lookup", get_segoe_font_name, None),
+        ("version_probe", get_segoe_emoji_version, None),
+        ("char_check", char_check, None),
+        ("catalogue_cold", lambda: test_unicode_support(font_path, use_cache=False), None),
+        ("catalogue_warm", lambda: test_unicode_support(font_path), None),
+        ("version_infer", lambda: determine_actual_unicode_support(coverage_only), None),
+        ("fallback_chain", fallback_chain, None),
+        ("detect", lambda: detect_unicode_info(font_path, snapshot=snapshot), None),
+    ]
+
+
+def gui_stages(tmp, rows):
+    """界面相关阶段；没有 PySide6 时返回空列表"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6.QtCore import Qt, QThreadPool
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        print("未安装 PySide6，跳过 table_population 和 export_report", file=sys.stderr)
+        return []
+    from config import ROW_BATCH_SIZE
+    from gui import UnicodeCheckerWindow
+
+    app = QApplication.instance() or QApplication([])
+    window = UnicodeCheckerWindow()
+    # 窗口创建时启动的后台检测不参与计时
+    window.cancel_detection()
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+    _qt_objects.extend((app, window))
+    report_path = os.path.join(tmp, "report.txt")
+
+    def clear_table():
+        window.table_model.clear()
+
+    def populate():
+        for start in range(0, len(rows), ROW_BATCH_SIZE):
+            window.on_rows_ready(window.detection_generation, rows[start:start + ROW_BATCH_SIZE])
+
+    def fill_table():
+        clear_table()
+        populate()
+
+    def sort_and_filter():
+        window.table_view.sortByColumn(0, Qt.DescendingOrder)
+        window.table_model.set_filter(status=0)
+        window.table_model.set_filter()
+        window.table_view.sortByColumn(-1, Qt.AscendingOrder)
+
+    return [
+        ("table_population", populate, clear_table),
+        ("table_sort_filter", sort_and_filter, fill_table),
+        ("export_report", lambda: window.write_report(report_path), fill_table),
+    ]
+
+
+def compare(results, baseline, threshold):
+    """返回回归阶段的说明列表"""
+    regressions = []
+    for name, current in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            continue
+        if current["p50_ms"] > base["p50_ms"] * (1 + threshold) and \
+                current["p50_ms"] - base["p50_ms"] > MIN_DELTA_MS:
+            regressions.append(f"{name}: p50 {base['p50_ms']:.3f} → {current['p50_ms']:.3f} ms")
+        if current["peak_kb"] > base["peak_kb"] * (1 + threshold) and \
+                current["peak_kb"] - base["peak_kb"] > MIN_DELTA_KB:
+            regressions.append(f"{name}: 内存峰值 {base['peak_kb']:.0f} → {current['peak_kb']:.0f} KB")
+    return regressions
+
+
+def main():
+    from config import BENCH_REGRESSION_THRESHOLD
+
+    parser = argparse.ArgumentParser(description="检测流程分阶段基准")
+    parser.add_argument("--runs", type=int, default=20, help="每个阶段的计时次数")
+    parser.add_argument("--rows", type=int, default=5000, help="表格填充和导出阶段的行数")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线 JSON 文件")
+    parser.add_argument("--output", help="另存本次结果的 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=BENCH_REGRESSION_THRESHOLD,
+                        help="允许的相对回归幅度，0.25 表示 25%%")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--stage", action="append", help="只运行指定阶段（可重复）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        font_path, fixture_path = build_fixture(tmp)
+        rows = build_rows(args.rows)
+        stages = core_stages(font_path, fixture_path) + gui_stages(tmp, rows)
+
+        results = {"runs": args.runs, "rows": args.rows, "python": sys.version.split()[0], "stages": {}}
+        for name, func, setup in stages:
+            if args.stage and name not in args.stage:
+                continue
+            # 被测函数的诊断 print（如非 Windows 上的版本探测失败）不计入输出
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                stats = measure(func, args.runs, setup)
+            results["stages"][name] = stats
+            print(f"{name.ljust(18)} p50 {stats['p50_ms']:9.3f} ms  p90 {stats['p90_ms']:9.3f} ms  "
+                  f"p99 {stats['p99_ms']:9.3f} ms  峰值 {stats['peak_kb']:9.1f} KB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"已写入基线: {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"✗ 以下阶段相对基线回归超过 {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("✓ 各阶段均未超出基线")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
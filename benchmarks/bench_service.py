@@ -0,0 +1,204 @@
+"""覆盖查询服务的压力测试
+    python benchmarks/bench_service.py [--url http://127.0.0.1:8765 | --unix 套接字路径]
+                                       [--snapshots 快照清单.json] [--workers 4]
+                                       [--clients 8] [--batch 100] [--duration 10] [--build 22631]
+
+未指定 --url 或 --unix 时在随机端口上启动一个本地实例（python -m coverage_service）：
+指定 --snapshots 时使用该清单，否则用合成字体生成两个快照（与 bench_pipeline 相同的夹具）。
+--clients 个客户端进程各自保持一个 keep-alive 连接，在 --duration 秒内不断发送
+--batch 个随机目录序列的查询，最后输出每个请求延迟的 p50/p99（毫秒）以及每秒请求数和序列数。
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from bench_pipeline import percentile  # noqa: E402
+
+# 等待本地实例就绪的最长时间（秒），包括建立索引
+STARTUP_TIMEOUT = 120.0
+
+# 查询中混入的目录以外的文本，覆盖逐字体检查的路径
+EXTRA_SEQUENCES = ["A", "中", "x\U0001F600", "©", "©\uFE0F"]
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def open_connection(target):
+    kind, address = target
+    if kind == "unix":
+        return UnixHTTPConnection(address)
+    parts = urlsplit(address)
+    return http.client.HTTPConnection(parts.hostname, parts.port or 80)
+
+
+def request_json(conn, method, path, payload=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path} 返回 {response.status}: {data.decode('utf-8', 'replace')}")
+    return json.loads(data)
+
+
+def build_fixture(tmp):
+    """用合成字体生成两个快照的清单，返回清单路径"""
+    from synthetic_font import write_font
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    codepoints = sorted({ord(ch) for sequence in catalog.sequences for ch in sequence})
+    ligatures = [sequence for sequence in catalog.sequences if "\u200D" in sequence]
+    # 旧构建：缺少最新版本的 emoji
+    old_codepoints = [cp for cp in codepoints if cp < 0x1FA70]
+
+    write_font(os.path.join(tmp, "seguiemj.ttf"), codepoints, family="Segoe UI Emoji", ligatures=ligatures)
+    write_font(os.path.join(tmp, "seguiemj-old.ttf"), old_codepoints, family="Segoe UI Emoji",
+               ligatures=[sequence for sequence in ligatures if all(ord(ch) < 0x1FA70 for ch in sequence)])
+    write_font(os.path.join(tmp, "seguisym.ttf"), [cp for cp in codepoints if cp < 0x10000],
+               family="Segoe UI Symbol")
+    manifest = {"snapshots": [
+        {"name": "win10-19045", "build": 19045, "fonts": ["seguiemj-old.ttf", "seguisym.ttf"]},
+        {"name": "win11-22631", "build": 22631, "fonts": ["seguiemj.ttf", "seguisym.ttf"]},
+    ]}
+    path = os.path.join(tmp, "snapshots.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return path
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_instance(tmp, snapshots, workers):
+    """启动本地实例，返回 (进程, 目标)"""
+    port = free_port()
+    env = dict(os.environ, UNICODE_CHECKER_CACHE_DIR=os.path.join(tmp, "cache"))
+    command = [sys.executable, "-m", "coverage_service", "--snapshots", snapshots,
+               "--index", os.path.join(tmp, "service.idx"), "--port", str(port)]
+    if workers:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    target = ("tcp", f"http://127.0.0.1:{port}")
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"本地实例启动失败（退出码 {process.returncode}）")
+        try:
+            conn = open_connection(target)
+            request_json(conn, "GET", "/health")
+            conn.close()
+            return process, target
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("等待本地实例就绪超时")
+
+
+def run_client(task):
+    """一个客户端进程：在 duration 秒内循环发送查询，返回每个请求的延迟（毫秒）"""
+    target, sequences, batch, duration, build, seed = task
+    rng = random.Random(seed)
+    conn = open_connection(target)
+    payload = {"sequences": []}
+    if build is not None:
+        payload["build"] = build
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        payload["sequences"] = rng.sample(sequences, batch)
+        start = time.perf_counter()
+        response = request_json(conn, "POST", "/query", payload)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        if len(response["results"]) != batch:
+            raise RuntimeError("返回的结果数与查询的序列数不一致")
+    conn.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="覆盖查询服务压力测试")
+    parser.add_argument("--url", help="已运行的实例地址，例如 http://127.0.0.1:8765")
+    parser.add_argument("--unix", help="已运行实例的 Unix 套接字路径")
+    parser.add_argument("--snapshots", help="启动本地实例时使用的快照清单，默认使用合成字体")
+    parser.add_argument("--workers", type=int, default=None, help="本地实例的工作进程数")
+    parser.add_argument("--clients", type=int, default=8, help="并发客户端进程数")
+    parser.add_argument("--batch", type=int, default=100, help="每个请求查询的序列数")
+    parser.add_argument("--duration", type=float, default=10.0, help="每个客户端的运行时间（秒）")
+    parser.add_argument("--build", type=int, default=None, help="查询时指定的 Windows 构建号")
+    parser.add_argument("--output", help="另存结果的 JSON 文件")
+    args = parser.parse_args()
+
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    sequences = list(catalog.sequences) + EXTRA_SEQUENCES
+    batch = min(args.batch, len(sequences))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        if args.url:
+            target = ("tcp", args.url)
+        elif args.unix:
+            target = ("unix", args.unix)
+        else:
+            snapshots = args.snapshots or build_fixture(tmp)
+            process, target = start_local_instance(tmp, snapshots, args.workers)
+        try:
+            tasks = [(target, sequences, batch, args.duration, args.build, seed) for seed in range(args.clients)]
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=args.clients) as pool:
+                latencies = [latency for client in pool.map(run_client, tasks) for latency in client]
+            elapsed = time.perf_counter() - started
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    latencies.sort()
+    result = {
+        "clients": args.clients,
+        "batch": batch,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "sequences_per_s": round(len(latencies) * batch / elapsed, 1),
+    }
+    print(f"请求数 {result['requests']}（{args.clients} 个客户端，每个请求 {batch} 个序列）")
+    print(f"延迟 p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms")
+    print(f"吞吐量 {result['requests_per_s']:.1f} 请求/秒，{result['sequences_per_s']:.1f} 序列/秒")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""命令行模式冷启动基准
+
+    python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 100] [--wall-budget-ms 250]
+
+用合成字体运行 `python -X importtime -m cli`，统计导入耗时和整体耗时的中位数，
+超过预算时以非零状态退出，便于在 CI 中发现启动回归（例如误在顶层导入 PySide6 或 NumPy）。
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from config import CLI_IMPORT_BUDGET_MS, CLI_WALL_BUDGET_MS  # noqa: E402
+from synthetic_font import write_font  # noqa: E402
+
+# 启动路径上不允许出现的模块
+FORBIDDEN_MODULES = ("PySide6", "numpy", "win32api")
+
+
+def parse_importtime(stderr):
+    """汇总 -X importtime 输出中顶层模块的累计耗时（毫秒），并返回全部模块名"""
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.add(name.strip().split(".")[0])
+        # 顶层模块名前只有一个空格，子模块的耗时已计入其累计值
+        if not name.startswith("  "):
+            total_us += int(cumulative_us)
+    return total_us / 1000.0, modules
+
+
+def run_once(font_path, env):
+    cmd = [sys.executable, "-X", "importtime", "-m", "cli", "--font", font_path, "--format", "json"]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, encoding="utf-8")
+    wall_ms = (time.perf_counter() - start) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"cli 运行失败: {proc.stderr[-2000:]}")
+    import_ms, modules = parse_importtime(proc.stderr)
+    return import_ms, wall_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令行模式冷启动基准")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=CLI_IMPORT_BUDGET_MS)
+    parser.add_argument("--wall-budget-ms", type=float, default=CLI_WALL_BUDGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        font_path = os.path.join(tmp, "fixture-emoji.ttf")
+        write_font(font_path, list(range(0x1F300, 0x1FA00)) + list(range(0x2600, 0x27C0)))
+        env = dict(os.environ, UNICODE_CHECKER_CACHE_DIR=os.path.join(tmp, "cache"))
+
+        # 第一次运行填充缓存，之后测量的是典型的“重复检测”启动
+        run_once(font_path, env)
+        samples = [run_once(font_path, env) for _ in range(args.runs)]
+
+    import_ms = statistics.median(s[0] for s in samples)
+    wall_ms = statistics.median(s[1] for s in samples)
+    loaded = set().union(*(s[2] for s in samples))
+    forbidden = [m for m in FORBIDDEN_MODULES if m in loaded]
+
+    print(f"导入耗时中位数: {import_ms:.1f} ms（预算 {args.import_budget_ms:.0f} ms）")
+    print(f"整体耗时中位数: {wall_ms:.1f} ms（预算 {args.wall_budget_ms:.0f} ms）")
+
+    failed = False
+    if forbidden:
+        print(f"✗ 启动路径加载了不应加载的模块: {', '.join(forbidden)}")
+        failed = True
+    if import_ms > args.import_budget_ms:
+        print("✗ 导入耗时超出预算")
+        failed = True
+    if wall_ms > args.wall_budget_ms:
+        print("✗ 整体耗时超出预算")
+        failed = True
+    if not failed:
+        print("✓ 启动耗时在预算内")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
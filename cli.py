@@ -0,0 +1,134 @@
+"""无界面命令行模式
+
+    python -m cli [--font 字体文件] [--fallback 字体族或文件 ...] [--entries]
+                  [--format table|json|text|csv|ndjson] [--no-cache]
+                  [--snapshot 快照.json] [-o 报告文件] [--verify-render] [--watch]
+                  [--trace 跟踪.json] [--profile] [--trace-memory]
+
+检测流程与 GUI 相同，但不导入 PySide6，可在无显示环境和 Linux 上运行。
+检测过程中的诊断信息输出到 stderr，stdout 只包含结果。
+启用性能跟踪时，各阶段的耗时摘要也输出到 stderr。
+"""
+import argparse
+import contextlib
+import json
+import sys
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Unicode emoji 支持检测（命令行模式）")
+    parser.add_argument("--font", help="要检测的字体文件，默认使用 config.FONT_FALLBACK_CHAIN 回退链")
+    parser.add_argument("--fallback", action="append", metavar="FAMILY",
+                        help="回退链中的字体族或字体文件（可重复，按顺序）；与 --font 同用时排在它之后")
+    parser.add_argument("--entries", action="store_true",
+                        help="逐个 emoji 输出结果（含提供它的字体），代替按版本汇总的结果")
+    parser.add_argument("--format", choices=("table", "json", "text", "csv", "ndjson"), default=None,
+                        help="输出格式，默认为 table；指定 -o 时默认根据扩展名推断")
+    parser.add_argument("--verify-render", action="store_true",
+                        help="离屏渲染全部序列，排除渲染为豆腐块或空白的 emoji（需要 PySide6）")
+    parser.add_argument("-o", "--output", help="将报告写入文件（与 GUI 导出相同的格式）")
+    parser.add_argument("--no-cache", action="store_true", help="不读写字体解析缓存")
+    parser.add_argument("--watch", action="store_true",
+                        help="监视字体目录和注册表，字体变化时只输出新增或失去支持的 emoji（Ctrl+C 结束）")
+    parser.add_argument("--snapshot", help="重放保存的系统快照（JSON 输出中的 snapshot 字段），不调用系统 API")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="记录各检测阶段的耗时，写成 Chrome trace-event JSON（chrome://tracing 或 Perfetto 打开）")
+    parser.add_argument("--profile", action="store_true",
+                        help="同时用 cProfile 分析检测线程；结果另存为与 --trace 同名的 .prof 文件，未指定时输出到 stderr")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="同时用 tracemalloc 记录内存峰值和分配最多的代码行（写入跟踪文件）")
+    return parser
+
+
+def format_table(info):
+    """按导出报告的布局格式化检测结果"""
+    from report_export import GLYPH_TYPE_LABELS, format_chain
+
+    sys_info = info["system"]
+    lines = [
+        f"操作系统: {sys_info['os_name']} {sys_info['os_version']}",
+        f"构建版本: {sys_info['build']}",
+        f"系统架构: {sys_info['arch']}",
+        f"Python 版本: {sys_info['python_version']}",
+        f"系统 API 检测: {info['api_version']}",
+        f"Segoe UI Emoji 版本: {info['font_version']}",
+        f"实际支持版本: {info['actual_version']}",
+        f"字体文件: {info['font_path']}",
+        f"回退链: {format_chain(info.get('fallback_chain'))}",
+        "",
+        "版本   字符  字形  覆盖率               名称               字体                 发布日期",
+        "-" * 87,
+    ]
+    for result in info["results"]:
+        glyph_type = GLYPH_TYPE_LABELS.get(result.get("glyph_type"), "")
+        status = result.get("status") or ("✓" if result.get("supported") else "✗")
+        lines.append(f"{result['version'].ljust(7)} {result['char']}  {glyph_type.ljust(4)}{status.ljust(20)} "
+                     f"{result['name'].ljust(18)} {result.get('font', '').ljust(20)} {result.get('release_date', '')}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not (args.trace or args.profile or args.trace_memory):
+        return run(args)
+
+    import instrumentation
+
+    instrumentation.enable(profile=args.profile, memory=args.trace_memory)
+    try:
+        return run(args)
+    finally:
+        recorder = instrumentation.disable()
+        print(recorder.format_summary(), file=sys.stderr)
+        if recorder.memory_stats:
+            print(f"内存峰值: {recorder.memory_stats['peak_kb']} KB", file=sys.stderr)
+        if args.trace:
+            try:
+                written = instrumentation.write_trace(args.trace, recorder)
+                print(f"性能跟踪已写入: {', '.join(written)}", file=sys.stderr)
+            except OSError as e:
+                print(f"写入性能跟踪失败: {str(e)}", file=sys.stderr)
+        elif args.profile:
+            recorder.print_profile(sys.stderr)
+
+
+def run(args):
+    if args.watch:
+        from font_watch import run_watch
+
+        # 诊断信息写到 stderr，stdout 只有差异
+        out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            return run_watch(args.font, args.fallback, not args.no_cache, args.verify_render,
+                             args.format or "table", out)
+
+    from detection import detect_unicode_info, load_fallback_chain
+    from utils import load_system_snapshot
+
+    # 检测函数的诊断 print 写到 stderr，保证 stdout 可被脚本解析
+    with contextlib.redirect_stdout(sys.stderr):
+        snapshot = load_system_snapshot(args.snapshot) if args.snapshot else None
+        info = detect_unicode_info(font_path=args.font, use_cache=not args.no_cache, snapshot=snapshot,
+                                   verify_render=args.verify_render, families=args.fallback)
+        if args.entries:
+            # 各字体的解析结果已在缓存中（--no-cache 时重新解析）
+            chain = load_fallback_chain(args.font, not args.no_cache, args.verify_render, args.fallback)
+            info["results"] = list(chain.iter_entry_rows())
+
+    if args.output or args.format in ("text", "csv", "ndjson"):
+        from report_export import format_for_path, write_report
+
+        fmt = args.format or format_for_path(args.output)
+        if fmt == "table":
+            fmt = "text"
+        write_report(info, info["results"], args.output or sys.stdout, fmt)
+    elif args.format == "json":
+        json.dump(info, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_table(info))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
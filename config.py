@@ -20,4 +20,77 @@ UNICODE_TEST_CHARS = {
     "5.2": {"char": "\u263A", "name": "笑脸", "version": "2002-03"},
     "4.1": {"char": "\u2665", "name": "心形", "version": "2001-03"},
     "3.2": {"char": "\u2600", "name": "太阳", "version": "2000-03"},
-}
\ No newline at end of file
+}
+
+# 某个版本的emoji覆盖率（百分比）达到该阈值即视为支持
+COVERAGE_SUPPORT_THRESHOLD = 95.0
+
+# 推断“实际支持版本”时的覆盖率阈值（百分比）：取从最旧的版本起覆盖率连续达到该值的最高版本
+VERSION_INFERENCE_THRESHOLD = 95.0
+
+# Windows 构建号与系统 API 支持的 Unicode 版本：(最低构建号, Unicode 版本)，新系统发布时在此追加
+WINDOWS_UNICODE_VERSIONS = [
+    (0, "12.0"),
+    (14393, "12.1"),   # Windows 10 Anniversary Update
+    (19041, "14.0"),   # Windows 10 2004+
+    (22000, "15.1"),   # Windows 11
+]
+
+# 字体解析结果缓存的容量上限（字节），超出后按最近使用时间淘汰
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# 命令行模式冷启动预算（毫秒），由 benchmarks/bench_startup.py 检查
+CLI_IMPORT_BUDGET_MS = 100
+CLI_WALL_BUDGET_MS = 250
+
+# 后台检测时每批推送到表格的行数
+ROW_BATCH_SIZE = 200
+
+# 字体索引后端："auto"（Windows 使用注册表，其他平台扫描字体目录）、"windows"、"directory"、"json"
+FONT_REGISTRY_BACKEND = "auto"
+
+# 按优先顺序查找的 emoji 字体族
+EMOJI_FONT_FAMILIES = ["Segoe UI Emoji", "Segoe UI Symbol", "Noto Color Emoji", "Apple Color Emoji", "Twemoji Mozilla"]
+
+# 字体回退链：检测时按顺序合并这些字体的覆盖，每个 emoji 由链中第一个能完整显示它的字体提供
+# （也可以写字体文件路径；未安装的字体被跳过）
+FONT_FALLBACK_CHAIN = ["Segoe UI Emoji", "Segoe UI Symbol", "Segoe UI"]
+
+# 各检测项的超时时间（秒），超时后使用默认结果（如“未知版本”），其余检测项照常继续；
+# fallback_chain 包括字体索引的建立和字体解析，首次检测（无缓存）时较慢
+PROBE_TIMEOUTS = {
+    "snapshot": 5.0,
+    "system": 5.0,
+    "python_compatibility": 5.0,
+    "api_version": 5.0,
+    "font_version": 5.0,
+    "fallback_chain": 120.0,
+}
+
+# 监视模式：字体目录或注册表发生变化后，等待这么多秒内没有新的变化再重新检测（去抖）
+FONT_WATCH_DEBOUNCE = 0.3
+# 系统不支持变化通知时，轮询字体目录的间隔（秒）
+FONT_WATCH_POLL_INTERVAL = 0.5
+
+# benchmarks/bench_pipeline.py 允许的相对回归幅度（0.25 即 25%）
+BENCH_REGRESSION_THRESHOLD = 0.25
+
+# 是否在检测时做离屏渲染校验（排除渲染为豆腐块或空白的 emoji，需要 PySide6）
+RENDER_VERIFICATION = False
+
+# 性能跟踪：GUI 勾选“性能跟踪”时是否同时启用 cProfile（导出跟踪时另存 .prof）和 tracemalloc
+TRACE_PROFILE = False
+TRACE_MEMORY = False
+# 命令行 --profile 未指定 --trace 文件时输出的函数数量
+TRACE_PROFILE_LIMIT = 20
+
+# 覆盖查询服务（python -m coverage_service）的默认监听地址和端口
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+# 工作进程数，None 表示等于 CPU 核心数
+SERVICE_WORKERS = None
+# 监听队列长度
+SERVICE_BACKLOG = 128
+# 每个请求最多查询的序列数和请求体的最大字节数
+SERVICE_MAX_BATCH = 10000
+SERVICE_MAX_BODY = 4 << 20
@@ -0,0 +1,261 @@
+"""流式扫描文本语料，统计在指定字体下无法渲染的 emoji
+
+    python -m corpus_scan <文件>... [--font 字体文件] [--workers N] [--chunk-mb 16] [--format table|json]
+
+文件以内存映射方式按块切分，每块交给一个工作进程解码并切分 emoji 字素簇。
+块边界总是落在 ASCII 字节（优先换行符）之前，emoji 序列不包含 ASCII 续接字符，
+因此不会被切断；内存占用只与块大小和进程数有关，与文件大小无关。
+结果按 Unicode 版本（与 config.UNICODE_TEST_CHARS 相同的版本号）汇总。
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from emoji_catalog import strip_variation_selectors
+
+# 找不到 ASCII 字节时，最多向后搜索这么远再退回到按字符边界切分
+MAX_BOUNDARY_SEARCH = 1 << 20
+
+# 同一版本下保留的无法渲染序列种类上限
+TOP_SEQUENCES = 20
+
+UNKNOWN_VERSION = "未知"
+
+# 以下码位出现在块边界时说明边界落在 emoji 序列中间
+_CONTINUATION = re.compile("[\u200D\uFE0E\uFE0F\u20E3\U0001F3FB-\U0001F3FF\U000E0020-\U000E007F]")
+
+_ASCII_BYTE = re.compile(rb"[\x00-\x7f]")
+
+_worker = {}
+
+
+def build_cluster_pattern(catalog):
+    """根据目录构造 emoji 字素簇的正则（近似 UTS #51 的 emoji 序列语法）
+
+    默认以 emoji 形式显示的字符直接匹配；默认以文字形式显示的字符（目录中带 FE0F 的
+    单字符条目，如 ©）只有后跟 FE0F 时才算 emoji，ZWJ 之后的组件不受此限制。
+    """
+    emoji_presentation = set()
+    text_presentation = set()
+    for sequence in catalog.sequences:
+        if len(sequence) == 2 and sequence[1] == "\uFE0F":
+            text_presentation.add(sequence[0])
+        for ch in sequence:
+            if ch not in "\u200D\uFE0E\uFE0F\u20E3" and not ("\U000E0020" <= ch <= "\U000E007F") \
+                    and not ("\U0001F1E6" <= ch <= "\U0001F1FF") and not ch.isascii():
+                emoji_presentation.add(ch)
+    emoji_presentation -= text_presentation
+
+    def char_class(chars):
+        return "".join(re.escape(ch) for ch in sorted(chars))
+
+    # 同一区块中尚未收录的新 emoji 也要能被切分出来
+    ep = f"[{char_class(emoji_presentation)}\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF\U0001F900-\U0001FAFF]"
+    tp = f"[{char_class(text_presentation)}]"
+    modifier = "[\U0001F3FB-\U0001F3FF]"
+    tags = "(?:[\U000E0020-\U000E007E]+\U000E007F)"
+    keycap = "[#*0-9]\uFE0F?\u20E3"
+    flag = "[\U0001F1E6-\U0001F1FF]{2}"
+    first = f"(?:{keycap}|{flag}|{ep}[\uFE0E\uFE0F]?{modifier}?{tags}?|{tp}(?:\uFE0F{modifier}?|{modifier}))"
+    after_zwj = f"(?:{ep}|{tp})\uFE0F?{modifier}?"
+    return re.compile(f"{first}(?:\u200D{after_zwj})*")
+
+
+def _is_regional_indicator(data, pos):
+    """pos 处是否为区域指示符 U+1F1E6..U+1F1FF 的 UTF-8 编码（F0 9F 87 A6..BF）"""
+    return data[pos:pos + 3] == b"\xf0\x9f\x87" and pos + 3 < len(data) and 0xA6 <= data[pos + 3] <= 0xBF
+
+
+def _inside_flag(data, pos):
+    """pos 处的区域指示符前面紧接着奇数个区域指示符时，说明它是一面旗帜的后一半"""
+    count = 0
+    while pos - 4 * (count + 1) >= 0 and _is_regional_indicator(data, pos - 4 * (count + 1)):
+        count += 1
+    return count % 2 == 1
+
+
+def find_boundary(data, offset):
+    """从 offset 起寻找安全的切分位置"""
+    size = len(data)
+    if offset >= size:
+        return size
+    limit = min(size, offset + MAX_BOUNDARY_SEARCH)
+    newline = data.find(b"\n", offset, limit)
+    if newline != -1:
+        return newline + 1
+    ascii_byte = _ASCII_BYTE.search(data, offset, limit)
+    if ascii_byte:
+        return ascii_byte.start()
+    # 没有 ASCII 字节：退回到不在 emoji 序列中间的 UTF-8 字符起点
+    pos = limit
+    while pos < size:
+        if data[pos] & 0xC0 != 0x80:
+            ch = data[pos:pos + 4].decode("utf-8", errors="ignore")[:1]
+            prev = data[max(0, pos - 3):pos].decode("utf-8", errors="ignore")[-1:]
+            if not _CONTINUATION.match(ch or " ") and prev != "\u200D" \
+                    and not (_is_regional_indicator(data, pos) and _inside_flag(data, pos)):
+                return pos
+        pos += 1
+    return size
+
+
+def iter_chunks(path, chunk_size):
+    """产出 (路径, 起始偏移, 结束偏移)，各块首尾相接覆盖整个文件"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < len(data):
+                end = find_boundary(data, start + chunk_size)
+                yield path, start, end
+                start = end
+
+
+def _init_worker(coverage_bits, entry_support):
+    sys.stdout = sys.stderr
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    _worker["catalog"] = catalog
+    _worker["pattern"] = build_cluster_pattern(catalog)
+    _worker["index"] = catalog.sequence_index()
+    _worker["coverage"] = coverage_bits
+    _worker["supported"] = catalog.unpack_support(entry_support) if entry_support else None
+
+
+def _renderable_without_catalog(coverage_bits, cluster):
+    """目录外的序列只能检查每个码位是否被覆盖"""
+    for ch in cluster:
+        cp = ord(ch)
+        if cp in (0x200D, 0xFE0E, 0xFE0F):
+            continue
+        if not coverage_bits[cp >> 3] & (1 << (cp & 7)):
+            return False
+    return True
+
+
+def scan_chunk(task):
+    """统计一个块中每个版本的 emoji 总数、无法渲染的数量和序列"""
+    path, start, end = task
+    catalog = _worker["catalog"]
+    index = _worker["index"]
+    supported = _worker["supported"]
+    coverage_bits = _worker["coverage"]
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            text = data[start:end].decode("utf-8", errors="replace")
+
+    totals = Counter()
+    missing = Counter()
+    missing_sequences = {}
+    for cluster in _worker["pattern"].findall(text):
+        entry_id = index.get(strip_variation_selectors(cluster))
+        if entry_id is not None:
+            version = catalog.version_of(entry_id)
+            ok = bool(supported[entry_id]) if supported is not None else False
+        else:
+            version = UNKNOWN_VERSION
+            ok = coverage_bits is not None and _renderable_without_catalog(coverage_bits, cluster)
+        totals[version] += 1
+        if not ok:
+            missing[version] += 1
+            missing_sequences.setdefault(version, Counter())[cluster] += 1
+    return end - start, totals, missing, missing_sequences
+
+
+def scan_corpus(paths, font_path=None, workers=None, chunk_size=16 << 20, use_cache=True):
+    """扫描语料文件，返回按版本汇总的直方图"""
+    from coverage_cache import get_coverage_cache, load_font_result
+    from utils import get_segoe_font_path
+
+    font_path = font_path or get_segoe_font_path()
+    font_result = load_font_result(font_path, get_coverage_cache() if use_cache else None)
+    coverage_bits = font_result["coverage"] if font_result else None
+    entry_support = font_result.get("entry_support") if font_result else None
+
+    totals = Counter()
+    missing = Counter()
+    missing_sequences = {}
+    scanned_bytes = 0
+
+    tasks = (task for path in paths for task in iter_chunks(path, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(coverage_bits, entry_support)) as pool:
+        for nbytes, chunk_totals, chunk_missing, chunk_sequences in pool.map(scan_chunk, tasks):
+            scanned_bytes += nbytes
+            totals.update(chunk_totals)
+            missing.update(chunk_missing)
+            for version, counter in chunk_sequences.items():
+                merged = missing_sequences.setdefault(version, Counter())
+                merged.update(counter)
+                # 只保留出现最多的序列，控制汇总结果的内存
+                if len(merged) > TOP_SEQUENCES * 50:
+                    missing_sequences[version] = Counter(dict(merged.most_common(TOP_SEQUENCES * 10)))
+
+    def version_key(version):
+        return -1.0 if version == UNKNOWN_VERSION else float(version)
+
+    histogram = []
+    for version in sorted(totals, key=version_key, reverse=True):
+        top = missing_sequences.get(version, Counter()).most_common(TOP_SEQUENCES)
+        histogram.append({
+            "version": version,
+            "total": totals[version],
+            "unrenderable": missing[version],
+            "top_unrenderable": [[sequence, count] for sequence, count in top],
+        })
+    return {
+        "font_path": font_path,
+        "bytes": scanned_bytes,
+        "emoji": sum(totals.values()),
+        "unrenderable": sum(missing.values()),
+        "versions": histogram,
+    }
+
+
+def format_table(report):
+    lines = [
+        f"字体文件: {report['font_path']}",
+        f"扫描字节: {report['bytes']}  emoji 总数: {report['emoji']}  无法渲染: {report['unrenderable']}",
+        "",
+        "版本    总数        无法渲染    常见的无法渲染序列",
+        "-" * 60,
+    ]
+    for row in report["versions"]:
+        top = " ".join(f"{sequence}×{count}" for sequence, count in row["top_unrenderable"][:5])
+        lines.append(f"{row['version'].ljust(7)} {str(row['total']).ljust(11)} "
+                     f"{str(row['unrenderable']).ljust(11)} {top}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m corpus_scan", description="统计语料中无法渲染的 emoji")
+    parser.add_argument("paths", nargs="+", help="UTF-8 文本文件")
+    parser.add_argument("--font", help="客户端字体文件，默认使用系统的 Segoe UI Emoji")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认等于 CPU 核心数")
+    parser.add_argument("--chunk-mb", type=int, default=16, help="每块大小（MB）")
+    parser.add_argument("--format", choices=("table", "json"), default="table", help="输出格式")
+    parser.add_argument("--no-cache", action="store_true", help="不读写字体解析缓存")
+    args = parser.parse_args(argv)
+
+    import contextlib
+    with contextlib.redirect_stdout(sys.stderr):
+        report = scan_corpus(args.paths, args.font, args.workers, args.chunk_mb << 20, not args.no_cache)
+
+    if args.format == "json":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_table(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
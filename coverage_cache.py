@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from contextlib import closing
+
+from emoji_catalog import catalog_identity, load_emoji_catalog
+from font_coverage import open_font_coverage
+from instrumentation import count, span
+
+# 缓存格式版本，解析逻辑变化时递增即可让旧缓存全部失效
+CACHE_FORMAT_VERSION = 4
+
+CACHE_FILE_NAME = "coverage_cache.sqlite"
+
+_cache = None
+
+
+def default_cache_dir():
+    """用户缓存目录（可通过 UNICODE_CHECKER_CACHE_DIR 覆盖）"""
+    override = os.environ.get("UNICODE_CHECKER_CACHE_DIR")
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "UnicodeChecker", "Cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "UnicodeChecker")
+
+
+def content_hash(font_path):
+    """分块计算字体文件的内容摘要"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(font_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_payload(payload):
+    """将 {名称: bytes 或 JSON 值} 编码为压缩的二进制块"""
+    blobs = [(k, v) for k, v in payload.items() if isinstance(v, (bytes, bytearray))]
+    meta = {k: v for k, v in payload.items() if not isinstance(v, (bytes, bytearray))}
+    header = json.dumps({"meta": meta, "blobs": [[k, len(v)] for k, v in blobs]}).encode("utf-8")
+    raw = struct.pack(">I", len(header)) + header + b"".join(bytes(v) for _, v in blobs)
+    return zlib.compress(raw, 6)
+
+
+def decode_payload(data):
+    raw = zlib.decompress(data)
+    header_len = struct.unpack_from(">I", raw)[0]
+    header = json.loads(raw[4:4 + header_len].decode("utf-8"))
+    payload = dict(header["meta"])
+    offset = 4 + header_len
+    for name, length in header["blobs"]:
+        payload[name] = raw[offset:offset + length]
+        offset += length
+    return payload
+
+
+class CoverageCache:
+    """按字体身份（路径、大小、修改时间、内容摘要）缓存解析结果
+
+    数据保存在用户缓存目录下的单个 SQLite 文件中，多进程并发访问由
+    SQLite 的文件锁保证；总大小超过 max_bytes 时按最近使用时间淘汰。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        from config import CACHE_MAX_BYTES
+
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes if max_bytes is not None else CACHE_MAX_BYTES
+        self.path = os.path.join(self.cache_dir, CACHE_FILE_NAME)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS fonts ("
+                         "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content_hash TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "content_hash TEXT PRIMARY KEY, payload BLOB, nbytes INTEGER, last_used REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def stats(self):
+        """返回命中/未命中等计数"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def lookup_hash(self, font_path):
+        """路径、大小和修改时间都未变时返回记录的内容摘要"""
+        st = os.stat(font_path)
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT size, mtime_ns, content_hash FROM fonts WHERE path = ?",
+                               (os.path.abspath(font_path),)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        return None
+
+    @staticmethod
+    def _result_key(digest, kind):
+        # 同一字体的其他派生结果（如渲染校验）以 "摘要/类型" 为键，随字体一起淘汰
+        return digest if kind is None else f"{digest}/{kind}"
+
+    def get(self, font_path, digest=None, catalog=None, kind=None):
+        """读取缓存的解析结果，未命中返回 None
+
+        catalog 为 emoji 目录标识，与缓存时使用的目录不一致也视为未命中。
+        kind 为空时读取解析结果，否则读取同一字体的其他派生结果。
+        """
+        try:
+            digest = digest or self.lookup_hash(font_path)
+            if digest is None:
+                self.misses += 1
+                return None
+            digest = self._result_key(digest, kind)
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT payload FROM results WHERE content_hash = ?",
+                                   (digest,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE results SET last_used = ? WHERE content_hash = ?",
+                             (time.time(), digest))
+            payload = decode_payload(row[0])
+        except (OSError, sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"读取覆盖缓存失败: {str(e)}")
+            self.misses += 1
+            return None
+        if payload.get("format") != CACHE_FORMAT_VERSION or payload.get("catalog") != catalog:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return payload
+
+    def put(self, font_path, payload, digest=None, kind=None):
+        """写入解析结果并按 LRU 淘汰超出容量的条目"""
+        try:
+            st = os.stat(font_path)
+            digest = digest or self.lookup_hash(font_path) or content_hash(font_path)
+            data = encode_payload(dict(payload, format=CACHE_FORMAT_VERSION))
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("INSERT OR REPLACE INTO fonts VALUES (?, ?, ?, ?)",
+                             (os.path.abspath(font_path), st.st_size, st.st_mtime_ns, digest))
+                conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             (self._result_key(digest, kind), data, len(data), time.time()))
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+            self.stores += 1
+        except (OSError, sqlite3.Error) as e:
+            print(f"写入覆盖缓存失败: {str(e)}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT content_hash, nbytes FROM results ORDER BY last_used").fetchall()
+        for digest, nbytes in rows[:-1]:
+            conn.execute("DELETE FROM results WHERE content_hash = ?", (digest,))
+            if "/" not in digest:
+                conn.execute("DELETE FROM fonts WHERE content_hash = ?", (digest,))
+            self.evictions += 1
+            total -= nbytes
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM fonts")
+            conn.execute("DELETE FROM results")
+
+
+def get_coverage_cache():
+    """进程内共享的缓存实例，缓存目录不可用时返回 None"""
+    global _cache
+    if _cache is None:
+        try:
+            _cache = CoverageCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"初始化覆盖缓存失败: {str(e)}")
+            return None
+    return _cache
+
+
+def analyze_font(font_path):
+    """解析字体并对 emoji 目录打分，返回可缓存的结果字典"""
+    with span("font_open", path=font_path):
+        coverage = open_font_coverage(font_path)
+    if coverage is None:
+        return None
+    try:
+        with span("font_parse", path=font_path):
+            result = {
+                "font_path": font_path,
+                "font_version": coverage.font_revision(),
+                "color_tables": coverage.color_tables(),
+                "coverage": coverage.coverage_bytes(),
+                "color_coverage": coverage.color_coverage_bytes(),
+            }
+        catalog = load_emoji_catalog()
+        if catalog is not None:
+            with span("entry_support", path=font_path):
+                supported = catalog.entry_support(result["coverage"], coverage.supports_sequence)
+            with span("color_support", path=font_path):
+                # 没有彩色表的字体无需逐条查询
+                color = catalog.color_support(supported, coverage.has_color_glyph if result["color_tables"] else None)
+            result["catalog"] = catalog.identity()
+            result["entry_support"] = catalog.pack_support(supported)
+            result["color_support"] = catalog.pack_support(color)
+            result["scores"] = catalog.score(supported)
+            result["color_scores"] = catalog.score(color)
+        return result
+    finally:
+        coverage.close()
+
+
+def load_font_result(font_path, cache=None):
+    """获取字体解析结果，缓存有效时完全跳过字体解析"""
+    if cache is None:
+        return analyze_font(font_path)
+
+    with span("cache_lookup", path=font_path):
+        result = cache.get(font_path, catalog=catalog_identity()) if os.path.exists(font_path) else None
+    if result is not None:
+        count("cache_hit")
+        # 内容相同的字体共享一份缓存，路径以本次查询为准
+        result["font_path"] = font_path
+        return result
+
+    count("cache_miss")
+    result = analyze_font(font_path)
+    if result is not None:
+        with span("cache_store", path=font_path):
+            cache.put(font_path, result)
+    return result
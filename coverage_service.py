@@ -0,0 +1,439 @@
+"""本机覆盖查询服务
+
+    python -m coverage_service [--snapshots 快照清单.json] [--index 索引文件] [--no-cache]
+                               [--host 127.0.0.1] [--port 8765 | --unix 套接字路径] [--workers N]
+
+启动时把每个字体快照（一条回退链，例如某个 Windows 构建自带的 Segoe UI Emoji →
+Segoe UI Symbol → Segoe UI）预先计算为一个只读的二进制索引文件，各工作进程以 mmap
+方式打开同一个文件，操作系统只保留一份物理内存。每个快照包含：
+    codepoint_owner   每个码位由链中第几个字体提供（int8，-1 表示没有）
+    color             合并后的彩色码位位图
+    entry_owner       每个目录条目由第几个字体完整显示（int8）
+    entry_color       每个目录条目是否为彩色字形（uint8）
+    coverage          链中每个字体自己的码位位图（目录以外的序列逐字体检查）
+查询时只做下标访问，工作进程不需要 NumPy，也不需要重新解析字体。
+
+快照清单为 JSON：{"snapshots": [{"name": "win11-22631", "build": 22631,
+"fonts": ["fonts/22631/seguiemj.ttf", "Segoe UI Symbol", ...]}]}，fonts 中可以是字体文件
+（相对清单所在目录）或已安装的字体族名。未指定清单时使用本机的 config.FONT_FALLBACK_CHAIN。
+
+HTTP 接口（JSON，UTF-8，支持 keep-alive）：
+    GET  /health       {"status": "ok", "snapshots": 数量}
+    GET  /snapshots    各快照的名称、构建号和字体
+    POST /query        {"snapshot": 名称 | "build": 构建号, "sequences": ["😀", ...]}
+                       → {"snapshot", "build", "results": [{"sequence", "renderable", "color", "font"}]}
+按构建号查询时使用构建号不超过它的最新快照；两者都未指定时使用清单中的第一个快照。
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import signal
+import socket
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from emoji_catalog import strip_variation_selectors
+from font_coverage import IGNORABLE_CODEPOINTS
+
+INDEX_MAGIC = b"UECIDX01"
+INDEX_FILE_NAME = "coverage_service.idx"
+
+CODEPOINT_COUNT = 0x110000
+
+# 文件头：魔数 + JSON 头长度（uint32，小端）
+_PREFIX_SIZE = len(INDEX_MAGIC) + 4
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _build_number(value, name):
+    """把快照的构建号转成整数，缺失或不是数字时返回 None（该快照只能按名称查询）"""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        print(f"快照 {name} 的构建号无效: {value!r}，只能按名称查询")
+        return None
+
+
+def load_snapshot_manifest(path):
+    """读取快照清单，返回 [{"name", "build", "fonts"}]，相对路径以清单所在目录为准"""
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    entries = manifest.get("snapshots", []) if isinstance(manifest, dict) else manifest
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    snapshots = []
+    for i, entry in enumerate(entries):
+        fonts = []
+        for font in entry.get("fonts", []):
+            candidate = os.path.join(base_dir, font)
+            fonts.append(candidate if os.path.isfile(candidate) else font)
+        name = entry.get("name") or f"snapshot-{i}"
+        snapshots.append({"name": name, "build": _build_number(entry.get("build"), name), "fonts": fonts})
+    return snapshots
+
+
+def local_snapshot():
+    """本机的回退链（config.FONT_FALLBACK_CHAIN），构建号来自系统快照"""
+    from utils import SystemSnapshot
+
+    build = SystemSnapshot.capture().build_number
+    return {"name": f"local-{build}" if build is not None else "local", "build": build, "fonts": None}
+
+
+def _snapshot_arrays(snapshot, use_cache):
+    """加载快照的回退链，返回 (族名列表, 路径列表, {数组名: bytes})；链中没有可用字体时返回 None"""
+    import numpy as np
+
+    from detection import load_fallback_chain
+    from emoji_catalog import load_emoji_catalog
+    from font_chain import resolve_fallback_chain
+
+    fonts = resolve_fallback_chain(snapshot["fonts"])
+    if not fonts:
+        return None
+    chain = load_fallback_chain(fonts[0][1], use_cache, families=[path for _, path in fonts[1:]])
+    merged = chain.merged_result()
+    if merged is None:
+        return None
+
+    arrays = {
+        "codepoint_owner": chain.codepoint_owner().tobytes(),
+        "color": merged.get("color_coverage") or bytes(CODEPOINT_COUNT // 8),
+        "coverage": [result["coverage"] for result in chain.results],
+    }
+    entry_owner = chain.entry_owner()
+    if entry_owner is not None:
+        catalog = load_emoji_catalog()
+        arrays["entry_owner"] = entry_owner.tobytes()
+        arrays["entry_color"] = catalog.unpack_support(merged["color_support"]).astype(np.uint8).tobytes()
+    return chain.families, chain.paths, arrays
+
+
+def build_coverage_index(snapshots, path, use_cache=True):
+    """预先计算各快照的查询数组并写入索引文件（先写临时文件再替换），返回写入的快照数"""
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    header = {
+        "sequences": [strip_variation_selectors(sequence) for sequence in catalog.sequences] if catalog else [],
+        "snapshots": [],
+    }
+    blobs = []
+    offset = 0
+
+    def place(data):
+        nonlocal offset
+        start = _align(offset)
+        blobs.append((start, data))
+        offset = start + len(data)
+        return [start, len(data)]
+
+    for snapshot in snapshots:
+        try:
+            loaded = _snapshot_arrays(snapshot, use_cache)
+        except Exception as e:
+            print(f"加载快照 {snapshot['name']} 失败: {str(e)}")
+            continue
+        if loaded is None:
+            print(f"快照 {snapshot['name']} 中没有可用的字体，已跳过")
+            continue
+        families, paths, arrays = loaded
+        sections = {name: place(data) for name, data in arrays.items() if name != "coverage"}
+        sections["coverage"] = [place(data) for data in arrays["coverage"]]
+        header["snapshots"].append({"name": snapshot["name"],
+                                    "build": _build_number(snapshot.get("build"), snapshot["name"]),
+                                    "families": families, "paths": paths, "sections": sections})
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREFIX_SIZE + len(header_bytes))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_MAGIC + len(header_bytes).to_bytes(4, "little") + header_bytes)
+        for start, data in blobs:
+            f.seek(data_start + start)
+            f.write(data)
+    os.replace(tmp_path, path)
+    return len(header["snapshots"])
+
+
+class IndexedSnapshot:
+    """索引文件中一个快照的只读视图"""
+
+    def __init__(self, info, view):
+        def section(name, fmt="B"):
+            start, length = info["sections"][name]
+            return view[start:start + length].cast(fmt)
+
+        self.name = info["name"]
+        self.build = info.get("build")
+        self.families = info["families"]
+        self.paths = info["paths"]
+        self.codepoint_owner = section("codepoint_owner", "b")
+        self.color = section("color")
+        self.entry_owner = section("entry_owner", "b") if "entry_owner" in info["sections"] else None
+        self.entry_color = section("entry_color") if "entry_color" in info["sections"] else None
+        self.coverage = [view[start:start + length] for start, length in info["sections"]["coverage"]]
+
+    def describe(self):
+        return {"name": self.name, "build": self.build, "fonts": self.families}
+
+    def lookup(self, text, sequence_index):
+        """返回 (提供该序列的字体在链中的位置，没有时为 -1, 是否为彩色字形)"""
+        core = [ord(ch) for ch in text if ord(ch) not in IGNORABLE_CODEPOINTS]
+        if not core:
+            return -1, False
+        color = self.color
+        if len(core) == 1:
+            cp = core[0]
+            owner = self.codepoint_owner[cp]
+            return owner, owner >= 0 and bool(color[cp >> 3] & (1 << (cp & 7)))
+        if self.entry_owner is not None:
+            entry_id = sequence_index.get(strip_variation_selectors(text))
+            if entry_id is not None:
+                owner = self.entry_owner[entry_id]
+                return owner, owner >= 0 and bool(self.entry_color[entry_id])
+        # 目录以外的序列：第一个覆盖全部码位的字体，所有码位都有彩色字形时算彩色
+        for i, bits in enumerate(self.coverage):
+            if all(bits[cp >> 3] & (1 << (cp & 7)) for cp in core):
+                return i, all(color[cp >> 3] & (1 << (cp & 7)) for cp in core)
+        return -1, False
+
+    def query(self, sequences, sequence_index):
+        results = []
+        for sequence in sequences:
+            owner, color = self.lookup(sequence, sequence_index)
+            results.append({"sequence": sequence, "renderable": owner >= 0, "color": color,
+                            "font": self.families[owner] if owner >= 0 else None})
+        return results
+
+
+class CoverageIndex:
+    """以 mmap 只读方式打开的索引文件，多个进程打开同一文件时共享物理内存"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if view[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"不是覆盖查询索引文件: {path}")
+        header_length = int.from_bytes(view[len(INDEX_MAGIC):_PREFIX_SIZE], "little")
+        header = json.loads(bytes(view[_PREFIX_SIZE:_PREFIX_SIZE + header_length]).decode("utf-8"))
+        data = view[_align(_PREFIX_SIZE + header_length):]
+
+        self.sequence_index = {}
+        for entry_id, sequence in enumerate(header["sequences"]):
+            self.sequence_index.setdefault(sequence, entry_id)
+        self.snapshots = [IndexedSnapshot(info, data) for info in header["snapshots"]]
+        self._by_name = {snapshot.name: snapshot for snapshot in self.snapshots}
+        # 只有整数构建号参与按构建号查询（旧索引中可能有字符串）
+        by_build = sorted((snapshot.build, i) for i, snapshot in enumerate(self.snapshots)
+                          if isinstance(snapshot.build, int) and not isinstance(snapshot.build, bool))
+        self._builds = [build for build, _ in by_build]
+        self._build_snapshots = [self.snapshots[i] for _, i in by_build]
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def snapshot(self, name=None, build=None):
+        """按名称或构建号（不超过它的最新快照）选择快照，找不到时抛出 KeyError"""
+        if name is not None:
+            if name not in self._by_name:
+                raise KeyError(f"没有名为 {name} 的快照")
+            return self._by_name[name]
+        if build is not None:
+            i = bisect.bisect_right(self._builds, build) - 1
+            if i < 0:
+                raise KeyError(f"没有构建号不超过 {build} 的快照")
+            return self._build_snapshots[i]
+        if not self.snapshots:
+            raise KeyError("索引中没有快照")
+        return self.snapshots[0]
+
+    def query(self, sequences, name=None, build=None):
+        snapshot = self.snapshot(name, build)
+        return {"snapshot": snapshot.name, "build": snapshot.build,
+                "results": snapshot.query(sequences, self.sequence_index)}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "UnicodeCoverage/1.0"
+    # 响应头和响应体缓冲后一次发出（每个请求结束时 flush），
+    # 避免 Nagle 算法与客户端延迟确认叠加出约 40 ms 的停顿
+    wbufsize = 1 << 16
+
+    def do_GET(self):
+        index = self.server.index
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "snapshots": len(index)})
+        elif self.path == "/snapshots":
+            self._send_json(200, {"snapshots": [snapshot.describe() for snapshot in index.snapshots]})
+        else:
+            self._send_json(404, {"error": f"未知路径: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/query":
+            self._send_json(404, {"error": f"未知路径: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > self.server.max_body:
+            # 请求体未读取，不能继续复用连接
+            self.close_connection = True
+            self._send_json(413, {"error": "请求体过大或长度无效"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            sequences = request["sequences"] if isinstance(request, dict) else None
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": f"无效的请求: {str(e)}"})
+            return
+        if not isinstance(sequences, list) or not all(isinstance(s, str) for s in sequences):
+            self._send_json(400, {"error": "sequences 必须是字符串数组"})
+            return
+        if len(sequences) > self.server.max_batch:
+            self._send_json(413, {"error": f"每次最多查询 {self.server.max_batch} 个序列"})
+            return
+        try:
+            response = self.server.index.query(sequences, request.get("snapshot"), request.get("build"))
+        except KeyError as e:
+            self._send_json(404, {"error": e.args[0]})
+            return
+        except TypeError as e:
+            self._send_json(400, {"error": f"无效的请求: {str(e)}"})
+            return
+        self._send_json(200, response)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix 套接字的客户端地址为空字符串
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        # 高频查询下逐条访问日志的开销比查询本身还大
+        pass
+
+
+class CoverageServer(ThreadingHTTPServer):
+    """在已经监听的套接字上提供查询（多个工作进程共用同一个监听套接字）"""
+
+    daemon_threads = True
+
+    def __init__(self, sock, index, max_batch=None, max_body=None):
+        from config import SERVICE_MAX_BATCH, SERVICE_MAX_BODY
+
+        self.address_family = sock.family
+        super().__init__(sock.getsockname(), QueryHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.index = index
+        self.max_batch = max_batch or SERVICE_MAX_BATCH
+        self.max_body = max_body or SERVICE_MAX_BODY
+
+
+def create_listener(host=None, port=None, unix_path=None):
+    """创建监听套接字：指定 unix_path 时为 Unix 套接字，否则为 TCP"""
+    from config import SERVICE_BACKLOG, SERVICE_HOST, SERVICE_PORT
+
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(unix_path)
+        sock.listen(SERVICE_BACKLOG)
+        return sock
+    return socket.create_server((host or SERVICE_HOST, SERVICE_PORT if port is None else port),
+                                backlog=SERVICE_BACKLOG)
+
+
+def _serve_worker(sock, index_path):
+    """工作进程入口：打开共享的索引文件，在继承的监听套接字上处理请求"""
+    server = CoverageServer(sock, CoverageIndex(index_path))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(index_path, host=None, port=None, unix_path=None, workers=None):
+    """启动服务直到 Ctrl+C；workers 大于 1 时在多个进程中共用同一个监听套接字"""
+    import multiprocessing
+
+    from config import SERVICE_WORKERS
+
+    workers = workers or SERVICE_WORKERS or os.cpu_count() or 1
+    sock = create_listener(host, port, unix_path)
+    address = unix_path if unix_path else "http://%s:%d" % sock.getsockname()[:2]
+    print(f"覆盖查询服务已启动: {address}（{workers} 个工作进程）", file=sys.stderr, flush=True)
+
+    processes = []
+    if workers > 1:
+        processes = [multiprocessing.Process(target=_serve_worker, args=(sock, index_path), daemon=True)
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+    # 被 terminate 时也要结束工作进程并删除 Unix 套接字文件，否则它们会继续占用端口或路径
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        if processes:
+            for process in processes:
+                process.join()
+        else:
+            _serve_worker(sock, index_path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        sock.close()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m coverage_service", description="本机 emoji 覆盖查询服务")
+    parser.add_argument("--snapshots", help="字体快照清单（JSON），默认使用本机的字体回退链")
+    parser.add_argument("--index", help="索引文件；只指定它时直接使用已有的索引，不重新计算")
+    parser.add_argument("--host", default=None, help="监听地址，默认为 config.SERVICE_HOST")
+    parser.add_argument("--port", type=int, default=None, help="监听端口，默认为 config.SERVICE_PORT，0 表示随机端口")
+    parser.add_argument("--unix", metavar="PATH", help="改为监听 Unix 套接字")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为 config.SERVICE_WORKERS")
+    parser.add_argument("--no-cache", action="store_true", help="不读写字体解析缓存")
+    args = parser.parse_args(argv)
+
+    index_path = args.index
+    if not index_path or args.snapshots or not os.path.exists(index_path):
+        from coverage_cache import default_cache_dir
+
+        if not index_path:
+            os.makedirs(default_cache_dir(), exist_ok=True)
+            index_path = os.path.join(default_cache_dir(), INDEX_FILE_NAME)
+        import contextlib
+        with contextlib.redirect_stdout(sys.stderr):
+            snapshots = load_snapshot_manifest(args.snapshots) if args.snapshots else [local_snapshot()]
+            count = build_coverage_index(snapshots, index_path, not args.no_cache)
+        print(f"已为 {count} 个快照建立索引: {index_path}", file=sys.stderr)
+        if not count:
+            return 1
+
+    serve(index_path, args.host, args.port, args.unix, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
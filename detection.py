@@ -0,0 +1,232 @@
+"""与界面无关的检测流程，GUI 和命令行共用
+
+本模块不导入 PySide6 和 pywin32，可在无显示环境和非 Windows 主机上运行。
+"""
+import os
+
+from coverage_cache import get_coverage_cache, load_font_result
+from emoji_catalog import test_catalog_support
+from instrumentation import count, span
+from probe_scheduler import Probe, ProbeScheduler
+from utils import (
+    SystemSnapshot, get_system_info, get_windows_unicode_version, get_segoe_emoji_version,
+    get_segoe_font_path, check_python_compatibility
+)
+
+
+def determine_actual_unicode_support(font_result, threshold=None):
+    """由实测覆盖率确定实际支持的Unicode版本
+
+    取从最旧的版本起覆盖率连续达到 threshold（默认 config.VERSION_INFERENCE_THRESHOLD）的最高版本。
+    font_result 带有目录统计（scores）时直接使用，否则用版本索引按码位统计覆盖位图。
+    """
+    from unicode_age import coverage_scores, infer_supported_version
+
+    if font_result is None:
+        return "检测失败"
+    scores = font_result.get("scores") or coverage_scores(font_result["coverage"])
+    if scores is None:
+        return "检测失败"
+    return infer_supported_version(scores, threshold) or "不支持"
+
+
+def apply_render_verification(font_result, cache=None):
+    """离屏渲染校验：只有 cmap 覆盖且渲染出正常字形的条目才算支持
+
+    返回更新了 scores 并带有 render_scores 的新结果字典；无法校验时原样返回。
+    """
+    from emoji_catalog import load_emoji_catalog
+    from glyph_raster import render_scores, rendered_glyphs, verify_font_rendering
+
+    catalog = load_emoji_catalog()
+    verification = verify_font_rendering(font_result, cache)
+    if verification is None or "entry_support" not in font_result:
+        return font_result
+    rendered = rendered_glyphs(verification["classes"])
+    supported = catalog.unpack_support(font_result["entry_support"]) & rendered
+    verified = dict(font_result, entry_support=catalog.pack_support(supported), scores=catalog.score(supported),
+                    render_scores=render_scores(catalog, verification["classes"]))
+    if "color_support" in font_result:
+        color = catalog.unpack_support(font_result["color_support"]) & rendered
+        verified["color_support"] = catalog.pack_support(color)
+        verified["color_scores"] = catalog.score(color)
+    return verified
+
+
+def font_identity(font_path):
+    """字体文件的 (大小, 修改时间)，文件不存在时返回 None"""
+    try:
+        st = os.stat(font_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def load_fallback_chain(font_path=None, use_cache=True, verify_render=False, families=None, loaded=None):
+    """按回退链加载各字体的解析结果，返回 font_chain.FallbackChain
+
+    font_path 为空时按 families（默认 config.FONT_FALLBACK_CHAIN）组成回退链，
+    链中没有已安装的字体时退回到 get_segoe_font_path；
+    指定 font_path 时它是链中的第一个字体，families 为其后的回退字体。
+    loaded 为 {路径: (font_identity, 结果)}，大小和修改时间未变的字体直接复用其中的结果，
+    重新加载的字体会写回 loaded（监视模式用它只重新解析变化的字体）。
+    """
+    from font_chain import FallbackChain, font_family_name, resolve_fallback_chain
+
+    if font_path:
+        fonts = [(font_family_name(font_path), font_path)] + resolve_fallback_chain(families or [])
+    else:
+        try:
+            fonts = resolve_fallback_chain(families)
+        except Exception as e:
+            print(f"解析字体回退链失败: {str(e)}")
+            fonts = []
+        if not fonts:
+            font_path = get_segoe_font_path()
+            fonts = [(font_family_name(font_path), font_path)]
+
+    cache = get_coverage_cache() if use_cache else None
+    results = []
+    for _, path in fonts:
+        identity = font_identity(path) if loaded is not None else None
+        if identity is not None and path in loaded and loaded[path][0] == identity:
+            results.append(loaded[path][1])
+            continue
+        with span("font_load", path=path):
+            font_result = load_font_result(path, cache)
+        if verify_render and font_result is not None:
+            with span("render_verify", path=path):
+                font_result = apply_render_verification(font_result, cache)
+        if loaded is not None:
+            loaded[path] = (identity, font_result)
+        results.append(font_result)
+    return FallbackChain(fonts, results)
+
+
+def verify_chain_rendering(chain, use_cache=True):
+    """对回退链中的每个字体做离屏渲染校验，返回新的 FallbackChain
+
+    渲染需要 QGuiApplication，必须在调用方的线程（命令行为主线程）中执行，
+    不能放进检测项的守护线程。
+    """
+    from font_chain import FallbackChain
+
+    cache = get_coverage_cache() if use_cache else None
+    results = []
+    for path, font_result in zip(chain.paths, chain.results):
+        with span("render_verify", path=path):
+            results.append(apply_render_verification(font_result, cache))
+    return FallbackChain(list(zip(chain.families, chain.paths)), results)
+
+
+def test_unicode_support(font_path=None, use_cache=True, verify_render=False, families=None):
+    """按版本统计字体回退链对完整 emoji 目录的覆盖率
+
+    font_path 和 families 的含义见 load_fallback_chain；默认使用配置的回退链。
+    verify_render 为真时额外做离屏渲染校验（需要 PySide6）。
+    返回 (results, max_supported, font_result)，font_result 为整条链合并后的结果，
+    其中 fallback_chain 字段记录各字体提供的条目数；每行的 font 为提供示例字符的字体。
+    """
+    chain = load_fallback_chain(font_path, use_cache, verify_render, families)
+    font_result = chain.merged_result()
+    results, max_supported = test_catalog_support(font_result, chain.font_for)
+    return results, max_supported, font_result
+
+
+# detect_unicode_info 结果字典的键顺序
+INFO_KEYS = ("snapshot", "system", "python_compatible", "python_compatibility", "api_version", "font_version",
+             "font_path", "fallback_chain", "actual_version", "color_tables", "max_supported", "results")
+
+
+def _unknown_snapshot(error):
+    return SystemSnapshot.minimal()
+
+
+def _empty_chain(error):
+    from font_chain import FallbackChain
+
+    return FallbackChain([], [])
+
+
+def detection_probes(font_path=None, use_cache=True, snapshot=None, families=None):
+    """检测流程的检测项及其依赖：系统快照 → 系统信息/兼容性/API 版本；字体版本和回退链与它们并发
+
+    回退链检测项只解析字体，渲染校验由 iter_detection 在调用方线程中完成。
+    """
+    from config import PROBE_TIMEOUTS
+
+    def timeout(name):
+        return PROBE_TIMEOUTS.get(name)
+
+    return [
+        Probe("snapshot", (lambda: snapshot) if snapshot else SystemSnapshot.capture,
+              timeout=timeout("snapshot"), fallback=_unknown_snapshot),
+        Probe("system", get_system_info, ("snapshot",), timeout("system"),
+              fallback=lambda error: get_system_info(_unknown_snapshot(error))),
+        Probe("python_compatibility", check_python_compatibility, ("snapshot",), timeout("python_compatibility"),
+              fallback=(False, "检测超时")),
+        Probe("api_version", get_windows_unicode_version, ("snapshot",), timeout("api_version"),
+              fallback="未知版本"),
+        Probe("font_version", get_segoe_emoji_version, timeout=timeout("font_version"), fallback="未知版本"),
+        Probe("fallback_chain", lambda: load_fallback_chain(font_path, use_cache, False, families),
+              timeout=timeout("fallback_chain"), fallback=_empty_chain),
+    ]
+
+
+def iter_detection(font_path=None, use_cache=True, row_batch_size=None, snapshot=None, verify_render=False,
+                   families=None):
+    """并发执行检测流程，每完成一项就产出 (名称, 结果)
+
+    名称包括 snapshot、system、python_compatibility、api_version、font_version，
+    以及回退链加载完成后依次产出的 font_path、fallback_chain、actual_version、color_tables、
+    max_supported、row_count 和按批产出的 ("rows", [行, ...])。各项按完成顺序产出，
+    调用方可随时停止迭代以取消剩余检测（仍在运行的检测项结果被丢弃）。
+    snapshot 为空时由 snapshot 检测项采集一次系统快照，供所有检测项共用。
+    verify_render 为真时，回退链加载完成后在当前线程中做渲染校验。
+    """
+    from config import ROW_BATCH_SIZE
+
+    batch_size = row_batch_size or ROW_BATCH_SIZE
+    scheduler = ProbeScheduler(detection_probes(font_path, use_cache, snapshot, families))
+    for name, value in scheduler.run():
+        if name == "snapshot":
+            yield "snapshot", value.to_dict()
+        elif name == "fallback_chain":
+            if verify_render and len(value):
+                value = verify_chain_rendering(value, use_cache)
+            font_result = value.merged_result()
+            with span("version_checks"):
+                results, max_supported = test_catalog_support(font_result, value.font_for)
+            count("result_rows", len(results))
+            chain = font_result.get("fallback_chain") if font_result else None
+            yield "font_path", chain["fonts"][0]["path"] if chain and chain["fonts"] else font_path
+            yield "fallback_chain", chain
+            with span("version_inference"):
+                actual_version = determine_actual_unicode_support(font_result)
+            yield "actual_version", actual_version
+            yield "color_tables", font_result["color_tables"] if font_result else []
+            yield "max_supported", max_supported
+            yield "row_count", len(results)
+            for start in range(0, len(results), batch_size):
+                yield "rows", results[start:start + batch_size]
+        else:
+            yield name, value
+
+
+def detect_unicode_info(font_path=None, use_cache=True, snapshot=None, verify_render=False, families=None):
+    """执行完整检测流程，返回结果字典（包含可用于离线重放的系统快照）"""
+    info = {}
+    results = []
+    for key, value in iter_detection(font_path, use_cache, snapshot=snapshot, verify_render=verify_render,
+                                     families=families):
+        if key == "rows":
+            results.extend(value)
+        elif key == "row_count":
+            continue
+        elif key == "python_compatibility":
+            info["python_compatible"], info["python_compatibility"] = value
+        else:
+            info[key] = value
+    info["results"] = results
+    # 检测项按完成顺序到达，输出时按固定顺序排列
+    return {key: info[key] for key in INFO_KEYS if key in info}
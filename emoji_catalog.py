@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import sys
+
+from font_coverage import IGNORABLE_CODEPOINTS
+
+# 预编译的 RGI emoji 索引（由 tools/build_emoji_index.py 生成）
+EMOJI_INDEX_FILE = "emoji_index.json"
+
+_catalog = None
+_catalog_identity = None
+_version_samples = None
+
+
+def _index_path():
+    # PyInstaller 单文件模式下数据文件被解压到 sys._MEIPASS
+    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, EMOJI_INDEX_FILE)
+
+
+class EmojiCatalog:
+    """按 Unicode 版本分组的完整 emoji 目录
+
+    所有条目的码位被展开为扁平数组，配合 owner 数组记录每个码位所属条目，
+    覆盖率统计全部通过 NumPy 数组运算完成。NumPy 在构建目录时才导入，
+    命中缓存的检测流程不需要加载它。
+    """
+
+    def __init__(self, index):
+        import numpy as np
+
+        self.emoji_version = index.get("emoji_version", "")
+        self.versions = list(index["versions"])
+        self.sequences = []
+        self.names = []
+        self._sequence_index = None
+
+        version_ids = []
+        codepoints = []
+        owners = []
+        sequence_ids = []
+        for version_id, version in enumerate(self.versions):
+            for key, name in index["versions"][version]:
+                entry_id = len(self.sequences)
+                cps = [int(cp, 16) for cp in key.split()]
+                self.sequences.append("".join(chr(cp) for cp in cps))
+                self.names.append(name)
+                version_ids.append(version_id)
+                core = [cp for cp in cps if cp not in IGNORABLE_CODEPOINTS]
+                codepoints.extend(core)
+                owners.extend([entry_id] * len(core))
+                # 多码位序列需要连字才能显示为单个emoji
+                if len(core) > 1:
+                    sequence_ids.append(entry_id)
+
+        self.version_ids = np.array(version_ids, dtype=np.int16)
+        self.codepoints = np.array(codepoints, dtype=np.int32)
+        self.owners = np.array(owners, dtype=np.int32)
+        self.sequence_ids = np.array(sequence_ids, dtype=np.int32)
+        self.version_totals = np.bincount(self.version_ids, minlength=len(self.versions))
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def version_of(self, entry_id):
+        return self.versions[self.version_ids[entry_id]]
+
+    def sequence_index(self):
+        """{去掉变体选择符的序列: 条目编号}，用于把文本中的 emoji 对应到目录条目"""
+        if self._sequence_index is None:
+            self._sequence_index = {}
+            for entry_id, sequence in enumerate(self.sequences):
+                self._sequence_index.setdefault(strip_variation_selectors(sequence), entry_id)
+        return self._sequence_index
+
+    def identity(self):
+        """目录标识，用于判断缓存的逐条结果是否仍然有效"""
+        return catalog_identity()
+
+    def pack_support(self, supported):
+        import numpy as np
+
+        return np.packbits(supported).tobytes()
+
+    def unpack_support(self, packed):
+        """还原由 np.packbits 压缩的逐条支持结果"""
+        import numpy as np
+
+        bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=len(self.sequences))
+        return bits.astype(bool)
+
+    def entry_support(self, coverage_bits, sequence_check=None):
+        """返回每个条目是否被支持的布尔数组
+
+        先用码位位图向量化筛选；提供 sequence_check 时，
+        码位齐全的多码位序列再逐个确认能否合成为单个字形。
+        """
+        import numpy as np
+
+        bits = np.frombuffer(coverage_bits, dtype=np.uint8)
+        covered = (bits[self.codepoints >> 3] >> (self.codepoints & 7)) & 1
+        missing = np.bincount(self.owners, weights=1 - covered, minlength=len(self.sequences))
+        supported = missing == 0
+        if sequence_check is not None:
+            for entry_id in self.sequence_ids[supported[self.sequence_ids]]:
+                supported[entry_id] = sequence_check(self.sequences[entry_id])
+        return supported
+
+    def color_support(self, supported, color_check):
+        """在已支持的条目中找出渲染为彩色字形的条目，返回布尔数组
+
+        color_check 为 FontCoverage.has_color_glyph，只对已支持的条目调用；为 None 时全部为单色。
+        """
+        import numpy as np
+
+        color = np.zeros(len(self.sequences), dtype=bool)
+        if color_check is None:
+            return color
+        for entry_id in np.flatnonzero(supported):
+            color[entry_id] = color_check(self.sequences[entry_id])
+        return color
+
+    def score(self, supported):
+        """按版本统计逐条支持结果，返回 {版本: (支持数, 总数)}"""
+        import numpy as np
+
+        counts = np.bincount(self.version_ids, weights=supported, minlength=len(self.versions))
+        return {
+            version: (int(counts[i]), int(self.version_totals[i]))
+            for i, version in enumerate(self.versions)
+        }
+
+
+def strip_variation_selectors(text):
+    return text.replace("\uFE0F", "").replace("\uFE0E", "")
+
+
+def catalog_identity():
+    """目录文件的内容摘要，无需解析目录即可校验缓存"""
+    global _catalog_identity
+    if _catalog_identity is None:
+        try:
+            with open(_index_path(), "rb") as f:
+                _catalog_identity = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+        except OSError:
+            return ""
+    return _catalog_identity
+
+
+def version_samples():
+    """{版本: (该分组中去掉变体选择符的序列集合, 示例条目的 (字符, 名称))}
+
+    只读取目录 JSON，不构建 EmojiCatalog，也不需要 NumPy；目录无法加载时返回空字典。
+    """
+    global _version_samples
+    if _version_samples is None:
+        try:
+            with open(_index_path(), encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"加载 emoji 目录失败: {str(e)}")
+            return {}
+        _version_samples = {}
+        for version, items in index.get("versions", {}).items():
+            members = set()
+            first = None
+            for key, name in items:
+                cps = [int(cp, 16) for cp in key.split()]
+                sequence = "".join(chr(cp) for cp in cps)
+                members.add(strip_variation_selectors(sequence))
+                if first is None and len([cp for cp in cps if cp not in IGNORABLE_CODEPOINTS]) == 1:
+                    first = (sequence, name)
+            # 只有多码位序列的分组（例如 15.1）取第一个序列
+            if first is None and items:
+                key, name = items[0]
+                first = ("".join(chr(int(cp, 16)) for cp in key.split()), name)
+            _version_samples[version] = members, first
+    return _version_samples
+
+
+def bucket_sample(version, text):
+    """text 不属于目录中该版本的分组时，返回分组的示例条目 (字符, 名称)，否则返回 None
+
+    示例条目为分组中第一个单码位条目，分组中只有多码位序列时为第一个序列。
+
+    示例字符与该行的覆盖率必须来自同一个分组，字形类型和字体列才不会与覆盖率矛盾。
+    """
+    members, first = version_samples().get(version, (None, None))
+    if members is None or strip_variation_selectors(text) in members:
+        return None
+    return first
+
+
+def load_emoji_catalog():
+    """加载并缓存自带的 emoji 目录，失败时返回 None"""
+    global _catalog
+    if _catalog is None:
+        try:
+            with open(_index_path(), encoding="utf-8") as f:
+                _catalog = EmojiCatalog(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"加载 emoji 目录失败: {str(e)}")
+            return None
+    return _catalog
+
+
+def format_coverage(supported, total):
+    """格式化覆盖率，例如 "97.5% (117/120)" """
+    if not total:
+        return "—"
+    return f"{supported * 100.0 / total:.1f}% ({supported}/{total})"
+
+
+def has_codepoint(coverage_bits, codepoint):
+    """在覆盖位图中查询单个码位"""
+    return bool(coverage_bits[codepoint >> 3] & (1 << (codepoint & 7)))
+
+
+GLYPH_TYPES = ("color", "mono", "missing")
+
+
+def glyph_type(font_result, text):
+    """示例字符的字形类型："color"、"mono" 或 "missing"（只检查码位位图）"""
+    if font_result is None:
+        return "missing"
+    color_bits = font_result.get("color_coverage")
+    is_color = True
+    for ch in text:
+        cp = ord(ch)
+        if cp in IGNORABLE_CODEPOINTS:
+            continue
+        if not has_codepoint(font_result["coverage"], cp):
+            return "missing"
+        if not color_bits or not has_codepoint(color_bits, cp):
+            is_color = False
+    return "color" if is_color else "mono"
+
+
+def bucket_glyph_type(supported, color, threshold):
+    """由版本分组的统计确定该行的字形类型
+
+    没有支持的条目时为 "missing"；彩色条目占支持条目的百分比达到 threshold 时为 "color"，否则为 "mono"。
+    """
+    if not supported:
+        return "missing"
+    return "color" if color * 100.0 / supported >= threshold else "mono"
+
+
+def test_catalog_support(font_result, font_for=None):
+    """按版本计算字体对完整 emoji 目录的覆盖率
+
+    font_result 为 coverage_cache.load_font_result 的返回值（可能来自缓存），
+    其中 scores 字段已包含各版本的统计，此时无需加载目录。
+    font_for 为 FallbackChain.font_for，提供时每行的 font 字段为显示示例字符的字体。
+    返回 (results, max_supported)，results 中每个版本一行，
+    coverage 字段为百分比；目录中没有条目的旧版本退回到示例字符检测。
+    配置的示例字符不属于该版本的目录分组时，char 和 name 取分组的示例条目（见 bucket_sample）。
+    max_supported 为覆盖率达到 COVERAGE_SUPPORT_THRESHOLD 的最高版本。
+    """
+    from config import UNICODE_TEST_CHARS, COVERAGE_SUPPORT_THRESHOLD
+
+    scores = {}
+    if font_result is not None and "scores" in font_result:
+        scores = {version: tuple(counts) for version, counts in font_result["scores"].items()}
+
+    # 做过渲染校验时，每个版本附带渲染为正常字形、豆腐块和空白的条目数
+    render = font_result.get("render_scores", {}) if font_result is not None else {}
+    color_scores = font_result.get("color_scores", {}) if font_result is not None else {}
+
+    results = []
+    max_supported = "0.0"
+    versions = sorted(UNICODE_TEST_CHARS.keys(), key=float, reverse=True)
+    for version in versions:
+        char_info = UNICODE_TEST_CHARS[version]
+        char, name = char_info["char"], char_info["name"]
+
+        if version in scores:
+            supported, total = scores[version]
+            # 配置的示例字符不在该版本的目录分组中时，改用分组中的条目
+            sample = bucket_sample(version, char)
+            if sample is not None:
+                char, name = sample
+        else:
+            covered = font_result is not None and all(
+                has_codepoint(font_result["coverage"], ord(ch)) for ch in char)
+            supported = 1 if covered else 0
+            total = 1
+
+        percent = supported * 100.0 / total if total else 0.0
+        if percent >= COVERAGE_SUPPORT_THRESHOLD and float(version) > float(max_supported):
+            max_supported = version
+
+        # 有目录统计时字形类型和彩色条目数都按整个版本分组计算，否则按示例字符
+        if version in scores and version in color_scores:
+            color = color_scores[version][0]
+            row_glyph_type = bucket_glyph_type(supported, color, COVERAGE_SUPPORT_THRESHOLD)
+        else:
+            row_glyph_type = glyph_type(font_result, char)
+            color = int(supported and row_glyph_type == "color")
+
+        row = {
+            "version": version,
+            "char": char,
+            "name": name,
+            "status": format_coverage(supported, total),
+            "coverage": percent,
+            "supported": supported,
+            "total": total,
+            "release_date": char_info["version"],
+            "glyph_type": row_glyph_type,
+            # 渲染为彩色字形的条目数
+            "color": color
+        }
+        if font_for is not None:
+            row["font"] = font_for(char) or ""
+        if version in render:
+            row["glyph"], row["tofu"], row["blank"] = render[version]
+        results.append(row)
+
+    return results, max_supported
@@ -0,0 +1,161 @@
+"""批量扫描从终端收集的字体文件
+
+    python -m fleet_scan <目录或清单> [-o 结果.ndjson] [--workers N] [--cache]
+
+输入可以是目录（递归查找 .ttf/.ttc/.otf，第一级子目录名视为机器名），
+也可以是清单文件：每行一个路径，或每行一个 {"machine": ..., "path": ..., "snapshot": ...} JSON，
+snapshot 是该机器 `python -m cli --format json` 输出的系统快照，重放时不调用任何系统 API。
+文件先按内容摘要去重，每种字体只解析一次；解析和打分分发到进程池并行执行。
+
+输出为 NDJSON，依次包含：
+    {"type": "file", "machine", "path", "hash"[, "system", "api_version"]}
+                                                            每个输入文件（带快照时附带系统信息）
+    {"type": "font", "hash", "font_version", "files", "coverage": {版本: 百分比}}
+                                                            每种不同的字体（版本 × 字体矩阵的一行）
+    {"type": "summary", "files", "unique_fonts", "failed", "supported_files": {版本: 文件数}}
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from font_registry import FONT_EXTENSIONS
+
+
+def iter_font_entries(source):
+    """产出 (机器名, 字体路径, 系统快照字典或 None)"""
+    if os.path.isdir(source):
+        for dirpath, _, filenames in os.walk(source):
+            rel = os.path.relpath(dirpath, source)
+            machine = "" if rel == "." else rel.split(os.sep)[0]
+            for name in sorted(filenames):
+                if name.lower().endswith(FONT_EXTENSIONS):
+                    yield machine, os.path.join(dirpath, name), None
+        return
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                machine, path, snapshot = record.get("machine", ""), record["path"], record.get("snapshot")
+            else:
+                machine, path, snapshot = "", line, None
+            yield machine, os.path.join(base_dir, path), snapshot
+
+
+def _hash_entry(entry):
+    from coverage_cache import content_hash
+
+    machine, path, snapshot = entry
+    try:
+        return machine, path, snapshot, content_hash(path)
+    except OSError:
+        return machine, path, snapshot, None
+
+
+def _score_font(task):
+    from coverage_cache import get_coverage_cache, load_font_result
+
+    digest, path, use_cache = task
+    result = load_font_result(path, get_coverage_cache() if use_cache else None)
+    if result is None:
+        return digest, None, {}
+    coverage = {
+        version: round(supported * 100.0 / total, 2) if total else 0.0
+        for version, (supported, total) in result.get("scores", {}).items()
+    }
+    return digest, result["font_version"], coverage
+
+
+def _replay_snapshot(snapshot):
+    """用收集到的快照重放系统检测项"""
+    from utils import SystemSnapshot, get_system_info, get_windows_unicode_version
+
+    snapshot = SystemSnapshot.from_dict(snapshot)
+    # 在主进程中执行：诊断信息同样不能混入 stdout 的 NDJSON
+    with contextlib.redirect_stdout(sys.stderr):
+        return {"system": get_system_info(snapshot), "api_version": get_windows_unicode_version(snapshot)}
+
+
+def _init_worker():
+    # 诊断信息不能混入 stdout 的 NDJSON，并让每个进程只加载一次 emoji 目录
+    sys.stdout = sys.stderr
+    from emoji_catalog import load_emoji_catalog
+    load_emoji_catalog()
+
+
+def scan_fonts(source, out, workers=None, use_cache=False, chunksize=64):
+    """扫描 source 中的字体，将 NDJSON 记录写入 out，返回汇总记录"""
+    from config import COVERAGE_SUPPORT_THRESHOLD
+
+    files_by_hash = {}
+    failed = 0
+    total_files = 0
+
+    def emit(record):
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # 第一阶段：并行计算内容摘要并去重
+        for machine, path, snapshot, digest in pool.map(_hash_entry, iter_font_entries(source), chunksize=chunksize):
+            total_files += 1
+            record = {"type": "file", "machine": machine, "path": path, "hash": digest}
+            if snapshot:
+                record.update(_replay_snapshot(snapshot))
+            emit(record)
+            if digest is None:
+                failed += 1
+                continue
+            files_by_hash.setdefault(digest, [path, 0])[1] += 1
+
+        # 第二阶段：每种字体只解析一次
+        tasks = [(digest, path, use_cache) for digest, (path, _) in files_by_hash.items()]
+        supported_files = {}
+        for digest, font_version, coverage in pool.map(_score_font, tasks, chunksize=max(1, chunksize // 16)):
+            count = files_by_hash[digest][1]
+            if font_version is None:
+                failed += count
+            for version, percent in coverage.items():
+                if percent >= COVERAGE_SUPPORT_THRESHOLD:
+                    supported_files[version] = supported_files.get(version, 0) + count
+            emit({"type": "font", "hash": digest, "font_version": font_version,
+                  "files": count, "coverage": coverage})
+
+    summary = {
+        "type": "summary",
+        "files": total_files,
+        "unique_fonts": len(files_by_hash),
+        "failed": failed,
+        "supported_files": dict(sorted(supported_files.items(), key=lambda item: float(item[0]), reverse=True)),
+    }
+    emit(summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m fleet_scan", description="批量扫描字体文件的 emoji 覆盖率")
+    parser.add_argument("source", help="字体目录或清单文件")
+    parser.add_argument("-o", "--output", help="NDJSON 输出文件，默认输出到 stdout")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认等于 CPU 核心数")
+    parser.add_argument("--cache", action="store_true", help="读写本机的字体解析缓存")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", buffering=1 << 20) as out:
+            summary = scan_fonts(args.source, out, args.workers, args.cache)
+    else:
+        summary = scan_fonts(args.source, sys.stdout, args.workers, args.cache)
+    print(f"共扫描 {summary['files']} 个文件，{summary['unique_fonts']} 种不同字体，"
+          f"{summary['failed']} 个失败", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
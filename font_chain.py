@@ -0,0 +1,243 @@
+"""字体回退链
+
+实际渲染时，Segoe UI Emoji 中没有的字符会依次回退到 Segoe UI Symbol、Segoe UI 等字体。
+回退链按 config.FONT_FALLBACK_CHAIN 的顺序由已安装的字体组成，每个字体的解析结果
+（覆盖位图、逐条目录结果）照常来自 coverage_cache。合并时预先算好两个数组：
+    codepoint_owner   每个码位由链中第几个字体提供（-1 表示都没有）
+    entry_owner       每个目录条目由第几个字体完整显示
+并集覆盖即 owner >= 0，查询某个序列由哪个字体提供只需一次数组下标访问，
+不必逐个字体探测。合并需要 NumPy；链中只有一个字体时直接使用它的结果，不导入 NumPy。
+"""
+import os
+
+from emoji_catalog import has_codepoint, load_emoji_catalog, strip_variation_selectors
+from font_coverage import IGNORABLE_CODEPOINTS
+from font_registry import FONT_EXTENSIONS
+from instrumentation import span
+
+CODEPOINT_COUNT = 0x110000
+
+
+def font_family_name(font_path):
+    """字体文件中第一个字体的族名，读取失败时使用文件名"""
+    from font_coverage import FontFormatError, read_font_names
+
+    try:
+        names = read_font_names(font_path)
+    except (OSError, ValueError, FontFormatError):
+        names = []
+    return names[0][0] if names else os.path.basename(font_path)
+
+
+def resolve_fallback_chain(families=None, registry=None):
+    """按顺序返回已安装的 [(族名, 字体文件)]
+
+    families 默认为 config.FONT_FALLBACK_CHAIN，其中也可以直接写字体文件路径；
+    未安装的族被跳过，同一个文件只出现一次。
+    """
+    if families is None:
+        from config import FONT_FALLBACK_CHAIN
+        families = FONT_FALLBACK_CHAIN
+
+    chain = []
+    seen = set()
+    with span("registry_lookup", families=len(families)):
+        for family in families:
+            if os.path.isfile(family) or family.lower().endswith(FONT_EXTENSIONS):
+                name, path = font_family_name(family), family
+            else:
+                if registry is None:
+                    from font_registry import get_font_registry
+                    registry = get_font_registry()
+                name, path = family, registry.find(family)
+            if path and path not in seen:
+                seen.add(path)
+                chain.append((name, path))
+    return chain
+
+
+class FallbackChain:
+    """回退链中各字体的解析结果及合并后的覆盖信息"""
+
+    def __init__(self, fonts, results):
+        """fonts 为 [(族名, 路径)]，results 为对应的 load_font_result 结果；解析失败（None）的字体被跳过"""
+        pairs = [(font, result) for font, result in zip(fonts, results) if result is not None]
+        self.families = [family for (family, _), _ in pairs]
+        self.paths = [path for (_, path), _ in pairs]
+        self.results = [result for _, result in pairs]
+        self._codepoint_owner = None
+        self._entry_owner = None
+        self._merged = None
+
+    def __len__(self):
+        return len(self.results)
+
+    def _catalog(self):
+        """所有字体都有当前目录的逐条结果时返回目录，否则返回 None"""
+        catalog = load_emoji_catalog()
+        if catalog is None or not self.results:
+            return None
+        identity = catalog.identity()
+        if all(result.get("catalog") == identity and "entry_support" in result for result in self.results):
+            return catalog
+        return None
+
+    def codepoint_owner(self):
+        """int8 数组：每个码位由第几个字体提供，-1 表示链中没有字体覆盖"""
+        import numpy as np
+
+        if self._codepoint_owner is None:
+            owner = np.full(CODEPOINT_COUNT, -1, dtype=np.int8)
+            # 从后往前写，靠前的字体覆盖靠后的字体
+            for i in reversed(range(len(self.results))):
+                owner[_unpack_bits(self.results[i]["coverage"])] = i
+            self._codepoint_owner = owner
+        return self._codepoint_owner
+
+    def entry_owner(self):
+        """int8 数组：每个目录条目由第几个字体完整显示；没有目录结果时返回 None"""
+        import numpy as np
+
+        catalog = self._catalog()
+        if catalog is None:
+            return None
+        if self._entry_owner is None:
+            owner = np.full(len(catalog), -1, dtype=np.int8)
+            for i in reversed(range(len(self.results))):
+                owner[catalog.unpack_support(self.results[i]["entry_support"])] = i
+            self._entry_owner = owner
+        return self._entry_owner
+
+    def font_index(self, text):
+        """提供该字符或序列的字体在链中的位置，没有时返回 -1"""
+        core = [ord(ch) for ch in text if ord(ch) not in IGNORABLE_CODEPOINTS]
+        if not core or not self.results:
+            return -1
+        if len(core) == 1:
+            if len(self.results) == 1:
+                return 0 if has_codepoint(self.results[0]["coverage"], core[0]) else -1
+            return int(self.codepoint_owner()[core[0]])
+        # 目录中的多码位序列按逐条结果（包括 GSUB 连字检查）判断，单个字体时也一样
+        entry_owner = self.entry_owner()
+        if entry_owner is not None:
+            entry_id = load_emoji_catalog().sequence_index().get(strip_variation_selectors(text))
+            if entry_id is not None:
+                return int(entry_owner[entry_id])
+        # 目录以外的序列：第一个覆盖全部码位的字体
+        for i, result in enumerate(self.results):
+            if all(has_codepoint(result["coverage"], cp) for cp in core):
+                return i
+        return -1
+
+    def font_for(self, text):
+        """提供该字符或序列的字体族名，没有时返回 None"""
+        i = self.font_index(text)
+        return self.families[i] if i >= 0 else None
+
+    def merged_result(self):
+        """合并后的结果字典，结构与 load_font_result 相同，另带 fallback_chain 摘要"""
+        if self._merged is None:
+            if not self.results:
+                return None
+            if len(self.results) == 1:
+                merged = dict(self.results[0])
+            else:
+                with span("chain_merge", fonts=len(self.results)):
+                    merged = self._merge()
+            merged["fallback_chain"] = self.summary()
+            self._merged = merged
+        return self._merged
+
+    def _merge(self):
+        import numpy as np
+
+        owner = self.codepoint_owner()
+        color = np.zeros(CODEPOINT_COUNT, dtype=bool)
+        color_tables = []
+        for i, result in enumerate(self.results):
+            if result.get("color_coverage"):
+                color |= _unpack_bits(result["color_coverage"]) & (owner == i)
+            color_tables.extend(tag for tag in result.get("color_tables", []) if tag not in color_tables)
+
+        first = self.results[0]
+        merged = {
+            "font_path": first["font_path"],
+            "font_version": first.get("font_version"),
+            "color_tables": color_tables,
+            "coverage": np.packbits(owner >= 0, bitorder="little").tobytes(),
+            "color_coverage": np.packbits(color, bitorder="little").tobytes(),
+        }
+
+        entry_owner = self.entry_owner()
+        if entry_owner is not None:
+            catalog = self._catalog()
+            supported = entry_owner >= 0
+            entry_color = np.zeros(len(catalog), dtype=bool)
+            for i, result in enumerate(self.results):
+                if "color_support" in result:
+                    entry_color |= catalog.unpack_support(result["color_support"]) & (entry_owner == i)
+            merged.update({
+                "catalog": catalog.identity(),
+                "entry_support": catalog.pack_support(supported),
+                "color_support": catalog.pack_support(entry_color),
+                "scores": catalog.score(supported),
+                "color_scores": catalog.score(entry_color),
+            })
+        return merged
+
+    def served_scores(self):
+        """{族名: {版本: (该字体提供的条目数, 总数)}}；没有目录结果时返回空字典"""
+        entry_owner = self.entry_owner()
+        if entry_owner is None:
+            return {}
+        catalog = self._catalog()
+        return {family: catalog.score(entry_owner == i) for i, family in enumerate(self.families)}
+
+    def summary(self):
+        """{"fonts": [{"family", "path", "served"}], "supported", "total"}，按目录条目计数"""
+        if len(self.results) == 1:
+            # 单个字体：直接汇总已有的版本统计，不需要 NumPy
+            scores = self.results[0].get("scores", {})
+            served = [sum(counts[0] for counts in scores.values())]
+            total = sum(counts[1] for counts in scores.values())
+        else:
+            entry_owner = self.entry_owner()
+            if entry_owner is None:
+                served = [0] * len(self.results)
+                total = 0
+            else:
+                served = [int((entry_owner == i).sum()) for i in range(len(self.results))]
+                total = len(entry_owner)
+        fonts = [{"family": family, "path": path, "served": count}
+                 for family, path, count in zip(self.families, self.paths, served)]
+        return {"fonts": fonts, "supported": sum(served), "total": total}
+
+    def iter_entry_rows(self):
+        """逐个目录条目产出 {version, char, name, supported, font, glyph_type}"""
+        catalog = self._catalog()
+        entry_owner = self.entry_owner()
+        if catalog is None or entry_owner is None:
+            return
+        merged = self.merged_result()
+        color = catalog.unpack_support(merged["color_support"]) if "color_support" in merged else None
+        for entry_id, owner in enumerate(entry_owner.tolist()):
+            if owner < 0:
+                glyph_type = "missing"
+            else:
+                glyph_type = "color" if color is not None and color[entry_id] else "mono"
+            yield {
+                "version": catalog.version_of(entry_id),
+                "char": catalog.sequences[entry_id],
+                "name": catalog.names[entry_id],
+                "supported": int(owner >= 0),
+                "font": self.families[owner] if owner >= 0 else "",
+                "glyph_type": glyph_type,
+            }
+
+
+def _unpack_bits(coverage_bits):
+    """把按码位排列的位图（低位在前）展开为布尔数组"""
+    import numpy as np
+
+    bits = np.unpackbits(np.frombuffer(coverage_bits, dtype=np.uint8), count=CODEPOINT_COUNT, bitorder="little")
+    return bits.view(bool)
@@ -0,0 +1,549 @@
+import mmap
+import struct
+
+# Unicode 码位总数（0 ~ 0x10FFFF）
+MAX_CODEPOINT = 0x110000
+
+# 渲染时不单独占用字形的默认可忽略字符（ZWJ、变体选择符）
+IGNORABLE_CODEPOINTS = frozenset((0x200D, 0xFE0E, 0xFE0F))
+
+# 彩色字形相关的表
+COLOR_TABLE_TAGS = ("COLR", "CPAL", "CBDT", "CBLC", "sbix", "SVG ")
+
+# 彩色字形格式，按优先顺序；COLOR_FORMATS[i - 1] 对应字形格式编号 i（0 表示单色）
+COLOR_FORMATS = ("COLR", "SVG", "CBDT", "sbix")
+
+# cmap 子表优先级：(platformID, encodingID)，越靠前越优先
+_CMAP_PREFERENCE = [(3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)]
+
+
+class FontFormatError(Exception):
+    """字体文件格式无法解析"""
+
+
+def count_faces(data):
+    """字体集合（.ttc）中的字体数量，普通字体为 1"""
+    if data[0:4] == b"ttcf":
+        return struct.unpack_from(">I", data, 8)[0]
+    return 1
+
+
+def read_table_directory(data, font_index=0):
+    """读取表目录，返回 {表标签: (偏移, 长度)}"""
+    tag = data[0:4]
+    base = 0
+    if tag == b"ttcf":
+        num_fonts = struct.unpack_from(">I", data, 8)[0]
+        if not 0 <= font_index < num_fonts:
+            raise FontFormatError(f"字体集合中不存在第 {font_index} 个字体")
+        base = struct.unpack_from(">I", data, 12 + 4 * font_index)[0]
+        tag = data[base:base + 4]
+    if tag not in (b"\x00\x01\x00\x00", b"OTTO", b"true"):
+        raise FontFormatError(f"不支持的字体格式: {tag!r}")
+
+    tables = {}
+    num_tables = struct.unpack_from(">H", data, base + 4)[0]
+    for i in range(num_tables):
+        record = base + 12 + 16 * i
+        table_tag, _, offset, length = struct.unpack_from(">4sIII", data, record)
+        tables[table_tag.decode("latin-1")] = (offset, length)
+    return tables
+
+
+def _read_name_table(data, tables):
+    """读取 name 表中的字体族名和样式名（优先使用排版族名 16/17）"""
+    if "name" not in tables:
+        return None, None
+    offset, _ = tables["name"]
+    count, string_offset = struct.unpack_from(">HH", data, offset + 2)
+    names = {}
+    for i in range(count):
+        platform_id, _, language_id, name_id, length, str_offset = struct.unpack_from(
+            ">HHHHHH", data, offset + 6 + 12 * i)
+        if name_id not in (1, 2, 16, 17):
+            continue
+        raw = data[offset + string_offset + str_offset:offset + string_offset + str_offset + length]
+        if platform_id in (0, 3):
+            text = raw.decode("utf-16-be", errors="replace")
+            # Windows 平台的英文名称优先
+            rank = 0 if platform_id == 3 and language_id == 0x409 else 1
+        elif platform_id == 1:
+            text = raw.decode("latin-1")
+            rank = 2
+        else:
+            continue
+        if name_id not in names or rank < names[name_id][0]:
+            names[name_id] = (rank, text)
+    family = names.get(16, names.get(1, (0, None)))[1]
+    style = names.get(17, names.get(2, (0, None)))[1]
+    return family, style
+
+
+def read_font_names(font_path):
+    """只读取表目录和 name 表，返回每个字体的 (族名, 样式名) 列表"""
+    with open(font_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                faces = []
+                for index in range(count_faces(data)):
+                    family, style = _read_name_table(data, read_table_directory(data, index))
+                    if family:
+                        faces.append((family, style or "Regular"))
+                return faces
+            except (struct.error, IndexError) as e:
+                raise FontFormatError(f"字体文件已损坏: {font_path} ({e})")
+
+
+class FontCoverage:
+    """基于内存映射的字体码位覆盖索引
+
+    只读取表目录和 cmap 子表（格式 4/12/14），构建 0x110000 位的位图，
+    判断某个码位是否被字体覆盖只需一次位运算，无需任何 GUI 组件。
+    """
+
+    def __init__(self, font_path, font_index=0):
+        self.font_path = font_path
+        self.tables = {}
+        self.variation_sequences = {}
+        self._bits = bytearray(MAX_CODEPOINT >> 3)
+        self._glyph_ids = {}
+        # GSUB 连字索引在第一次查询序列时才构建
+        self._ligatures = None
+        # 每个字形的彩色格式编号，第一次查询彩色字形时才读取相关的表
+        self._color_glyphs = None
+        self._file = open(font_path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise FontFormatError(f"字体文件为空: {font_path}")
+        try:
+            self._read_table_directory(font_index)
+            self._read_cmap()
+        except (struct.error, IndexError) as e:
+            self.close()
+            raise FontFormatError(f"字体文件已损坏: {font_path} ({e})")
+        except FontFormatError:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __contains__(self, codepoint):
+        return self.has_codepoint(codepoint)
+
+    def __len__(self):
+        return len(self._glyph_ids)
+
+    def close(self):
+        """释放内存映射和文件句柄"""
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def has_codepoint(self, codepoint):
+        """O(1) 判断码位是否在 cmap 中"""
+        if not 0 <= codepoint < MAX_CODEPOINT:
+            return False
+        return bool(self._bits[codepoint >> 3] & (1 << (codepoint & 7)))
+
+    def glyph_id(self, codepoint):
+        """返回码位对应的字形编号，未覆盖时返回 None"""
+        return self._glyph_ids.get(codepoint)
+
+    def supports_text(self, text):
+        """判断文本中的每个码位是否都被覆盖（忽略 ZWJ 和变体选择符）"""
+        if not text:
+            return False
+        for ch in text:
+            cp = ord(ch)
+            if cp in IGNORABLE_CODEPOINTS:
+                continue
+            if not self.has_codepoint(cp):
+                return False
+        return True
+
+    def supports_sequence(self, text):
+        """判断 emoji 序列能否渲染为单个字形
+
+        单码位（可附带变体选择符）只查 cmap；ZWJ 序列、肤色修饰序列、
+        旗帜和键帽序列则查 GSUB 连字索引。
+        """
+        return self.sequence_glyph(text) is not None
+
+    def sequence_glyph(self, text):
+        """返回序列最终渲染成的单个字形编号，无法合成单个字形时返回 None"""
+        if not self.supports_text(text):
+            return None
+        core = [ord(ch) for ch in text if ord(ch) not in IGNORABLE_CODEPOINTS]
+        if len(core) == 1:
+            # 带 FE0F 时优先使用 cmap 格式 14 指定的 emoji 样式字形
+            if "\uFE0F" in text:
+                glyph = self.variation_sequences.get((core[0], 0xFE0F))
+                if glyph is not None:
+                    return glyph
+            return self._glyph_ids[core[0]]
+
+        ligatures = self._ligature_index()
+        # 字体中存在字形的 ZWJ/变体选择符也参与连字匹配
+        glyphs = tuple(self._glyph_ids[ord(ch)] for ch in text if ord(ch) in self._glyph_ids)
+        if glyphs in ligatures:
+            return ligatures[glyphs]
+        # 部分字体的连字规则不包含变体选择符
+        stripped = tuple(self._glyph_ids[cp] for cp in (ord(ch) for ch in text)
+                         if cp in self._glyph_ids and cp not in (0xFE0E, 0xFE0F))
+        if stripped in ligatures:
+            return ligatures[stripped]
+        glyph = self._reduce_to_single_glyph(glyphs)
+        if glyph is None and stripped != glyphs:
+            glyph = self._reduce_to_single_glyph(stripped)
+        return glyph
+
+    def color_format(self, text):
+        """返回序列渲染所用字形的彩色格式（"COLR"、"SVG"、"CBDT"、"sbix"），
+        单色字形返回 "mono"，无法渲染为单个字形时返回 None"""
+        glyph = self.sequence_glyph(text)
+        if glyph is None:
+            return None
+        color_glyphs = self._color_glyph_index()
+        code = color_glyphs[glyph] if glyph < len(color_glyphs) else 0
+        return COLOR_FORMATS[code - 1] if code else "mono"
+
+    def has_color_glyph(self, text):
+        return self.color_format(text) not in (None, "mono")
+
+    def color_coverage_bytes(self):
+        """与 coverage_bytes 对应的位图：码位的默认字形是彩色字形时置位"""
+        color_glyphs = self._color_glyph_index()
+        bits = bytearray(MAX_CODEPOINT >> 3)
+        for cp, glyph in self._glyph_ids.items():
+            if glyph < len(color_glyphs) and color_glyphs[glyph]:
+                bits[cp >> 3] |= 1 << (cp & 7)
+        return bytes(bits)
+
+    def coverage_bytes(self):
+        """返回覆盖位图的只读副本"""
+        return bytes(self._bits)
+
+    def table_slice(self, tag):
+        """返回指定表在映射文件中的 (offset, length)，表不存在时返回 None"""
+        return self.tables.get(tag)
+
+    def font_revision(self):
+        """读取 head 表中的字体修订版本号，例如 "1.51" """
+        if "head" not in self.tables or self._data is None:
+            return ""
+        offset, _ = self.tables["head"]
+        revision = struct.unpack_from(">i", self._data, offset + 4)[0]
+        return f"{revision / 65536.0:.2f}"
+
+    def color_tables(self):
+        """返回字体中存在的彩色字形表"""
+        return [tag.strip() for tag in COLOR_TABLE_TAGS if tag in self.tables]
+
+    def _ligature_index(self):
+        if self._ligatures is None:
+            self._ligatures = {}
+            if "GSUB" in self.tables:
+                try:
+                    self._read_gsub()
+                except (struct.error, IndexError) as e:
+                    print(f"解析GSUB表失败: {self.font_path} ({e})")
+        return self._ligatures
+
+    def _reduce_to_single_glyph(self, glyphs):
+        """按连字规则反复合并（最长匹配优先），处理需要多步连字的序列；
+        能合并为单个字形时返回该字形编号"""
+        ligatures = self._ligatures
+        glyphs = list(glyphs)
+        changed = True
+        while changed and len(glyphs) > 1:
+            changed = False
+            i = 0
+            while i < len(glyphs) - 1:
+                for end in range(len(glyphs), i + 1, -1):
+                    ligature = ligatures.get(tuple(glyphs[i:end]))
+                    if ligature is not None:
+                        glyphs[i:end] = [ligature]
+                        changed = True
+                        break
+                i += 1
+        return glyphs[0] if len(glyphs) == 1 else None
+
+    def _num_glyphs(self):
+        if "maxp" not in self.tables:
+            return 0
+        offset, _ = self.tables["maxp"]
+        return struct.unpack_from(">H", self._data, offset + 4)[0]
+
+    def _color_glyph_index(self):
+        """每个字形的彩色格式编号（bytearray），只读取字体中存在的彩色表"""
+        if self._color_glyphs is None:
+            self._color_glyphs = bytearray(self._num_glyphs())
+            readers = (("COLR", self._read_colr), ("SVG ", self._read_svg),
+                       ("CBLC", self._read_cblc), ("sbix", self._read_sbix))
+            # 逆序写入，使优先级高的格式覆盖优先级低的
+            for code, (tag, reader) in reversed(list(enumerate(readers, 1))):
+                if tag not in self.tables:
+                    continue
+                try:
+                    for glyph in reader():
+                        if glyph < len(self._color_glyphs):
+                            self._color_glyphs[glyph] = code
+                except (struct.error, IndexError) as e:
+                    print(f"解析{tag.strip()}表失败: {self.font_path} ({e})")
+        return self._color_glyphs
+
+    def _read_colr(self):
+        """COLR 版本 0 的基础字形记录和版本 1 的 BaseGlyphList"""
+        data = self._data
+        offset, _ = self.tables["COLR"]
+        version, base_count, base_offset = struct.unpack_from(">HHI", data, offset)
+        for i in range(base_count):
+            yield struct.unpack_from(">H", data, offset + base_offset + 6 * i)[0]
+        if version >= 1:
+            list_offset = struct.unpack_from(">I", data, offset + 14)[0]
+            if list_offset:
+                base_list = offset + list_offset
+                count = struct.unpack_from(">I", data, base_list)[0]
+                for i in range(count):
+                    yield struct.unpack_from(">H", data, base_list + 4 + 6 * i)[0]
+
+    def _read_svg(self):
+        data = self._data
+        offset, _ = self.tables["SVG "]
+        doc_list = offset + struct.unpack_from(">I", data, offset + 2)[0]
+        count = struct.unpack_from(">H", data, doc_list)[0]
+        for i in range(count):
+            start, end = struct.unpack_from(">HH", data, doc_list + 2 + 12 * i)
+            yield from range(start, end + 1)
+
+    def _read_cblc(self):
+        """CBLC 中各尺寸的索引子表，只收集确实有位图数据的字形"""
+        data = self._data
+        offset, _ = self.tables["CBLC"]
+        num_sizes = struct.unpack_from(">I", data, offset + 4)[0]
+        for i in range(num_sizes):
+            size = offset + 8 + 48 * i
+            array_offset, _, subtable_count = struct.unpack_from(">III", data, size)
+            array_at = offset + array_offset
+            for j in range(subtable_count):
+                first, last, additional = struct.unpack_from(">HHI", data, array_at + 8 * j)
+                yield from self._read_cblc_subtable(array_at + additional, first, last)
+
+    def _read_cblc_subtable(self, subtable, first, last):
+        data = self._data
+        index_format = struct.unpack_from(">H", data, subtable)[0]
+        body = subtable + 8
+        count = last - first + 1
+        if index_format in (1, 3):
+            code = "I" if index_format == 1 else "H"
+            offsets = struct.unpack_from(f">{count + 1}{code}", data, body)
+            for k in range(count):
+                # 偏移相同表示该字形没有位图
+                if offsets[k + 1] > offsets[k]:
+                    yield first + k
+        elif index_format == 2:
+            yield from range(first, last + 1)
+        elif index_format == 4:
+            num_glyphs = struct.unpack_from(">I", data, body)[0]
+            pairs = struct.unpack_from(f">{2 * (num_glyphs + 1)}H", data, body + 4)
+            for k in range(num_glyphs):
+                if pairs[2 * k + 3] > pairs[2 * k + 1]:
+                    yield pairs[2 * k]
+        elif index_format == 5:
+            num_glyphs = struct.unpack_from(">I", data, body + 12)[0]
+            yield from struct.unpack_from(f">{num_glyphs}H", data, body + 16)
+
+    def _read_sbix(self):
+        """sbix 的第一个尺寸（各尺寸覆盖的字形通常相同）"""
+        data = self._data
+        offset, _ = self.tables["sbix"]
+        num_strikes = struct.unpack_from(">I", data, offset + 4)[0]
+        if not num_strikes:
+            return
+        strike = offset + struct.unpack_from(">I", data, offset + 8)[0]
+        num_glyphs = self._num_glyphs()
+        offsets = struct.unpack_from(f">{num_glyphs + 1}I", data, strike + 4)
+        for glyph in range(num_glyphs):
+            if offsets[glyph + 1] > offsets[glyph]:
+                yield glyph
+
+    def _read_gsub(self):
+        """收集 GSUB 中所有连字替换（类型 4，含类型 7 扩展）"""
+        data = self._data
+        gsub_offset, _ = self.tables["GSUB"]
+        lookup_list = gsub_offset + struct.unpack_from(">H", data, gsub_offset + 8)[0]
+        lookup_count = struct.unpack_from(">H", data, lookup_list)[0]
+        lookup_offsets = struct.unpack_from(f">{lookup_count}H", data, lookup_list + 2)
+
+        for lookup_offset in lookup_offsets:
+            lookup = lookup_list + lookup_offset
+            lookup_type, _, sub_count = struct.unpack_from(">HHH", data, lookup)
+            sub_offsets = struct.unpack_from(f">{sub_count}H", data, lookup + 6)
+            for sub_offset in sub_offsets:
+                subtable = lookup + sub_offset
+                sub_type = lookup_type
+                if sub_type == 7:
+                    sub_type, extension_offset = struct.unpack_from(">HI", data, subtable + 2)
+                    subtable += extension_offset
+                if sub_type == 4:
+                    self._read_ligature_subst(subtable)
+
+    def _read_ligature_subst(self, subtable):
+        data = self._data
+        coverage_offset, set_count = struct.unpack_from(">HH", data, subtable + 2)
+        first_glyphs = self._read_coverage(subtable + coverage_offset)
+        set_offsets = struct.unpack_from(f">{set_count}H", data, subtable + 6)
+
+        for first, set_offset in zip(first_glyphs, set_offsets):
+            lig_set = subtable + set_offset
+            lig_count = struct.unpack_from(">H", data, lig_set)[0]
+            for lig_offset in struct.unpack_from(f">{lig_count}H", data, lig_set + 2):
+                ligature_at = lig_set + lig_offset
+                ligature, comp_count = struct.unpack_from(">HH", data, ligature_at)
+                components = struct.unpack_from(f">{comp_count - 1}H", data, ligature_at + 4)
+                # 先出现的规则优先，与排版引擎的匹配顺序一致
+                self._ligatures.setdefault((first,) + components, ligature)
+
+    def _read_coverage(self, offset):
+        data = self._data
+        fmt, count = struct.unpack_from(">HH", data, offset)
+        if fmt == 1:
+            return struct.unpack_from(f">{count}H", data, offset + 4)
+        glyphs = []
+        for i in range(count):
+            start, end, _ = struct.unpack_from(">HHH", data, offset + 4 + 6 * i)
+            glyphs.extend(range(start, end + 1))
+        return glyphs
+
+    def _read_table_directory(self, font_index):
+        self.tables = read_table_directory(self._data, font_index)
+
+    def _read_cmap(self):
+        if "cmap" not in self.tables:
+            raise FontFormatError("字体缺少 cmap 表")
+        data = self._data
+        cmap_offset, _ = self.tables["cmap"]
+        num_subtables = struct.unpack_from(">H", data, cmap_offset + 2)[0]
+
+        subtables = {}
+        uvs_offset = None
+        for i in range(num_subtables):
+            platform_id, encoding_id, offset = struct.unpack_from(
+                ">HHI", data, cmap_offset + 4 + 8 * i)
+            sub_offset = cmap_offset + offset
+            fmt = struct.unpack_from(">H", data, sub_offset)[0]
+            if fmt == 14:
+                uvs_offset = sub_offset
+            elif fmt in (4, 12):
+                subtables.setdefault((platform_id, encoding_id), (fmt, sub_offset))
+
+        # 按优先级解析，字形编号以优先级高的子表为准
+        parsed = set()
+        for key in _CMAP_PREFERENCE:
+            if key in subtables and subtables[key] not in parsed:
+                self._read_cmap_subtable(*subtables[key])
+                parsed.add(subtables[key])
+
+        if uvs_offset is not None:
+            self._read_format14(uvs_offset)
+
+    def _read_cmap_subtable(self, fmt, offset):
+        if fmt == 4:
+            self._read_format4(offset)
+        else:
+            self._read_format12(offset)
+
+    def _add(self, codepoint, glyph_id):
+        if glyph_id == 0 or not 0 <= codepoint < MAX_CODEPOINT:
+            return
+        self._bits[codepoint >> 3] |= 1 << (codepoint & 7)
+        self._glyph_ids.setdefault(codepoint, glyph_id)
+
+    def _read_format4(self, offset):
+        data = self._data
+        seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+        end_base = offset + 14
+        start_base = end_base + 2 * seg_count + 2
+        delta_base = start_base + 2 * seg_count
+        range_base = delta_base + 2 * seg_count
+
+        ends = struct.unpack_from(f">{seg_count}H", data, end_base)
+        starts = struct.unpack_from(f">{seg_count}H", data, start_base)
+        deltas = struct.unpack_from(f">{seg_count}h", data, delta_base)
+        range_offsets = struct.unpack_from(f">{seg_count}H", data, range_base)
+
+        for i in range(seg_count):
+            start, end = starts[i], ends[i]
+            if start == 0xFFFF:
+                continue
+            delta, range_offset = deltas[i], range_offsets[i]
+            if range_offset == 0:
+                for cp in range(start, end + 1):
+                    self._add(cp, (cp + delta) & 0xFFFF)
+            else:
+                # idRangeOffset 相对于自身位置寻址 glyphIdArray
+                address = range_base + 2 * i + range_offset
+                for cp in range(start, end + 1):
+                    glyph = struct.unpack_from(">H", data, address + 2 * (cp - start))[0]
+                    if glyph:
+                        self._add(cp, (glyph + delta) & 0xFFFF)
+
+    def _read_format12(self, offset):
+        data = self._data
+        length, _, num_groups = struct.unpack_from(">III", data, offset + 4)
+        # 组数超出子表长度或文件范围时说明子表已损坏，不再逐组读取其他表的数据
+        if 16 + 12 * num_groups > length or offset + length > len(data):
+            raise FontFormatError("cmap 子表已损坏")
+        for i in range(num_groups):
+            start, end, start_glyph = struct.unpack_from(">III", data, offset + 16 + 12 * i)
+            for cp in range(start, min(end, MAX_CODEPOINT - 1) + 1):
+                self._add(cp, start_glyph + cp - start)
+
+    def _read_format14(self, offset):
+        """格式 14：记录变体序列 (基础字符, 变体选择符) -> 字形编号
+
+        默认变体（Default UVS）使用基础字符的 cmap 字形，记录为 None。
+        """
+        data = self._data
+        num_records = struct.unpack_from(">I", data, offset + 6)[0]
+        for i in range(num_records):
+            record = offset + 10 + 11 * i
+            selector = int.from_bytes(data[record:record + 3], "big")
+            default_offset, non_default_offset = struct.unpack_from(">II", data, record + 3)
+
+            if default_offset:
+                ranges_at = offset + default_offset
+                num_ranges = struct.unpack_from(">I", data, ranges_at)[0]
+                for j in range(num_ranges):
+                    entry = ranges_at + 4 + 4 * j
+                    start = int.from_bytes(data[entry:entry + 3], "big")
+                    count = data[entry + 3]
+                    for cp in range(start, start + count + 1):
+                        self.variation_sequences[(cp, selector)] = None
+
+            if non_default_offset:
+                mappings_at = offset + non_default_offset
+                num_mappings = struct.unpack_from(">I", data, mappings_at)[0]
+                for j in range(num_mappings):
+                    entry = mappings_at + 4 + 5 * j
+                    cp = int.from_bytes(data[entry:entry + 3], "big")
+                    glyph = struct.unpack_from(">H", data, entry + 3)[0]
+                    self.variation_sequences[(cp, selector)] = glyph
+
+
+def open_font_coverage(font_path):
+    """打开字体文件并构建覆盖索引，失败时返回 None"""
+    try:
+        return FontCoverage(font_path)
+    except (OSError, FontFormatError) as e:
+        print(f"读取字体覆盖信息失败: {str(e)}")
+        return None
@@ -0,0 +1,344 @@
+"""已安装字体的索引
+
+逐项遍历字体注册表查找一个字体名称是 O(n) 的，而且每次查询都要重新枚举。
+这里一次性把字体来源读成 {族名: {样式: [路径]}} 的索引，在进程内缓存，
+之后的查询都是字典查找。来源发生变化（注册表项的最后写入时间或字体目录的修改时间改变）
+时索引自动重建。
+
+字体来源是可替换的后端：
+    windows    HKLM/HKCU 的 Fonts 注册表项
+    directory  Linux 上的 fc-list 或常见字体目录扫描
+    json       JSON 夹具文件 {"fonts": [{"family", "style", "path"}]}，用于测试和无字体环境
+设置环境变量 UNICODE_CHECKER_FONT_FIXTURE 指向夹具文件即可强制使用 json 后端。
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+from instrumentation import span
+
+FontEntry = namedtuple("FontEntry", "family style path")
+
+FONT_FIXTURE_ENV = "UNICODE_CHECKER_FONT_FIXTURE"
+
+FONT_EXTENSIONS = (".ttf", ".ttc", ".otf")
+
+# 注册表值名称末尾的样式词，例如 "Arial Bold Italic (TrueType)"
+_STYLE_WORDS = ("Thin", "ExtraLight", "Light", "Semilight", "Regular", "Medium",
+                "Semibold", "SemiBold", "Bold", "ExtraBold", "Black", "Italic", "Oblique")
+_FORMAT_SUFFIX = re.compile(r"\s*\((TrueType|OpenType|All res)\)\s*$", re.IGNORECASE)
+
+# 样式未指定时依次尝试的样式
+_DEFAULT_STYLES = ("regular", "normal", "book", "")
+
+
+def split_registry_name(value_name):
+    """把注册表值名称拆成 [(族名, 样式)]，"A & B (TrueType)" 会拆成两项"""
+    name = _FORMAT_SUFFIX.sub("", value_name).strip()
+    entries = []
+    for part in name.split(" & "):
+        words = part.split()
+        style = []
+        while len(words) > 1 and words[-1] in _STYLE_WORDS:
+            style.insert(0, words.pop())
+        entries.append((" ".join(words), " ".join(style) or "Regular"))
+    return entries
+
+
+class WindowsRegistryBackend:
+    """读取 HKLM（系统字体）和 HKCU（当前用户安装的字体）的 Fonts 注册表项"""
+
+    name = "windows"
+    KEY_PATH = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"
+
+    def __init__(self, fonts_dir=None):
+        self.fonts_dir = fonts_dir or os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")
+
+    def _keys(self):
+        import winreg
+
+        for root in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+            try:
+                yield winreg.OpenKey(root, self.KEY_PATH)
+            except OSError:
+                continue
+
+    def fingerprint(self):
+        import winreg
+
+        stamps = []
+        for key in self._keys():
+            with key:
+                # 第三项是最后写入时间（100 纳秒为单位）
+                stamps.append(winreg.QueryInfoKey(key)[2])
+        try:
+            stamps.append(os.stat(self.fonts_dir).st_mtime_ns)
+        except OSError:
+            pass
+        return tuple(stamps)
+
+    def watch_directories(self):
+        """监视模式需要监视的目录：系统字体目录和当前用户的字体目录"""
+        user_dir = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")
+        return [d for d in (self.fonts_dir, user_dir) if os.path.isdir(d)]
+
+    def watch_registry_keys(self):
+        """监视模式需要监视的注册表项 [(根键, 子键路径)]"""
+        import winreg
+
+        return [(winreg.HKEY_LOCAL_MACHINE, self.KEY_PATH), (winreg.HKEY_CURRENT_USER, self.KEY_PATH)]
+
+    def entries(self):
+        import winreg
+
+        for key in self._keys():
+            with key:
+                count = winreg.QueryInfoKey(key)[1]
+                for i in range(count):
+                    try:
+                        value_name, file_name, _ = winreg.EnumValue(key, i)
+                    except OSError:
+                        break
+                    if not isinstance(file_name, str) or not file_name:
+                        continue
+                    # 系统字体只记录文件名，用户安装的字体是完整路径
+                    path = file_name if os.path.isabs(file_name) else os.path.join(self.fonts_dir, file_name)
+                    for family, style in split_registry_name(value_name):
+                        yield FontEntry(family, style, path)
+
+
+class FontDirectoryBackend:
+    """Linux 等平台：优先使用 fc-list，否则直接扫描字体目录读取 name 表"""
+
+    name = "directory"
+
+    def __init__(self, font_dirs=None, cache_dirs=None):
+        home = os.path.expanduser("~")
+        if font_dirs is None:
+            font_dirs = ["/usr/share/fonts", "/usr/local/share/fonts",
+                         os.path.join(home, ".local", "share", "fonts"), os.path.join(home, ".fonts")]
+        if cache_dirs is None:
+            xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(home, ".cache")
+            cache_dirs = ["/var/cache/fontconfig", os.path.join(xdg_cache, "fontconfig")]
+        self.font_dirs = [d for d in font_dirs if os.path.isdir(d)]
+        self.cache_dirs = cache_dirs
+
+    def fingerprint(self):
+        # 只检查顶层字体目录和 fontconfig 缓存目录的修改时间，不遍历整棵目录树：
+        # 直接放进顶层目录的字体改变顶层目录的修改时间，装进子目录的字体由
+        # 随后运行的 fc-cache 重写缓存文件，从而改变缓存目录的修改时间
+        stamps = []
+        for path in self.font_dirs + self.cache_dirs:
+            try:
+                stamps.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(stamps)
+
+    def watch_directories(self):
+        return list(self.font_dirs)
+
+    def entries(self):
+        if shutil.which("fc-list"):
+            try:
+                yield from self._fc_list()
+                return
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"fc-list 执行失败，改为扫描字体目录: {str(e)}")
+        yield from self._scan()
+
+    def _fc_list(self):
+        output = subprocess.run(["fc-list", "--format", "%{family[0]}\t%{style[0]}\t%{file}\n"],
+                                capture_output=True, text=True, check=True, timeout=30).stdout
+        for line in output.splitlines():
+            parts = line.split("\t")
+            if len(parts) == 3 and parts[0]:
+                yield FontEntry(parts[0], parts[1] or "Regular", parts[2])
+
+    def _scan(self):
+        from font_coverage import FontFormatError, read_font_names
+
+        for font_dir in self.font_dirs:
+            for dirpath, _, filenames in os.walk(font_dir):
+                for file_name in sorted(filenames):
+                    if not file_name.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(dirpath, file_name)
+                    try:
+                        faces = read_font_names(path)
+                    except (OSError, ValueError, FontFormatError):
+                        continue
+                    for family, style in faces:
+                        yield FontEntry(family, style, path)
+
+
+class JsonFixtureBackend:
+    """从 JSON 夹具读取字体列表，相对路径以夹具所在目录为基准"""
+
+    name = "json"
+
+    def __init__(self, fixture_path):
+        self.fixture_path = fixture_path
+
+    def fingerprint(self):
+        try:
+            return os.stat(self.fixture_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def watch_directories(self):
+        return []
+
+    def watch_files(self):
+        """夹具文件本身（扩展名不是字体，需要单独列出）"""
+        return [os.path.abspath(self.fixture_path)]
+
+    def entries(self):
+        base_dir = os.path.dirname(os.path.abspath(self.fixture_path))
+        with open(self.fixture_path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        for record in fixture.get("fonts", []):
+            path = record["path"]
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            yield FontEntry(record["family"], record.get("style") or "Regular", path)
+
+
+_BACKENDS = {
+    "windows": WindowsRegistryBackend,
+    "directory": FontDirectoryBackend,
+    "json": JsonFixtureBackend,
+}
+
+
+def register_backend(name, factory):
+    """注册自定义后端；factory 返回带有 fingerprint() 和 entries() 的对象
+
+    后端还可以提供 watch_directories()、watch_files() 和 watch_registry_keys()，供监视模式使用。
+    """
+    _BACKENDS[name] = factory
+
+
+def create_backend(name=None, *args, **kwargs):
+    """按名称创建后端；name 为空或 "auto" 时根据环境选择"""
+    if not name or name == "auto":
+        from config import FONT_REGISTRY_BACKEND
+
+        fixture = os.environ.get(FONT_FIXTURE_ENV)
+        if fixture:
+            return JsonFixtureBackend(fixture)
+        name = FONT_REGISTRY_BACKEND
+        if name == "auto":
+            name = "windows" if os.name == "nt" else "directory"
+    try:
+        factory = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的字体索引后端: {name}")
+    return factory(*args, **kwargs)
+
+
+class FontRegistry:
+    """{族名: {样式: [路径]}} 索引，族名和样式不区分大小写
+
+    check_interval 秒内的查询直接使用已建好的索引，超过后才检查一次来源的指纹，
+    指纹变化时重建。
+    """
+
+    def __init__(self, backend, check_interval=2.0):
+        self.backend = backend
+        self.check_interval = check_interval
+        self._index = None
+        self._names = {}
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self):
+        index = {}
+        names = {}
+        for entry in self.backend.entries():
+            key = entry.family.casefold()
+            names.setdefault(key, entry.family)
+            paths = index.setdefault(key, {}).setdefault(entry.style.casefold(), [])
+            if entry.path not in paths:
+                paths.append(entry.path)
+        return index, names
+
+    def index(self):
+        """返回当前索引，必要时重建"""
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.check_interval:
+            return self._index
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.check_interval:
+                return self._index
+            fingerprint = self.backend.fingerprint()
+            if self._index is None or fingerprint != self._fingerprint:
+                with span("registry_build", backend=type(self.backend).__name__):
+                    self._index, self._names = self._build()
+                self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        """丢弃索引，下次查询时重建"""
+        with self._lock:
+            self._index = None
+
+    def families(self):
+        self.index()
+        return sorted(self._names.values())
+
+    def find_all(self, family, style=None):
+        """返回某个族（和样式）的全部字体文件路径"""
+        styles = self.index().get(family.casefold())
+        if not styles:
+            return []
+        if style is not None:
+            return list(styles.get(style.casefold(), []))
+        for default in _DEFAULT_STYLES:
+            if default in styles:
+                return list(styles[default])
+        return [path for paths in styles.values() for path in paths]
+
+    def find(self, family, style=None):
+        """返回某个族的字体文件路径，没有时返回 None"""
+        paths = self.find_all(family, style)
+        return paths[0] if paths else None
+
+    def find_first(self, families, style=None):
+        """按优先顺序查找第一个已安装的族，返回 (族名, 路径)，都没有时返回 (None, None)"""
+        index = self.index()
+        for family in families:
+            if family.casefold() in index:
+                path = self.find(family, style)
+                if path:
+                    return self._names[family.casefold()], path
+        return None, None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_font_registry():
+    """进程内共享的字体索引"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FontRegistry(create_backend())
+    return _registry
+
+
+def set_font_registry(registry):
+    """替换进程内共享的字体索引（测试或自定义后端使用），返回原来的索引"""
+    global _registry
+    with _registry_lock:
+        previous, _registry = _registry, registry
+    return previous
@@ -0,0 +1,557 @@
+"""监视模式：字体变化后增量重新检测
+
+    python -m cli --watch [--font 字体文件] [--fallback 字体族 ...] [--format table|json|ndjson]
+
+FontWatcher 在后台线程中阻塞等待系统的变化通知，空闲时不占用 CPU：
+    Windows  FindFirstChangeNotification（字体目录）和 RegNotifyChangeKeyValue（Fonts 注册表项）
+    Linux    inotify（字体索引后端的字体目录及其子目录）
+    其他     按 config.FONT_WATCH_POLL_INTERVAL 轮询目录中字体文件的大小和修改时间
+回退链中单独的字体文件只监视其所在目录本身（不含子目录），并且只有扩展名为
+font_registry.FONT_EXTENSIONS 的文件或被监视的文件本身发生变化才算字体变化，
+同一目录中的其他文件（例如缓存）不会触发重新检测。
+收到通知后等待 config.FONT_WATCH_DEBOUNCE 秒内不再有新的变化（去抖），再调用回调。
+
+ChainMonitor 记住回退链中每个字体的 (大小, 修改时间) 和解析结果，每次更新只重新解析
+发生变化的字体，再与上一次的逐条结果比较，给出新增支持、不再支持和改由其他字体提供的 emoji；
+没有任何差异的更新不输出。
+"""
+import datetime
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from font_registry import FONT_EXTENSIONS
+
+# inotify 事件掩码（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def is_font_change(path, files):
+    """目录中的变化是否与字体有关：字体扩展名的文件，或被监视的文件本身"""
+    return path.lower().endswith(FONT_EXTENSIONS) or path in files
+
+
+class _InotifyWaiter:
+    """Linux：对每个目录添加 inotify 监视，select 等待事件
+
+    roots 连同子目录一起监视（新建的子目录随后加入），parents 只监视目录本身；
+    只有与字体有关的事件（is_font_change）才算变化。
+    """
+
+    def __init__(self, roots, parents, files):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._wake_r, self._wake_w = os.pipe()
+        self.roots = roots
+        self.files = {os.path.abspath(p) for p in files}
+        # {监视描述符: (目录, 是否监视子目录)}
+        self._watches = {}
+        self._watched = set()
+        for directory in roots:
+            self._add_tree(directory)
+        for directory in parents:
+            self._add_watch(directory, False)
+
+    def _add_watch(self, directory, recursive):
+        import ctypes
+
+        if directory in self._watched:
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK)
+        if wd < 0:
+            print(f"无法监视目录 {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = (directory, recursive)
+        self._watched.add(directory)
+
+    def _add_tree(self, directory):
+        for dirpath, _, _ in os.walk(directory):
+            self._add_watch(dirpath, True)
+
+    def _read_events(self):
+        """读出全部待处理事件，返回其中是否有字体变化"""
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + _INOTIFY_EVENT.size:offset + _INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += _INOTIFY_EVENT.size + length
+                directory, recursive = self._watches.get(wd, ("", False))
+                if not directory:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    # 被监视的目录本身被删除或移走
+                    changed = True
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        # 新建的子目录也要监视，其中已有的字体算作变化
+                        self._add_tree(path)
+                        changed = changed or any(
+                            is_font_change(f, self.files) for _, _, names in os.walk(path) for f in names)
+                    continue
+                changed = changed or is_font_change(path, self.files)
+        return changed
+
+    def wait(self, timeout):
+        """等待 timeout 秒（None 为一直等待），有字体变化时返回 True，其他文件的变化被忽略"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd, self._wake_r], [], [], remaining)
+            if self.fd not in ready:
+                return False
+            if self._read_events():
+                return True
+
+    def wake(self):
+        os.write(self._wake_w, b"x")
+
+    def close(self):
+        for fd in (self.fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class _WindowsWaiter:
+    """Windows：WaitForMultipleObjects 同时等待目录变化通知、注册表变化事件和停止事件"""
+
+    FILE_NOTIFY = 0x1 | 0x2 | 0x8 | 0x10  # FILE_NAME | DIR_NAME | SIZE | LAST_WRITE
+    REG_NOTIFY = 0x1 | 0x4  # REG_NOTIFY_CHANGE_NAME | REG_NOTIFY_CHANGE_LAST_SET
+    INFINITE = 0xFFFFFFFF
+    WAIT_TIMEOUT = 0x102
+
+    def __init__(self, roots, parents, registry_keys):
+        import ctypes
+        import winreg
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        kernel32 = self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        advapi32 = self._advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+        kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        kernel32.FindNextChangeNotification.argtypes = [wintypes.HANDLE]
+        kernel32.FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+        kernel32.CreateEventW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.SetEvent.argtypes = [wintypes.HANDLE]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        kernel32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                                    wintypes.BOOL, wintypes.DWORD]
+        kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        advapi32.RegNotifyChangeKeyValue.argtypes = [wintypes.HANDLE, wintypes.BOOL, wintypes.DWORD,
+                                                     wintypes.HANDLE, wintypes.BOOL]
+        advapi32.RegNotifyChangeKeyValue.restype = wintypes.LONG
+
+        invalid = wintypes.HANDLE(-1).value
+        self._stop = kernel32.CreateEventW(None, True, False, None)
+        # [(类型, 句柄, 注册表项)]，第一项是停止事件
+        self._handles = [("stop", self._stop, None)]
+        # 目录通知不带文件名，无法按扩展名筛选；单独字体所在的目录只监视目录本身
+        for directory, recursive in [(d, True) for d in roots] + [(d, False) for d in parents]:
+            handle = kernel32.FindFirstChangeNotificationW(directory, recursive, self.FILE_NOTIFY)
+            if handle and handle != invalid:
+                self._handles.append(("dir", handle, None))
+            else:
+                print(f"无法监视目录 {directory}: {ctypes.FormatError(ctypes.get_last_error())}")
+        for root, path in registry_keys:
+            try:
+                key = winreg.OpenKey(root, path, 0, winreg.KEY_NOTIFY | winreg.KEY_READ)
+            except OSError:
+                continue
+            event = kernel32.CreateEventW(None, False, False, None)
+            self._handles.append(("reg", event, key))
+            self._arm_registry(event, key)
+        self._array = (wintypes.HANDLE * len(self._handles))(*[handle for _, handle, _ in self._handles])
+
+    def _arm_registry(self, event, key):
+        # 通知是一次性的，每次触发后都要重新注册
+        self._advapi32.RegNotifyChangeKeyValue(int(key), True, self.REG_NOTIFY, event, True)
+
+    def wait(self, timeout):
+        milliseconds = self.INFINITE if timeout is None else int(timeout * 1000)
+        result = self._kernel32.WaitForMultipleObjects(len(self._handles), self._array, False, milliseconds)
+        if result == self.WAIT_TIMEOUT or result >= len(self._handles):
+            return False
+        kind, handle, key = self._handles[result]
+        if kind == "stop":
+            return False
+        if kind == "dir":
+            self._kernel32.FindNextChangeNotification(handle)
+        else:
+            self._arm_registry(handle, key)
+        return True
+
+    def wake(self):
+        self._kernel32.SetEvent(self._stop)
+
+    def close(self):
+        for kind, handle, key in self._handles:
+            if kind == "dir":
+                self._kernel32.FindCloseChangeNotification(handle)
+            else:
+                self._kernel32.CloseHandle(handle)
+            if key is not None:
+                key.Close()
+
+
+class _PollingWaiter:
+    """没有变化通知时的退路：定期比较目录中字体文件（不含子目录）和被监视文件的大小、修改时间"""
+
+    def __init__(self, directories, files, interval):
+        self.directories = directories
+        self.files = files
+        self.interval = interval
+        self._wake = threading.Event()
+        self._fingerprint = self._snapshot()
+
+    def _snapshot(self):
+        stamps = []
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.lower().endswith(FONT_EXTENSIONS) and entry.is_file():
+                            st = entry.stat()
+                            stamps.append((entry.path, st.st_size, st.st_mtime_ns))
+            except OSError:
+                continue
+        stamps.sort()
+        for path in self.files:
+            try:
+                st = os.stat(path)
+                stamps.append((path, st.st_size, st.st_mtime_ns))
+            except OSError:
+                stamps.append((path, None))
+        return stamps
+
+    def wait(self, timeout):
+        remaining = timeout
+        while remaining is None or remaining > 0:
+            step = self.interval if remaining is None else min(self.interval, remaining)
+            if self._wake.wait(step):
+                self._wake.clear()
+                return False
+            fingerprint = self._snapshot()
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                return True
+            if remaining is not None:
+                remaining -= step
+        return False
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        pass
+
+
+class FontWatcher:
+    """监视字体目录、字体文件和注册表项，变化（去抖后）时调用 callback()
+
+    run() 阻塞直到 stop()；directories 等属性在 run() 开始时读取，之后通过 set_targets 修改，
+    目标变化时在下一次等待前重建等待器（inotify 监视、变化通知句柄和轮询目录都在创建时确定）。
+    """
+
+    def __init__(self, callback, directories=(), files=(), registry_keys=(), debounce=None, poll_interval=None):
+        from config import FONT_WATCH_DEBOUNCE, FONT_WATCH_POLL_INTERVAL
+
+        self.callback = callback
+        self.directories = list(directories)
+        self.files = list(files)
+        self.registry_keys = list(registry_keys)
+        self.debounce = FONT_WATCH_DEBOUNCE if debounce is None else debounce
+        self.poll_interval = FONT_WATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._stopped = threading.Event()
+        self._waiter = None
+        self._rebuild = False
+        self._lock = threading.Lock()
+
+    def set_targets(self, directories=None, files=None, registry_keys=None):
+        """更新监视目标（None 表示不变）；与当前目标不同时重建等待器，可以在任意线程中调用"""
+        with self._lock:
+            changed = False
+            for name, value in (("directories", directories), ("files", files), ("registry_keys", registry_keys)):
+                if value is not None and list(value) != getattr(self, name):
+                    setattr(self, name, list(value))
+                    changed = True
+            if changed:
+                self._rebuild = True
+                if self._waiter is not None:
+                    self._waiter.wake()
+
+    def _create_waiter(self):
+        # 字体目录连同子目录一起监视；单独的字体文件只通过所在目录本身的通知感知
+        roots = sorted({os.path.abspath(d) for d in self.directories if os.path.isdir(d)})
+        parents = {os.path.dirname(os.path.abspath(p)) for p in self.files}
+        parents = sorted(d for d in parents - set(roots) if os.path.isdir(d))
+        try:
+            if os.name == "nt":
+                return _WindowsWaiter(roots, parents, self.registry_keys)
+            if sys.platform.startswith("linux"):
+                return _InotifyWaiter(roots, parents, self.files)
+        except (OSError, AttributeError) as e:
+            print(f"无法使用系统的变化通知，改为轮询: {str(e)}")
+        return _PollingWaiter(roots + parents, self.files, self.poll_interval)
+
+    def _rearm(self, waiter):
+        """监视目标变化后换用新的等待器，返回当前的等待器"""
+        with self._lock:
+            if not self._rebuild or self._stopped.is_set():
+                return waiter
+            self._rebuild = False
+        new_waiter = self._create_waiter()
+        with self._lock:
+            self._waiter = new_waiter
+            if self._stopped.is_set():
+                new_waiter.wake()
+        waiter.close()
+        return new_waiter
+
+    def run(self):
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            self._rebuild = False
+            waiter = self._waiter = self._create_waiter()
+        try:
+            while not self._stopped.is_set():
+                waiter = self._rearm(waiter)
+                if not waiter.wait(None):
+                    continue
+                # 去抖：直到 debounce 秒内没有新的变化
+                while not self._stopped.is_set() and waiter.wait(self.debounce):
+                    pass
+                if self._stopped.is_set():
+                    break
+                try:
+                    self.callback()
+                except Exception as e:
+                    print(f"处理字体变化失败: {str(e)}")
+        finally:
+            waiter.close()
+
+    def stop(self):
+        with self._lock:
+            self._stopped.set()
+            if self._waiter is not None:
+                self._waiter.wake()
+
+
+class ChainMonitor:
+    """回退链的增量检测：只重新解析变化的字体，并给出与上一次的差异"""
+
+    def __init__(self, font_path=None, families=None, use_cache=True, verify_render=False):
+        self.font_path = font_path
+        self.families = families
+        self.use_cache = use_cache
+        self.verify_render = verify_render
+        self.chain = None
+        # {路径: ((大小, 修改时间), 解析结果)}
+        self._loaded = {}
+
+    def update(self):
+        """重新检测，返回差异字典；第一次调用时返回的差异只包含当前状态"""
+        from detection import determine_actual_unicode_support, load_fallback_chain
+        from font_registry import get_font_registry
+
+        # 字体注册表本身有指纹检查间隔，变化通知已经说明需要重建
+        get_font_registry().invalidate()
+        before = {path: identity for path, (identity, _) in self._loaded.items()}
+        chain = load_fallback_chain(self.font_path, self.use_cache, self.verify_render, self.families,
+                                    loaded=self._loaded)
+        for path in list(self._loaded):
+            if path not in chain.paths:
+                del self._loaded[path]
+        after = {path: identity for path, (identity, _) in self._loaded.items()}
+        changed = sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+
+        previous, self.chain = self.chain, chain
+        diff = {
+            "type": "diff",
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "changed_fonts": changed if previous is not None else [],
+            "fallback_chain": chain.summary(),
+            "actual_version": determine_actual_unicode_support(chain.merged_result()),
+            "added": [],
+            "removed": [],
+            "moved": [],
+        }
+        if previous is not None:
+            diff.update(diff_chains(previous, chain))
+        return diff
+
+    @staticmethod
+    def is_empty(diff):
+        """没有字体变化，也没有任何 emoji 的支持情况改变"""
+        return not (diff["changed_fonts"] or diff["added"] or diff["removed"] or diff["moved"])
+
+    def rows(self):
+        """当前回退链按版本汇总的结果行（与 test_unicode_support 相同）"""
+        from emoji_catalog import test_catalog_support
+
+        results, _ = test_catalog_support(self.chain.merged_result(), self.chain.font_for)
+        return results
+
+    def watch_targets(self):
+        """(目录, 字体文件, 注册表项)：字体索引后端的来源以及回退链中的字体文件"""
+        from font_registry import get_font_registry
+
+        backend = get_font_registry().backend
+        directories = backend.watch_directories() if hasattr(backend, "watch_directories") else []
+        registry_keys = backend.watch_registry_keys() if hasattr(backend, "watch_registry_keys") else []
+        files = list(self.chain.paths) if self.chain is not None else []
+        if self.font_path:
+            files.append(self.font_path)
+        if hasattr(backend, "watch_files"):
+            files.extend(backend.watch_files())
+        return directories, files, registry_keys
+
+
+def diff_chains(old, new):
+    """比较两条回退链的逐条结果，返回 {"added", "removed", "moved"}，每项为结果行列表"""
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    old_owner = old.entry_owner()
+    new_owner = new.entry_owner()
+    diff = {"added": [], "removed": [], "moved": []}
+    if catalog is None or old_owner is None or new_owner is None:
+        return diff
+
+    old_families = old.families
+    new_families = new.families
+    for entry_id in (old_owner != new_owner).nonzero()[0].tolist():
+        before, after = int(old_owner[entry_id]), int(new_owner[entry_id])
+        old_font = old_families[before] if before >= 0 else ""
+        new_font = new_families[after] if after >= 0 else ""
+        if old_font == new_font:
+            continue
+        row = {"version": catalog.version_of(entry_id), "char": catalog.sequences[entry_id],
+               "name": catalog.names[entry_id], "font": new_font or old_font}
+        if before < 0:
+            diff["added"].append(row)
+        elif after < 0:
+            diff["removed"].append(row)
+        else:
+            row["previous_font"] = old_font
+            diff["moved"].append(row)
+    return diff
+
+
+def format_diff(diff):
+    """差异的文本形式（命令行和 GUI 的变化记录共用）"""
+    from report_export import format_chain
+
+    lines = [f"[{diff['time']}] 字体变化: {', '.join(os.path.basename(p) for p in diff['changed_fonts']) or '无'}"]
+    for row in diff["added"]:
+        lines.append(f"  + {row['char']}  {row['version'].ljust(5)} {row['name']} ({row['font']})")
+    for row in diff["removed"]:
+        lines.append(f"  - {row['char']}  {row['version'].ljust(5)} {row['name']} ({row['font']})")
+    for row in diff["moved"]:
+        lines.append(f"  ~ {row['char']}  {row['version'].ljust(5)} {row['name']} "
+                     f"({row['previous_font']} → {row['font']})")
+    lines.append(f"  新增 {len(diff['added'])}，失去 {len(diff['removed'])}，改由其他字体提供 {len(diff['moved'])}；"
+                 f"回退链: {format_chain(diff['fallback_chain'])}；实际支持版本: {diff['actual_version']}")
+    return "\n".join(lines)
+
+
+class FontMonitorThread(threading.Thread):
+    """后台线程：先检测一次作为基准，之后每次字体变化调用 on_diff(diff, monitor)"""
+
+    def __init__(self, monitor, on_diff, on_ready=None):
+        super().__init__(name="font-monitor", daemon=True)
+        self.monitor = monitor
+        self.on_diff = on_diff
+        self.on_ready = on_ready
+        self.watcher = FontWatcher(self._changed)
+
+    def _changed(self):
+        diff = self.monitor.update()
+        # 回退链可能加入了其他目录中的字体文件，需要重建监视
+        self.watcher.set_targets(*self.monitor.watch_targets())
+        if not self.monitor.is_empty(diff):
+            self.on_diff(diff, self.monitor)
+
+    def run(self):
+        try:
+            baseline = self.monitor.update()
+            self.watcher.set_targets(*self.monitor.watch_targets())
+        except Exception as e:
+            print(f"监视模式初始化失败: {str(e)}")
+            return
+        if self.on_ready is not None:
+            self.on_ready(baseline, self.monitor)
+        self.watcher.run()
+
+    def stop(self):
+        self.watcher.stop()
+
+
+def run_watch(font_path=None, families=None, use_cache=True, verify_render=False, fmt="table", out=None):
+    """命令行监视模式：输出基准摘要，之后每次字体变化输出一次差异，Ctrl+C 结束"""
+    import json
+
+    out = out or sys.stdout
+    if verify_render:
+        # 渲染校验在监视线程中执行，QGuiApplication 必须先在主线程中创建
+        from glyph_raster import ensure_gui_application
+        try:
+            ensure_gui_application()
+        except ImportError as e:
+            print(f"渲染校验失败: {str(e)}")
+
+    def emit(diff, monitor):
+        if fmt in ("json", "ndjson"):
+            out.write(json.dumps(diff, ensure_ascii=False) + "\n")
+        else:
+            out.write(format_diff(diff) + "\n")
+        out.flush()
+
+    def ready(baseline, monitor):
+        directories, files, _ = monitor.watch_targets()
+        if fmt in ("json", "ndjson"):
+            out.write(json.dumps(dict(baseline, type="baseline"), ensure_ascii=False) + "\n")
+        else:
+            from report_export import format_chain
+            out.write(f"回退链: {format_chain(baseline['fallback_chain'])}；实际支持版本: {baseline['actual_version']}\n"
+                      f"正在监视 {len(directories) + len(files)} 个位置，Ctrl+C 结束\n")
+        out.flush()
+
+    thread = FontMonitorThread(ChainMonitor(font_path, families, use_cache, verify_render), emit, ready)
+    thread.start()
+    try:
+        # 带超时的 join 让主线程能响应 Ctrl+C
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        thread.stop()
+        thread.join(2.0)
+    return 0
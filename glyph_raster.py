@@ -0,0 +1,201 @@
+"""离屏渲染校验：区分正常字形、豆腐块（.notdef）和空白
+
+cmap 覆盖只说明字体声明了某个码位，实际渲染时仍可能得到空白或 .notdef 方框。
+这里把所有待测序列一次性画到一张大的 QImage 图集上（每个序列一个单元格），
+只创建一次 QPainter；再对每个单元格的像素求摘要，与 .notdef 单元格和空单元格的摘要比较：
+    glyph  与两者都不同
+    tofu   与 .notdef 相同
+    blank  与空单元格相同
+cmap 检测认为不支持的条目不渲染，记为 RENDER_UNCHECKED，不计入以上任何一类。
+字体禁止回退到其他字体（NoFontMerging），否则缺失的字形会被系统字体补上。
+
+需要 PySide6；没有显示环境时自动使用 offscreen 平台。分类结果按字体内容摘要缓存。
+"""
+import hashlib
+import os
+
+RENDER_GLYPH = 0
+RENDER_TOFU = 1
+RENDER_BLANK = 2
+# 字体不声明支持、未参与渲染的条目
+RENDER_UNCHECKED = 3
+RENDER_LABELS = ("glyph", "tofu", "blank")
+
+# 单元格边长为字号的两倍，避免字形越界影响相邻单元格
+CELL_SCALE = 2
+
+_app = None
+
+
+def ensure_gui_application():
+    """确保存在 QGuiApplication；无界面模式下使用 offscreen 平台创建一个"""
+    global _app
+    from PySide6.QtGui import QGuiApplication
+
+    app = QGuiApplication.instance()
+    if app is None:
+        if os.name != "nt" and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = _app = QGuiApplication(["unicode-checker-raster"])
+    return app
+
+
+def _missing_codepoint(coverage_bits):
+    """找一个字体未覆盖的私用区码位，用来画出 .notdef"""
+    for cp in range(0x10FFFD, 0xF0000, -1):
+        if not coverage_bits or not coverage_bits[cp >> 3] & (1 << (cp & 7)):
+            return chr(cp)
+    return "\U0010FFFD"
+
+
+class GlyphAtlas:
+    """把一批序列画到同一张图集上并返回每个单元格的摘要"""
+
+    def __init__(self, font_path, pixel_size=32, columns=64):
+        from PySide6.QtGui import QFont, QFontDatabase
+
+        ensure_gui_application()
+        self.font_id = QFontDatabase.addApplicationFont(font_path)
+        families = QFontDatabase.applicationFontFamilies(self.font_id) if self.font_id >= 0 else []
+        if not families:
+            raise ValueError(f"Qt 无法加载字体: {font_path}")
+        self.font = QFont(families[0])
+        self.font.setPixelSize(pixel_size)
+        self.font.setStyleStrategy(QFont.StyleStrategy(QFont.NoFontMerging | QFont.PreferAntialias))
+        self.cell = pixel_size * CELL_SCALE
+        self.columns = columns
+
+    def close(self):
+        from PySide6.QtGui import QFontDatabase
+
+        if self.font_id >= 0:
+            QFontDatabase.removeApplicationFont(self.font_id)
+            self.font_id = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def render_hashes(self, sequences):
+        """一次绘制全部序列，返回与 sequences 对应的单元格摘要列表"""
+        from PySide6.QtCore import QRect, Qt
+        from PySide6.QtGui import QImage, QPainter
+
+        count = len(sequences)
+        if count == 0:
+            return []
+        columns = min(self.columns, count)
+        rows = (count + columns - 1) // columns
+        cell = self.cell
+        image = QImage(columns * cell, rows * cell, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+
+        painter = QPainter(image)
+        try:
+            painter.setFont(self.font)
+            painter.setPen(Qt.black)
+            for i, text in enumerate(sequences):
+                if text:
+                    rect = QRect((i % columns) * cell, (i // columns) * cell, cell, cell)
+                    painter.drawText(rect, Qt.AlignCenter, text)
+        finally:
+            painter.end()
+
+        # 直接在整张图的像素上切片，不为每个单元格复制 QImage
+        stride = image.bytesPerLine()
+        pixels = memoryview(image.constBits()).cast("B")
+        row_bytes = cell * 4
+        hashes = []
+        for i in range(count):
+            x = (i % columns) * row_bytes
+            y = (i // columns) * cell
+            digest = hashlib.blake2b(digest_size=16)
+            for line in range(y, y + cell):
+                start = line * stride + x
+                digest.update(pixels[start:start + row_bytes])
+            hashes.append(digest.digest())
+        return hashes
+
+
+def classify_sequences(font_path, sequences, coverage_bits=None, pixel_size=32):
+    """渲染并分类 sequences，返回 (每个序列的 RENDER_* 分类 bytes, .notdef 摘要, 空单元格摘要)"""
+    with GlyphAtlas(font_path, pixel_size) as atlas:
+        # 参照单元格与待测序列画在同一张图集上，渲染条件完全一致
+        hashes = atlas.render_hashes([_missing_codepoint(coverage_bits), ""] + list(sequences))
+    notdef_hash, empty_hash = hashes[0], hashes[1]
+    classes = bytearray(len(sequences))
+    for i, digest in enumerate(hashes[2:]):
+        if digest == empty_hash:
+            classes[i] = RENDER_BLANK
+        elif digest == notdef_hash:
+            classes[i] = RENDER_TOFU
+    return bytes(classes), notdef_hash, empty_hash
+
+
+def render_cache_kind(pixel_size=32):
+    """渲染结果依赖 Qt 版本和字号，一并写入缓存类型"""
+    from PySide6 import __version__ as qt_version
+
+    return f"render-{pixel_size}-{qt_version}"
+
+
+def verify_font_rendering(font_result, cache=None, pixel_size=32):
+    """对目录序列做渲染校验，返回 {"classes": bytes, "notdef_hash", "empty_hash"}
+
+    font_result 为 coverage_cache.load_font_result 的结果；classes 与目录条目一一对应。
+    只渲染 cmap 检测认为支持的序列，其余条目记为 RENDER_UNCHECKED。失败时打印原因并返回 None。
+    """
+    from emoji_catalog import load_emoji_catalog
+
+    catalog = load_emoji_catalog()
+    if font_result is None or catalog is None:
+        return None
+    font_path = font_result["font_path"]
+    identity = catalog.identity()
+    kind = None
+    if cache is not None:
+        kind = render_cache_kind(pixel_size)
+        cached = cache.get(font_path, catalog=identity, kind=kind)
+        if cached is not None:
+            return cached
+
+    if "entry_support" in font_result:
+        candidates = catalog.unpack_support(font_result["entry_support"]).nonzero()[0].tolist()
+    else:
+        candidates = list(range(len(catalog)))
+    try:
+        rendered, notdef_hash, empty_hash = classify_sequences(
+            font_path, [catalog.sequences[i] for i in candidates], font_result.get("coverage"), pixel_size)
+    except (ImportError, ValueError) as e:
+        print(f"渲染校验失败: {str(e)}")
+        return None
+    classes = bytearray([RENDER_UNCHECKED]) * len(catalog)
+    for entry_id, render_class in zip(candidates, rendered):
+        classes[entry_id] = render_class
+    result = {"catalog": identity, "classes": bytes(classes),
+              "notdef_hash": notdef_hash.hex(), "empty_hash": empty_hash.hex()}
+    if cache is not None:
+        cache.put(font_path, result, kind=kind)
+    return result
+
+
+def rendered_glyphs(classes):
+    """渲染为正常字形的条目（布尔数组）"""
+    import numpy as np
+
+    return np.frombuffer(classes, dtype=np.uint8) == RENDER_GLYPH
+
+
+def render_scores(catalog, classes):
+    """按版本统计渲染分类，返回 {版本: [glyph, tofu, blank]}
+
+    只统计实际渲染过的条目（字体声明支持的序列），三项之和等于该版本的 cmap 支持数。
+    """
+    import numpy as np
+
+    classes = np.frombuffer(classes, dtype=np.uint8)
+    counts = [np.bincount(catalog.version_ids, weights=classes == render_class, minlength=len(catalog.versions))
+              for render_class in (RENDER_GLYPH, RENDER_TOFU, RENDER_BLANK)]
+    return {version: [int(c[i]) for c in counts] for i, version in enumerate(catalog.versions)}
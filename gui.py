@@ -1,16 +1,28 @@
 # 新建文件 gui_pyqt.py
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QStandardItemModel, QStandardItem, QFont
+from PySide6.QtCore import Qt, QThreadPool
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton, QTableView, 
     QVBoxLayout, QHBoxLayout, QFrame, QHeaderView, QScrollArea, QComboBox, 
-    QStatusBar, QFileDialog, QPlainTextEdit
+    QStatusBar, QFileDialog, QPlainTextEdit, QProgressBar, QCheckBox
 )
 import sys
-from utils import get_system_info, get_windows_unicode_version, get_segoe_emoji_version, get_segoe_font_name,check_python_compatibility
-from config import UNICODE_TEST_CHARS
+from utils import get_windows_unicode_version
+from coverage_cache import get_coverage_cache
+from detection import determine_actual_unicode_support, test_unicode_support
+from gui_worker import DetectionWorker, WatchSignals, start_font_monitor
+from result_model import ResultTableModel, STATUS_LABELS
+from report_export import format_chain, format_for_path, write_report
+import instrumentation
 import unicodedata
 
+# 导出对话框的文件类型与导出格式
+REPORT_FILE_FILTERS = {
+    "文本文件 (*.txt)": "text",
+    "JSON 文件 (*.json)": "json",
+    "CSV 文件 (*.csv)": "csv",
+    "NDJSON 文件 (*.ndjson)": "ndjson",
+}
+
 class UnicodeCheckerWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -22,50 +34,116 @@ class UnicodeCheckerWindow(QMainWindow):
         self.setCentralWidget(self.central_widget)
         self.layout = QVBoxLayout(self.central_widget)
         
+        # 后台检测状态
+        self.detection_worker = None
+        self.detection_generation = 0
+        # 当前一代检测的结果（与 detection.detect_unicode_info 的字典结构相同，不含 results）
+        self.detection_info = {}
+        # 监视模式的后台线程（font_watch.FontMonitorThread）
+        self.font_monitor = None
+        self.watch_signals = WatchSignals()
+        self.watch_signals.ready.connect(self.on_watch_ready)
+        self.watch_signals.changed.connect(self.on_fonts_changed)
+        
         # 创建界面组件
         self.create_widgets()
         
-        # 检测Unicode信息
+        # 检测Unicode信息（在后台线程中进行，窗口可以立即显示）
         self.detect_unicode_info()
 
     def detect_unicode_info(self):
+        """在线程池中启动检测，结果通过信号逐项回到界面线程"""
+        self.cancel_detection()
+        self.detection_generation += 1
+        self.detection_info = {}
+        worker = DetectionWorker(self.detection_generation)
+        worker.signals.probe_finished.connect(self.on_probe_finished)
+        worker.signals.rows_ready.connect(self.on_rows_ready)
+        worker.signals.progress.connect(self.on_detection_progress)
+        worker.signals.finished.connect(self.on_detection_finished)
+        worker.signals.failed.connect(self.on_detection_failed)
+        self.detection_worker = worker
+
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
         self.status_bar.showMessage("正在检测系统信息...")
-        
-        # 获取系统信息
-        sys_info = get_system_info()
-        self.os_label.setText(f"操作系统: {sys_info['os_name']} {sys_info['os_version']}")
-        self.build_label.setText(f"构建版本: {sys_info['build']}")
-        self.arch_label.setText(f"系统架构: {sys_info['arch']}")
-        self.python_label.setText(f"Python 版本: {sys_info['python_version']}")
-
-        # 新增：Python兼容性检查
-        is_compatible, comp_msg = check_python_compatibility()
-        self.compat_result.setText(f"Python 兼容性: {'✓ 兼容' if is_compatible else '✗ 不兼容'} - {comp_msg}")
-
-        # 获取API检测结果
-        self.status_bar.showMessage("正在通过系统API检测Unicode版本...")
-        api_result = self.get_windows_unicode_version()
-        self.api_result.setText(f"系统 API 检测: {api_result}")
-
-        # 获取字体检测结果
-        self.status_bar.showMessage("正在检测Segoe UI Emoji字体版本...")
-        font_result = get_segoe_emoji_version()
-        self.font_result.setText(f"Segoe UI Emoji 版本: {font_result}")
-
-        # 新增：实际支持版本检测逻辑
-        actual_version = self.determine_actual_unicode_support(api_result, font_result)
-        self.support_result.setText(f"实际支持版本: {actual_version}")
-
-        # 调用 test_unicode_support 并将结果显示到表格中
-        test_results, _ = self.test_unicode_support()
-        for result in test_results:
-            self.table_model.appendRow([
-                QStandardItem(result["version"]),
-                QStandardItem(result["char"]),
-                QStandardItem(result["status"]),
-                QStandardItem(result["name"]),
-                QStandardItem(result["release_date"])
-            ])
+        QThreadPool.globalInstance().start(worker)
+
+    def cancel_detection(self):
+        """取消正在进行的检测（其后续信号将被忽略）"""
+        if self.detection_worker is not None:
+            self.detection_worker.cancel()
+            self.detection_worker = None
+
+    def on_probe_finished(self, generation, key, value):
+        if generation != self.detection_generation:
+            return
+        if key == "python_compatibility":
+            self.detection_info["python_compatible"], self.detection_info[key] = value
+        elif key != "row_count":
+            self.detection_info[key] = value
+
+        if key == "system":
+            self.os_label.setText(f"操作系统: {value['os_name']} {value['os_version']}")
+            self.build_label.setText(f"构建版本: {value['build']}")
+            self.arch_label.setText(f"系统架构: {value['arch']}")
+            self.python_label.setText(f"Python 版本: {value['python_version']}")
+            self.status_bar.showMessage("正在通过系统API检测Unicode版本...")
+        elif key == "python_compatibility":
+            is_compatible, comp_msg = value
+            self.compat_result.setText(f"Python 兼容性: {'✓ 兼容' if is_compatible else '✗ 不兼容'} - {comp_msg}")
+        elif key == "api_version":
+            self.api_result.setText(f"系统 API 检测: {value}")
+            self.status_bar.showMessage("正在检测Segoe UI Emoji字体版本...")
+        elif key == "font_version":
+            self.font_result.setText(f"Segoe UI Emoji 版本: {value}")
+            self.status_bar.showMessage("正在检测emoji覆盖率...")
+        elif key == "actual_version":
+            self.support_result.setText(f"实际支持版本: {value}")
+        elif key == "fallback_chain":
+            self.chain_result.setText(f"字体回退链: {format_chain(value)}")
+
+    def on_rows_ready(self, generation, rows):
+        if generation != self.detection_generation:
+            return
+        # 将各版本覆盖率追加到表格中
+        with instrumentation.span("table_fill", rows=len(rows)):
+            self.table_model.append_results(rows)
+
+    def on_detection_progress(self, generation, done, total):
+        if generation != self.detection_generation:
+            return
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_detection_finished(self, generation):
+        if generation != self.detection_generation:
+            return
+        self.detection_worker = None
+        self.progress_bar.hide()
+        self.update_version_filter()
+        cache = get_coverage_cache()
+        if cache is not None:
+            stats = cache.stats()
+            message = f"检测完成（缓存命中 {stats['hits']} / 未命中 {stats['misses']}）"
+        else:
+            message = "检测完成"
+        if instrumentation.enabled():
+            message += " " + instrumentation.format_summary()
+        self.status_bar.showMessage(message)
+
+    def on_detection_failed(self, generation, message):
+        if generation != self.detection_generation:
+            return
+        self.detection_worker = None
+        self.progress_bar.hide()
+        self.status_bar.showMessage(f"检测失败: {message}")
+
+    def closeEvent(self, event):
+        self.cancel_detection()
+        self.stop_watch()
+        instrumentation.disable()
+        super().closeEvent(event)
 
     def create_widgets(self):
         # 检测结果框架
@@ -98,6 +176,10 @@ class UnicodeCheckerWindow(QMainWindow):
         self.support_result = QLabel("实际支持版本: 检测中...")
         result_layout.addWidget(self.support_result)
 
+        # 字体回退链及各字体提供的 emoji 数
+        self.chain_result = QLabel("字体回退链: 检测中...")
+        result_layout.addWidget(self.chain_result)
+
         result_frame.setLayout(result_layout)
         self.layout.addWidget(result_frame)
 
@@ -105,18 +187,45 @@ class UnicodeCheckerWindow(QMainWindow):
         test_frame = QFrame()
         test_layout = QVBoxLayout()
         
-        # 表格视图
+        # 筛选条件
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("版本:"))
+        self.version_filter = QComboBox()
+        self.version_filter.addItem("全部", None)
+        self.version_filter.currentIndexChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.version_filter)
+        filter_layout.addWidget(QLabel("状态:"))
+        self.status_filter = QComboBox()
+        self.status_filter.addItem("全部", None)
+        for status, label in enumerate(STATUS_LABELS):
+            self.status_filter.addItem(label, status)
+        self.status_filter.currentIndexChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.status_filter)
+        filter_layout.addStretch()
+        test_layout.addLayout(filter_layout)
+
+        # 表格视图（列式数据模型，按需提供单元格内容）
         self.table_view = QTableView()
-        self.table_model = QStandardItemModel()
-        self.table_model.setHorizontalHeaderLabels(["Unicode 版本", "字符", "支持状态", "名称", "发布日期"])
+        self.table_model = ResultTableModel(self)
         
         self.table_view.setModel(self.table_model)
+        # 默认按插入顺序（版本从高到低）显示，点击表头后才排序
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
         # 优化表格展示：使用Stretch模式使表格均匀伸展满界面
         header = self.table_view.horizontalHeader()
         # 修改为：所有列均匀拉伸
         header.setSectionResizeMode(QHeaderView.Stretch)  # 所有列均匀拉伸
         
         test_layout.addWidget(self.table_view)
+
+        # 监视模式下的变化记录
+        self.watch_log = QPlainTextEdit()
+        self.watch_log.setReadOnly(True)
+        self.watch_log.setMaximumBlockCount(1000)
+        self.watch_log.setMaximumHeight(120)
+        self.watch_log.hide()
+        test_layout.addWidget(self.watch_log)
         test_frame.setLayout(test_layout)
         self.layout.addWidget(test_frame)
 
@@ -124,6 +233,12 @@ class UnicodeCheckerWindow(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
+        
+        # 检测进度
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.status_bar.addPermanentWidget(self.progress_bar)
 
         # 按钮框架
         button_frame = QFrame()
@@ -138,31 +253,30 @@ class UnicodeCheckerWindow(QMainWindow):
         exit_btn = QPushButton("退出")
         exit_btn.clicked.connect(self.close)
         
+        # 监视字体目录和注册表，字体变化时只更新差异
+        self.watch_check = QCheckBox("监视字体变化")
+        self.watch_check.toggled.connect(self.toggle_watch)
+
+        # 记录各检测阶段的耗时，检测完成后在状态栏显示摘要，可导出为 Chrome 跟踪文件
+        self.trace_check = QCheckBox("性能跟踪")
+        self.trace_check.toggled.connect(self.toggle_tracing)
+        self.export_trace_btn = QPushButton("导出跟踪")
+        self.export_trace_btn.clicked.connect(self.export_trace)
+        self.export_trace_btn.hide()
+
         button_layout.addWidget(refresh_btn)
         button_layout.addWidget(export_btn)
+        button_layout.addWidget(self.watch_check)
+        button_layout.addWidget(self.trace_check)
+        button_layout.addWidget(self.export_trace_btn)
         button_layout.addStretch()
         button_layout.addWidget(exit_btn)
         button_frame.setLayout(button_layout)
         self.layout.addWidget(button_frame)
 
-    def determine_actual_unicode_support(self, api_version, font_version):
-        """根据API检测结果和字体版本确定实际支持的Unicode版本"""
-        try:
-            # 解析API版本号
-            api_major = int(api_version.split('.')[0])
-            
-            # 根据字体版本确定最大支持版本
-            if font_version.startswith("5.00"):
-                return "15.1" if api_major >= 15 else "14.0"
-            elif font_version.startswith("3.00"):
-                return "14.0" if api_major >= 14 else "12.1"
-            elif font_version.startswith("1.51"):
-                return "12.1" if api_major >= 12 else "12.0"
-            else:
-                return "12.0"
-        except Exception as e:
-            print(f"确定实际支持版本失败: {str(e)}")
-            return "检测失败"
+    def determine_actual_unicode_support(self, font_result):
+        """由实测覆盖率确定实际支持的Unicode版本"""
+        return determine_actual_unicode_support(font_result)
 
     def get_windows_unicode_version(self):
         """
@@ -172,107 +286,121 @@ class UnicodeCheckerWindow(QMainWindow):
         return get_windows_unicode_version()
 
     def test_unicode_support(self):
-        results = []
-        max_supported = "0.0"
-        
-        # 获取系统支持的Emoji字体名称
-        segoe_font = get_segoe_font_name() or "Segoe UI Emoji"
-        # 提取基础字体名称（去掉后面可能的(TrueType)标识）
-        font_family = segoe_font.split(" (")[0] if " " in segoe_font else segoe_font
-    
-        # 创建测试标签
-        test_label = QLabel()
-        
-        # 从高版本到低版本测试
-        versions = sorted(UNICODE_TEST_CHARS.keys(), key=float, reverse=True)
-        
-        for version in versions:
-            char_info = UNICODE_TEST_CHARS[version]
-            char = char_info["char"]
-            name = char_info["name"]
-            
-            try:
-                # 使用准确的字体名称并增加字号以更好显示彩色Emoji
-                test_font = QFont(font_family, 16)
-                test_label.setFont(test_font)
-                test_label.setText(char)
-                
-                # 获取标签的实际文本内容
-                actual_text = test_label.text()
-
-                # 如果实际文本与预期字符不同，则认为不支持
-                if actual_text != char or len(actual_text) != len(char):
-                    status = "✗ 不支持"
-                    print(f"{version}: 不支持")
-                else:
-                    status = "✓ 支持"                    
-                    if float(version) > float(max_supported):
-                        max_supported = version
-            except Exception as e:
-                status = "✗ 不支持"
-                print(f"{version}: 检测失败: {str(e)}")
-            
-            results.append({
-                "version": version,
-                "char": char,
-                "name": name,
-                "status": status,
-                "release_date": UNICODE_TEST_CHARS[version]["version"]
-            })
-        
+        # 字体未变化时直接使用缓存的解析结果，按版本统计完整emoji目录的覆盖率
+        results, max_supported, _ = test_unicode_support()
         return results, max_supported
 
+    def update_version_filter(self):
+        """用表格中出现的版本更新版本筛选框，尽量保留当前选择"""
+        current = self.version_filter.currentData()
+        self.version_filter.blockSignals(True)
+        self.version_filter.clear()
+        self.version_filter.addItem("全部", None)
+        for version in self.table_model.versions():
+            self.version_filter.addItem(version, version)
+        index = self.version_filter.findData(current)
+        self.version_filter.setCurrentIndex(max(index, 0))
+        self.version_filter.blockSignals(False)
+        self.apply_filter()
+
+    def apply_filter(self):
+        self.table_model.set_filter(self.version_filter.currentData(), self.status_filter.currentData())
+
+    def toggle_watch(self, enabled):
+        if enabled:
+            self.start_watch()
+        else:
+            self.stop_watch()
+
+    def start_watch(self):
+        if self.font_monitor is not None:
+            return
+        self.watch_log.show()
+        self.watch_log.appendPlainText("正在建立监视基准...")
+        self.font_monitor = start_font_monitor(self.watch_signals)
+
+    def stop_watch(self):
+        if self.font_monitor is None:
+            return
+        self.font_monitor.stop()
+        self.font_monitor = None
+        self.watch_log.appendPlainText("已停止监视")
+
+    def on_watch_ready(self, baseline, rows):
+        if self.font_monitor is None:
+            return
+        directories, files, _ = self.font_monitor.monitor.watch_targets()
+        self.watch_log.appendPlainText(f"正在监视 {len(directories) + len(files)} 个位置；"
+                                       f"回退链: {format_chain(baseline['fallback_chain'])}")
+
+    def on_fonts_changed(self, diff, rows):
+        """字体变化：记录差异，并用新的结果整体替换表格内容（不重新检测系统信息）"""
+        from font_watch import format_diff
+
+        if self.font_monitor is None:
+            return
+        self.watch_log.appendPlainText(format_diff(diff))
+        self.table_model.set_results(rows)
+        self.update_version_filter()
+        self.detection_info["fallback_chain"] = diff["fallback_chain"]
+        self.detection_info["actual_version"] = diff["actual_version"]
+        self.chain_result.setText(f"字体回退链: {format_chain(diff['fallback_chain'])}")
+        self.support_result.setText(f"实际支持版本: {diff['actual_version']}")
+        self.status_bar.showMessage(f"字体已变化：新增支持 {len(diff['added'])} 个 emoji，"
+                                    f"失去 {len(diff['removed'])} 个")
+
+    def toggle_tracing(self, enabled):
+        """开启时重新开始记录并重新检测，使跟踪覆盖完整的一次检测"""
+        if enabled:
+            from config import TRACE_MEMORY, TRACE_PROFILE
+
+            instrumentation.enable(profile=TRACE_PROFILE, memory=TRACE_MEMORY)
+            self.export_trace_btn.show()
+            self.refresh()
+        else:
+            instrumentation.disable()
+            self.export_trace_btn.hide()
+
+    def export_trace(self):
+        """把当前记录导出为 Chrome trace-event JSON"""
+        try:
+            file_path, _ = QFileDialog.getSaveFileName(self, "保存性能跟踪", "trace.json",
+                                                       "Chrome 跟踪文件 (*.json);;所有文件 (*)")
+            if file_path:
+                written = instrumentation.write_trace(file_path)
+                self.status_bar.showMessage(f"性能跟踪已导出到: {', '.join(written)}")
+        except Exception as e:
+            self.status_bar.showMessage(f"导出性能跟踪失败: {str(e)}")
+
     def refresh(self):
-        """刷新检测结果"""
-        self.table_model.removeRows(0, self.table_model.rowCount())
+        """刷新检测结果（会中止正在进行的检测）"""
+        self.cancel_detection()
+        self.table_model.clear()
         self.detect_unicode_info()
 
     def export_report(self):
         """导出检测报告"""
         try:
-            file_path, _ = QFileDialog.getSaveFileName(
+            file_path, selected_filter = QFileDialog.getSaveFileName(
                 self,
                 "保存报告",
                 "",
-                "文本文件 (*.txt);;所有文件 (*)"
+                ";;".join(REPORT_FILE_FILTERS) + ";;所有文件 (*)"
             )
             
             if file_path:
-                with open(file_path, "w", encoding="utf-8") as f:
-                    # 系统信息
-                    f.write("="*60 + "\n")
-                    f.write("Unicode 支持检测报告\n".center(60) + "\n")
-                    f.write("="*60 + "\n\n")
-                    
-                    f.write(f"操作系统: {self.os_label.text().split(': ')[1]}\n")
-                    f.write(f"构建版本: {self.build_label.text().split(': ')[1]}\n")
-                    f.write(f"系统架构: {self.arch_label.text().split(': ')[1]}\n")
-                    f.write(f"Python 版本: {self.python_label.text().split(': ')[1]}\n\n")
-                    
-                    # 检测结果
-                    f.write("检测结果:\n")
-                    f.write(f"  系统 API 检测: {self.api_result.text().split(': ')[1]}\n")
-                    f.write(f"  实际支持版本: {self.support_result.text().split(': ')[1]}\n")
-                    f.write(f"  Segoe UI Emoji 版本: {self.font_result.text().split(': ')[1]}\n\n")
-                    
-                    # 测试结果
-                    f.write("字符支持测试:\n")
-                    f.write("版本   字符  状态        名称               发布日期\n")
-                    f.write("-"*60 + "\n")
-                    
-                    for row in range(self.table_model.rowCount()):
-                        version = self.table_model.item(row, 0).text()
-                        char = self.table_model.item(row, 1).text()
-                        status = self.table_model.item(row, 2).text()
-                        name = self.table_model.item(row, 3).text()
-                        release = self.table_model.item(row, 4).text()
-                        
-                        f.write(f"{version.ljust(7)} {char}  {status.ljust(10)} {name.ljust(18)} {release}\n")
-                    
+                # 扩展名优先，无法识别时使用所选的文件类型
+                fmt = format_for_path(file_path, REPORT_FILE_FILTERS.get(selected_filter, "text"))
+                self.write_report(file_path, fmt)
                 self.status_bar.showMessage(f"报告已导出到: {file_path}")
         except Exception as e:
             self.status_bar.showMessage(f"导出失败: {str(e)}")
 
+    def write_report(self, file_path, fmt=None):
+        """按表格当前的排序和筛选导出报告，格式默认根据扩展名推断"""
+        fmt = fmt or format_for_path(file_path)
+        write_report(self.detection_info, self.table_model.iter_results(), file_path, fmt)
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = UnicodeCheckerWindow()
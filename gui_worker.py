@@ -0,0 +1,91 @@
+import math
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from detection import iter_detection
+from instrumentation import span, thread_profile
+
+# iter_detection 在产出表格行之前的检测项数量，用于计算进度
+PROBE_STEPS = 11
+
+
+class DetectionSignals(QObject):
+    """后台检测向界面线程发送的信号（跨线程自动排队）"""
+    probe_finished = Signal(int, str, object)
+    rows_ready = Signal(int, list)
+    progress = Signal(int, int, int)
+    finished = Signal(int)
+    failed = Signal(int, str)
+
+
+class WatchSignals(QObject):
+    """监视线程向界面线程发送的信号：基准检测完成、字体变化后的差异及新的结果行"""
+    ready = Signal(object, list)
+    changed = Signal(object, list)
+
+
+def start_font_monitor(signals, font_path=None, verify_render=None):
+    """启动 font_watch.FontMonitorThread，结果行在监视线程中算好后随信号发出"""
+    from config import RENDER_VERIFICATION
+    from font_watch import ChainMonitor, FontMonitorThread
+
+    verify_render = RENDER_VERIFICATION if verify_render is None else verify_render
+    thread = FontMonitorThread(ChainMonitor(font_path, verify_render=verify_render),
+                               lambda diff, monitor: signals.changed.emit(diff, monitor.rows()),
+                               lambda baseline, monitor: signals.ready.emit(baseline, monitor.rows()))
+    thread.start()
+    return thread
+
+
+class DetectionWorker(QRunnable):
+    """在 QThreadPool 中执行检测，逐项推送结果
+
+    generation 用于区分多次刷新：界面只处理当前一代 worker 的信号，
+    已取消 worker 残留在事件队列里的信号会被直接丢弃。
+    """
+
+    def __init__(self, generation, font_path=None, use_cache=True, row_batch_size=None, verify_render=None):
+        super().__init__()
+        from config import ROW_BATCH_SIZE, RENDER_VERIFICATION
+
+        self.generation = generation
+        self.font_path = font_path
+        self.use_cache = use_cache
+        self.row_batch_size = row_batch_size or ROW_BATCH_SIZE
+        self.verify_render = RENDER_VERIFICATION if verify_render is None else verify_render
+        self.signals = DetectionSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        with thread_profile(), span("detection"):
+            self._run()
+
+    def _run(self):
+        done = 0
+        total = PROBE_STEPS
+        try:
+            for key, value in iter_detection(self.font_path, self.use_cache, self.row_batch_size,
+                                             verify_render=self.verify_render):
+                if self.is_cancelled():
+                    return
+                done += 1
+                if key == "rows":
+                    self.signals.rows_ready.emit(self.generation, value)
+                else:
+                    if key == "row_count":
+                        total = PROBE_STEPS + math.ceil(value / self.row_batch_size)
+                    self.signals.probe_finished.emit(self.generation, key, value)
+                self.signals.progress.emit(self.generation, done, total)
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.failed.emit(self.generation, str(e))
+            return
+        if not self.is_cancelled():
+            self.signals.finished.emit(self.generation)
@@ -0,0 +1,279 @@
+"""检测各阶段的计时与计数
+
+    with span("font_parse", path=font_path):
+        ...
+    count("cache_hit")
+
+未启用时 span() 返回一个共享的空上下文，count() 直接返回，开销只有一次函数调用。
+enable() 之后记录每个阶段的开始和结束时间（按线程区分）以及计数器，可以：
+    write_trace(path)     导出 Chrome trace-event JSON（chrome://tracing 或 Perfetto 打开）
+    format_summary()      一行摘要，用于状态栏和命令行输出
+enable(profile=True) 时同时用 cProfile 分析每个检测线程（结果合并后另存为 .prof，
+可用 pstats 或 snakeviz 查看）；enable(memory=True) 时用 tracemalloc 记录内存峰值和
+分配最多的代码行，写入跟踪文件的 otherData。
+"""
+import json
+import os
+import threading
+import time
+
+_recorder = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "start")
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_span(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class _ThreadProfile:
+    """在当前线程上启用 cProfile，结束时交给记录器合并"""
+
+    __slots__ = ("recorder", "profiler")
+
+    def __init__(self, recorder):
+        import cProfile
+
+        self.recorder = recorder
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # 该线程上已经有其他分析器在运行
+            self.profiler = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.recorder.add_profile(self.profiler)
+        return False
+
+
+def enabled():
+    return _recorder is not None
+
+
+def span(name, **args):
+    """计时区间；未启用时返回空上下文"""
+    recorder = _recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name, args)
+
+
+def count(name, value=1):
+    """累加计数器"""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.add_count(name, value)
+
+
+def thread_profile():
+    """在检测线程的入口使用：启用了 cProfile 时分析该线程，否则为空上下文"""
+    recorder = _recorder
+    if recorder is None or not recorder.profile:
+        return _NULL_SPAN
+    return _ThreadProfile(recorder)
+
+
+class TraceRecorder:
+    def __init__(self, profile=False, memory=False):
+        self.origin = time.perf_counter_ns()
+        self.started_at = time.time()
+        self.profile = profile
+        self.memory = memory
+        self.spans = []
+        self.counters = {}
+        self.counter_events = []
+        self.threads = {}
+        self.memory_stats = None
+        self._profiles = []
+        self._main_profile = None
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, end, args):
+        thread = threading.current_thread()
+        self.threads.setdefault(thread.ident, thread.name)
+        # list.append 在 GIL 下是原子的
+        self.spans.append((name, start, end, thread.ident, args))
+
+    def add_count(self, name, value):
+        with self._lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+            self.counter_events.append((name, time.perf_counter_ns(), total))
+
+    def add_profile(self, profiler):
+        with self._lock:
+            self._profiles.append(profiler)
+
+    def start(self):
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.profile:
+            self._main_profile = _ThreadProfile(self)
+            self._main_profile.__enter__()
+
+    def stop(self):
+        if self._main_profile is not None:
+            self._main_profile.__exit__(None, None, None)
+            self._main_profile = None
+        if self.memory:
+            self.memory_stats = self.capture_memory()
+            import tracemalloc
+            tracemalloc.stop()
+
+    def capture_memory(self, limit=10):
+        """当前和峰值内存，以及分配最多的 limit 个代码行"""
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return self.memory_stats
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+        return {
+            "current_kb": round(current / 1024.0, 1),
+            "peak_kb": round(peak / 1024.0, 1),
+            "top": [{"where": str(stat.traceback), "size_kb": round(stat.size / 1024.0, 1), "count": stat.count}
+                    for stat in top],
+        }
+
+    def summary(self):
+        """按阶段汇总：[(名称, 次数, 总耗时毫秒, 最长毫秒)]，按总耗时从高到低"""
+        totals = {}
+        for name, start, end, _, _ in list(self.spans):
+            entry = totals.setdefault(name, [0, 0, 0])
+            duration = end - start
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        rows = [(name, calls, total / 1e6, longest / 1e6) for name, (calls, total, longest) in totals.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def format_summary(self, limit=6):
+        parts = [f"{name} {total:.1f} ms" + (f"×{calls}" if calls > 1 else "")
+                 for name, calls, total, _ in self.summary()[:limit]]
+        counters = [f"{name}={value}" for name, value in sorted(self.counters.items())]
+        text = "耗时: " + ("，".join(parts) or "无记录")
+        if counters:
+            text += "；计数: " + "，".join(counters)
+        return text
+
+    def chrome_trace(self):
+        """Chrome trace-event 格式的字典"""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in self.threads.items()]
+        for name, start, end, tid, args in list(self.spans):
+            events.append({"name": name, "cat": "detection", "ph": "X", "pid": pid, "tid": tid,
+                           "ts": (start - self.origin) / 1000.0, "dur": (end - start) / 1000.0,
+                           "args": {key: str(value) for key, value in args.items()}})
+        for name, at, total in list(self.counter_events):
+            events.append({"name": name, "ph": "C", "pid": pid, "tid": 0,
+                           "ts": (at - self.origin) / 1000.0, "args": {name: total}})
+        other = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                 "counters": dict(self.counters)}
+        memory = self.capture_memory() if self.memory else None
+        if memory:
+            other["memory"] = memory
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": other}
+
+    def profile_stats(self, stream=None):
+        """合并各线程的 cProfile 结果，返回 pstats.Stats；没有分析数据时返回 None"""
+        import pstats
+
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        return stats
+
+    def write_profile(self, path):
+        """把合并后的 cProfile 结果写入 path，没有分析数据时返回 False"""
+        stats = self.profile_stats()
+        if stats is None:
+            return False
+        stats.dump_stats(path)
+        return True
+
+    def print_profile(self, out, limit=None):
+        """按累计耗时输出最耗时的 limit 个函数"""
+        if limit is None:
+            from config import TRACE_PROFILE_LIMIT
+            limit = TRACE_PROFILE_LIMIT
+        stats = self.profile_stats(out)
+        if stats is not None:
+            stats.sort_stats("cumulative").print_stats(limit)
+
+
+def enable(profile=False, memory=False):
+    """开始记录，返回新的 TraceRecorder（之前的记录被丢弃）"""
+    global _recorder
+    disable()
+    recorder = TraceRecorder(profile, memory)
+    recorder.start()
+    _recorder = recorder
+    return recorder
+
+
+def disable():
+    """停止记录，返回停止前的 TraceRecorder（未启用时返回 None）"""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.stop()
+    return recorder
+
+
+def current():
+    return _recorder
+
+
+def format_summary(recorder=None):
+    recorder = recorder or _recorder
+    return recorder.format_summary() if recorder is not None else ""
+
+
+def write_trace(path, recorder=None):
+    """把记录写成 Chrome trace-event JSON；启用了 cProfile 时另存同名的 .prof 文件，返回写出的文件列表"""
+    recorder = recorder or _recorder
+    if recorder is None:
+        raise ValueError("未启用性能跟踪")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recorder.chrome_trace(), f, ensure_ascii=False)
+    written = [path]
+    if recorder.profile:
+        profile_path = os.path.splitext(path)[0] + ".prof"
+        if recorder.write_profile(profile_path):
+            written.append(profile_path)
+    return written
@@ -1,10 +1,16 @@
 # 修改QApplication.exec_()为exec()以消除弃用警告
-from PySide6.QtWidgets import QApplication
-from gui import UnicodeCheckerWindow
 import sys
 
 if __name__ == "__main__":
+    # 带命令行参数时进入无界面模式，不加载Qt
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+
+    from PySide6.QtWidgets import QApplication
+    from gui import UnicodeCheckerWindow
+
     app = QApplication(sys.argv)
     window = UnicodeCheckerWindow()
     window.show()
-    sys.exit(app.exec())  # 从exec_()改为exec()
\ No newline at end of file
+    sys.exit(app.exec())  # 从exec_()改为exec()
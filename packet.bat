@@ -2,10 +2,27 @@ pyinstaller --onefile --windowed ^
     --name UnicodeChecker ^
     --add-data "C:\Windows\Fonts\seguiemj.ttf;." ^
     --add-data "C:\Windows\Fonts\seguisym.ttf;." ^
+    --add-data "emoji_index.json;." ^
+    --add-data "version_index.json;." ^
     --runtime-tmpdir=. ^
     --hidden-import=winreg ^
     --hidden-import=config ^
     --hidden-import=utils ^
     --hidden-import=gui ^
+    --hidden-import=font_coverage ^
+    --hidden-import=font_registry ^
+    --hidden-import=emoji_catalog ^
+    --hidden-import=coverage_cache ^
+    --hidden-import=detection ^
+    --hidden-import=cli ^
+    --hidden-import=gui_worker ^
+    --hidden-import=result_model ^
+    --hidden-import=report_export ^
+    --hidden-import=glyph_raster ^
+    --hidden-import=unicode_age ^
+    --hidden-import=font_chain ^
+    --hidden-import=font_watch ^
+    --hidden-import=probe_scheduler ^
+    --hidden-import=instrumentation ^
     --version-file=version_info.txt ^
     main.py
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""检测项调度
+
+每个检测项（Probe）声明它依赖的其他检测项、超时时间和默认结果。ProbeScheduler
+在依赖都完成后立即在独立的守护线程中启动检测项，互不依赖的检测项并发执行，
+总耗时由依赖链中最长的一条决定，而不是所有检测项耗时之和。
+
+检测项超时或抛出异常时使用其默认结果，依赖它的检测项照常继续。超时的线程无法被
+强行终止，但它是守护线程，之后返回的结果会被丢弃，也不会阻止程序退出
+（例如网络重定向目录上卡住的 GetFileVersionInfo）。
+"""
+import queue
+import threading
+import time
+
+from instrumentation import count, span, thread_profile
+
+
+class Probe:
+    """一个检测项：func 以依赖项的结果（按 deps 的顺序）为参数
+
+    fallback 为默认结果；可以是可调用对象，以异常（超时为 TimeoutError）为参数返回默认结果。
+    timeout 为 None 时不限时。
+    """
+
+    __slots__ = ("name", "func", "deps", "timeout", "fallback")
+
+    def __init__(self, name, func, deps=(), timeout=None, fallback=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def fallback_value(self, error):
+        return self.fallback(error) if callable(self.fallback) else self.fallback
+
+
+class ProbeScheduler:
+    def __init__(self, probes):
+        self.probes = {}
+        for probe in probes:
+            if probe.name in self.probes:
+                raise ValueError(f"检测项重名: {probe.name}")
+            self.probes[probe.name] = probe
+        for probe in self.probes.values():
+            missing = [dep for dep in probe.deps if dep not in self.probes]
+            if missing:
+                raise ValueError(f"检测项 {probe.name} 依赖不存在的检测项: {', '.join(missing)}")
+        self._check_cycles()
+
+    def _check_cycles(self):
+        resolved = set()
+        remaining = dict(self.probes)
+        while remaining:
+            ready = [name for name, probe in remaining.items() if all(dep in resolved for dep in probe.deps)]
+            if not ready:
+                raise ValueError(f"检测项存在循环依赖: {', '.join(sorted(remaining))}")
+            for name in ready:
+                resolved.add(name)
+                del remaining[name]
+
+    def run(self):
+        """按完成顺序产出 (名称, 结果)；调用方停止迭代后，仍在运行的检测项结果被丢弃"""
+        results = {}
+        pending = dict(self.probes)
+        running = {}
+        done = queue.Queue()
+
+        def work(probe, args):
+            try:
+                with thread_profile(), span(f"probe:{probe.name}"):
+                    value = probe.func(*args)
+                done.put((probe.name, True, value))
+            except Exception as e:
+                done.put((probe.name, False, e))
+
+        def start_ready():
+            for name, probe in list(pending.items()):
+                if all(dep in results for dep in probe.deps):
+                    del pending[name]
+                    running[name] = time.monotonic() + probe.timeout if probe.timeout else None
+                    threading.Thread(target=work, args=(probe, [results[dep] for dep in probe.deps]),
+                                     name=f"probe-{name}", daemon=True).start()
+
+        start_ready()
+        while running:
+            deadlines = [deadline for deadline in running.values() if deadline is not None]
+            wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            try:
+                name, ok, value = done.get(timeout=wait)
+            except queue.Empty:
+                now = time.monotonic()
+                expired = [name for name, deadline in running.items() if deadline is not None and deadline <= now]
+                for name in expired:
+                    del running[name]
+                    probe = self.probes[name]
+                    print(f"检测项 {name} 超过 {probe.timeout} 秒未完成，使用默认结果")
+                    count("probe_timeout")
+                    results[name] = probe.fallback_value(TimeoutError(name))
+                # 先启动依赖它们的检测项再产出，调用方处理结果时不会推迟这些检测项
+                start_ready()
+                for name in expired:
+                    yield name, results[name]
+                continue
+
+            if name not in running:
+                # 已经按超时处理过
+                continue
+            del running[name]
+            if not ok:
+                print(f"检测项 {name} 失败: {str(value)}")
+                count("probe_error")
+                value = self.probes[name].fallback_value(value)
+            results[name] = value
+            start_ready()
+            yield name, value
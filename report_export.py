@@ -0,0 +1,239 @@
+"""检测报告导出
+
+    python -m report_export <输入.ndjson> -o <输出> [--format text|json|csv|ndjson]
+
+导出器直接处理检测结果（detect_unicode_info 的字典和结果行），不依赖界面控件和 Qt，
+GUI 的“导出报告”按钮、命令行模式和批量扫描结果的转换共用同一套代码。
+结果行逐行写入带缓冲的文件，行数再多内存占用也不变。
+
+支持的格式：
+    text    与原先 GUI 导出的文本报告相同的布局
+    json    {检测信息..., "results": [行, ...]}，与 `python -m cli --format json` 的结构一致
+    csv     每行一个结果，不含检测信息
+    ndjson  {"type": "info", ...} 之后每行一个 {"type": "result", ...}
+
+命令行入口可以把 ndjson 报告或 fleet_scan 的输出转换成其他格式；fleet_scan 的
+每条 font 记录按版本展开为多行。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from instrumentation import span
+
+FORMATS = ("text", "json", "csv", "ndjson")
+
+# 写文件时的缓冲区大小
+BUFFER_SIZE = 1 << 20
+
+RESULT_FIELDS = ("version", "char", "glyph_type", "status", "coverage", "supported", "color", "total",
+                 "name", "font", "release_date", "glyph", "tofu", "blank")
+
+# 文本报告中字形类型的显示名称
+GLYPH_TYPE_LABELS = {"color": "彩色", "mono": "单色", "missing": "缺失"}
+
+_EXTENSIONS = {".txt": "text", ".json": "json", ".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def format_for_path(path, default="text"):
+    """根据扩展名推断导出格式"""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def format_chain(chain):
+    """回退链摘要，例如 "Segoe UI Emoji (3650) → Segoe UI Symbol (12)，合计 3662/3773" """
+    if not chain or not chain.get("fonts"):
+        return "未知"
+    fonts = " → ".join(f"{font['family']} ({font['served']})" for font in chain["fonts"])
+    return f"{fonts}，合计 {chain['supported']}/{chain['total']}"
+
+
+class TextReportWriter:
+    """原 GUI 导出的文本布局"""
+
+    def __init__(self, out):
+        self.out = out
+
+    def begin(self, info):
+        sys_info = info.get("system") or {}
+
+        def field(value):
+            return value if value not in (None, "") else "未知"
+
+        write = self.out.write
+        write("=" * 60 + "\n")
+        write("Unicode 支持检测报告\n".center(60) + "\n")
+        write("=" * 60 + "\n\n")
+
+        write(f"操作系统: {field(sys_info.get('os_name'))} {field(sys_info.get('os_version'))}\n")
+        write(f"构建版本: {field(sys_info.get('build'))}\n")
+        write(f"系统架构: {field(sys_info.get('arch'))}\n")
+        write(f"Python 版本: {field(sys_info.get('python_version'))}\n\n")
+
+        write("检测结果:\n")
+        write(f"  系统 API 检测: {field(info.get('api_version'))}\n")
+        write(f"  实际支持版本: {field(info.get('actual_version'))}\n")
+        write(f"  Segoe UI Emoji 版本: {field(info.get('font_version'))}\n")
+        write(f"  字体回退链: {format_chain(info.get('fallback_chain'))}\n\n")
+
+        write("字符支持测试:\n")
+        write("版本   字符  字形  状态        名称               字体                 发布日期\n")
+        write("-" * 81 + "\n")
+
+    def write_row(self, row):
+        glyph_type = GLYPH_TYPE_LABELS.get(row.get("glyph_type"), "")
+        status = row.get("status") or ("✓" if row.get("supported") else "✗")
+        self.out.write(f"{str(row.get('version', '')).ljust(7)} {row.get('char', '')}  {glyph_type.ljust(4)}"
+                       f"{str(status).ljust(10)} {str(row.get('name', '')).ljust(18)} "
+                       f"{str(row.get('font', '')).ljust(20)} {row.get('release_date', '')}\n")
+
+    def end(self):
+        pass
+
+
+class JsonReportWriter:
+    """流式写出 {检测信息..., "results": [...]}，不在内存中拼出完整文档"""
+
+    def __init__(self, out):
+        self.out = out
+        self._first = True
+
+    def begin(self, info):
+        head = json.dumps(info, ensure_ascii=False)
+        self.out.write(head[:-1] + (', "results": [' if info else '"results": ['))
+
+    def write_row(self, row):
+        self.out.write("\n  " if self._first else ",\n  ")
+        self._first = False
+        self.out.write(json.dumps(row, ensure_ascii=False))
+
+    def end(self):
+        self.out.write("]}\n" if self._first else "\n]}\n")
+
+
+class CsvReportWriter:
+    """每个结果一行，列为 fields（默认 RESULT_FIELDS）"""
+
+    def __init__(self, out, fields=RESULT_FIELDS):
+        self.fields = fields
+        self._writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+
+    def begin(self, info):
+        self._writer.writeheader()
+
+    def write_row(self, row):
+        self._writer.writerow(row)
+
+    def end(self):
+        pass
+
+
+class NdjsonReportWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def begin(self, info):
+        self.out.write(json.dumps(dict(info, type="info"), ensure_ascii=False))
+        self.out.write("\n")
+
+    def write_row(self, row):
+        self.out.write(json.dumps(dict(row, type="result"), ensure_ascii=False))
+        self.out.write("\n")
+
+    def end(self):
+        pass
+
+
+WRITERS = {
+    "text": TextReportWriter,
+    "json": JsonReportWriter,
+    "csv": CsvReportWriter,
+    "ndjson": NdjsonReportWriter,
+}
+
+
+def write_report(info, rows, out, fmt="text", **kwargs):
+    """将检测信息和结果行写入 out（文件路径或可写的文本流），返回写入的行数
+
+    info 为 detect_unicode_info 的结果（其中的 results 字段会被忽略），
+    rows 为可迭代的结果行，按顺序逐行写出。
+    """
+    try:
+        writer_class = WRITERS[fmt]
+    except KeyError:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    info = {key: value for key, value in info.items() if key != "results"}
+
+    if isinstance(out, (str, os.PathLike)):
+        # csv 模块自行处理换行符
+        with open(out, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE) as f:
+            return _write(writer_class(f, **kwargs), info, rows)
+    return _write(writer_class(out, **kwargs), info, rows)
+
+
+def _write(writer, info, rows):
+    count = 0
+    with span("export", writer=type(writer).__name__):
+        writer.begin(info)
+        for row in rows:
+            writer.write_row(row)
+            count += 1
+        writer.end()
+    return count
+
+
+def iter_ndjson_report(path):
+    """读取 ndjson 报告或 fleet_scan 输出，返回 (检测信息, 结果行迭代器, 列名)
+
+    fleet_scan 的 font 记录按版本展开为 {hash, font_version, files, version, coverage} 行，
+    file 和 summary 记录不参与导出。
+    """
+    with open(path, encoding="utf-8") as f:
+        first = f.readline()
+    record = json.loads(first) if first.strip() else {}
+    if record.get("type") == "info":
+        info = {key: value for key, value in record.items() if key != "type"}
+        return info, _iter_records(path, "result"), RESULT_FIELDS
+    return {"source": os.path.abspath(path)}, _iter_fleet_rows(path), \
+        ("hash", "font_version", "files", "version", "coverage")
+
+
+def _iter_records(path, record_type):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("type") == record_type:
+                del record["type"]
+                yield record
+
+
+def _iter_fleet_rows(path):
+    for record in _iter_records(path, "font"):
+        for version, percent in record.get("coverage", {}).items():
+            yield {"hash": record["hash"], "font_version": record.get("font_version"),
+                   "files": record.get("files"), "version": version, "coverage": percent}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m report_export", description="转换 ndjson 检测报告或批量扫描结果")
+    parser.add_argument("source", help="ndjson 报告或 fleet_scan 输出")
+    parser.add_argument("-o", "--output", help="输出文件，默认输出到 stdout")
+    parser.add_argument("--format", choices=FORMATS, help="导出格式，默认根据输出文件扩展名推断")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or (format_for_path(args.output) if args.output else "ndjson")
+    info, rows, fields = iter_ndjson_report(args.source)
+    kwargs = {"fields": fields} if fmt == "csv" else {}
+    if fmt == "text" and fields != RESULT_FIELDS:
+        parser.error("批量扫描结果不支持 text 格式")
+    count = write_report(info, rows, args.output or sys.stdout, fmt, **kwargs)
+    print(f"已导出 {count} 行", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
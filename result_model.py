@@ -0,0 +1,294 @@
+"""检测结果表格的数据模型
+
+数据按列存放（版本、字符序列、字形类型、状态、覆盖率、名称、字体、发布日期，以及导出报告用的
+支持数、总数和渲染校验计数），data() 按需生成显示文本，不为每个单元格创建 QStandardItem。排序和筛选只重排行号：每列的排序结果算一次后缓存，
+筛选在当前顺序上按掩码取行号，数千行的刷新、排序和筛选都不会重新创建对象。
+"""
+from array import array
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from emoji_catalog import GLYPH_TYPES
+from report_export import GLYPH_TYPE_LABELS
+
+STATUS_SUPPORTED = 0
+STATUS_PARTIAL = 1
+STATUS_MISSING = 2
+STATUS_LABELS = ("✓ 支持", "◐ 部分支持", "✗ 不支持")
+
+COLUMNS = ("version", "sequence", "glyph", "status", "coverage", "name", "font", "date")
+HEADERS = ("Unicode 版本", "字符", "字形", "状态", "覆盖率", "名称", "字体", "发布日期")
+
+# 渲染校验计数（正常字形、豆腐块、空白），未做渲染校验的行存为 -1
+RENDER_FIELDS = ("glyph", "tofu", "blank")
+
+# 字形类型（彩色 / 单色 / 缺失）及其显示名称，与导出报告共用同一份定义
+GLYPH_LABELS = tuple(GLYPH_TYPE_LABELS[glyph_type] for glyph_type in GLYPH_TYPES)
+
+
+def classify_coverage(percent, threshold):
+    """按覆盖率百分比划分状态"""
+    if percent >= threshold:
+        return STATUS_SUPPORTED
+    return STATUS_PARTIAL if percent > 0 else STATUS_MISSING
+
+
+class ResultTableModel(QAbstractTableModel):
+    """列式存储的结果表格，行为 emoji_catalog.test_catalog_support 产出的结果字典"""
+
+    def __init__(self, parent=None, threshold=None):
+        super().__init__(parent)
+        if threshold is None:
+            from config import COVERAGE_SUPPORT_THRESHOLD
+            threshold = COVERAGE_SUPPORT_THRESHOLD
+        self.threshold = threshold
+        self._reset_columns()
+        self._sort_cache = {}
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._version_filter = None
+        self._status_filter = None
+        # 当前显示的行号（None 表示按插入顺序显示全部行）
+        self._rows = None
+
+    def _reset_columns(self):
+        # 版本、字体和发布日期的取值很少，存为去重表的下标
+        self._version_values = []
+        self._version_ids = {}
+        self._date_values = []
+        self._date_ids = {}
+        self._font_values = []
+        self._font_ids = {}
+        self._version = array("H")
+        self._date = array("H")
+        self._font = array("H")
+        self._status = array("B")
+        self._glyph = array("B")
+        self._color = array("I")
+        self._supported = array("I")
+        self._total = array("I")
+        self._render = {field: array("i") for field in RENDER_FIELDS}
+        self._coverage = array("d")
+        self._sequence = []
+        self._coverage_text = []
+        self._name = []
+
+    @staticmethod
+    def _intern(values, ids, value):
+        key = ids.get(value)
+        if key is None:
+            key = ids[value] = len(values)
+            values.append(value)
+        return key
+
+    def _append_columns(self, results):
+        for result in results:
+            coverage = float(result.get("coverage", 0.0))
+            self._version.append(self._intern(self._version_values, self._version_ids, result["version"]))
+            self._date.append(self._intern(self._date_values, self._date_ids, result.get("release_date", "")))
+            self._font.append(self._intern(self._font_values, self._font_ids, result.get("font", "")))
+            self._status.append(classify_coverage(coverage, self.threshold))
+            glyph_type = result.get("glyph_type")
+            self._glyph.append(GLYPH_TYPES.index(glyph_type) if glyph_type in GLYPH_TYPES else len(GLYPH_TYPES) - 1)
+            self._color.append(int(result.get("color", 0)))
+            self._supported.append(int(result.get("supported", 0)))
+            self._total.append(int(result.get("total", 0)))
+            for field in RENDER_FIELDS:
+                self._render[field].append(int(result[field]) if field in result else -1)
+            self._coverage.append(coverage)
+            self._sequence.append(result["char"])
+            self._coverage_text.append(result.get("status", ""))
+            self._name.append(result.get("name", ""))
+
+    # ---- 批量更新 ----
+
+    def set_results(self, results):
+        """整体替换表格内容"""
+        self.beginResetModel()
+        self._reset_columns()
+        self._append_columns(results)
+        self._sort_cache.clear()
+        self._rows = self._visible_rows()
+        self.endResetModel()
+
+    def append_results(self, results):
+        """追加一批结果；未排序且未筛选时按插入行更新，否则整体重置"""
+        if not results:
+            return
+        if self._rows is None:
+            first = len(self._sequence)
+            self.beginInsertRows(QModelIndex(), first, first + len(results) - 1)
+            self._append_columns(results)
+            self._sort_cache.clear()
+            self.endInsertRows()
+            return
+        self.beginResetModel()
+        self._append_columns(results)
+        self._sort_cache.clear()
+        self._rows = self._visible_rows()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_results([])
+
+    # ---- 排序和筛选 ----
+
+    def _sort_key(self, column):
+        name = COLUMNS[column]
+        if name == "version":
+            keys = [float(v) if _is_number(v) else -1.0 for v in self._version_values]
+            return lambda i: keys[self._version[i]]
+        if name == "date":
+            return lambda i: self._date_values[self._date[i]]
+        if name == "font":
+            return lambda i: self._font_values[self._font[i]]
+        if name == "status":
+            return lambda i: (self._status[i], -self._coverage[i])
+        if name == "glyph":
+            return lambda i: (self._glyph[i], -self._color[i])
+        if name == "coverage":
+            return self._coverage.__getitem__
+        if name == "sequence":
+            return self._sequence.__getitem__
+        return self._name.__getitem__
+
+    def _permutation(self, column):
+        """某列升序排列的行号，算一次后缓存到数据变化为止"""
+        order = self._sort_cache.get(column)
+        if order is None:
+            order = array("I", sorted(range(len(self._sequence)), key=self._sort_key(column)))
+            self._sort_cache[column] = order
+        return order
+
+    def _visible_rows(self):
+        if self._sort_column < 0 and self._version_filter is None and self._status_filter is None:
+            return None
+        if self._sort_column >= 0:
+            order = self._permutation(self._sort_column)
+            if self._sort_order == Qt.DescendingOrder:
+                order = order[::-1]
+        else:
+            order = range(len(self._sequence))
+
+        version_id = None
+        if self._version_filter is not None:
+            version_id = self._version_ids.get(self._version_filter)
+            if version_id is None:
+                return array("I")
+        status = self._status_filter
+        if version_id is None and status is None:
+            return order if isinstance(order, array) else array("I", order)
+        return array("I", (i for i in order
+                           if (version_id is None or self._version[i] == version_id)
+                           and (status is None or self._status[i] == status)))
+
+    def _refresh_view(self):
+        self.layoutAboutToBeChanged.emit()
+        self._rows = self._visible_rows()
+        self.layoutChanged.emit()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column == self._sort_column and order == self._sort_order:
+            return
+        self._sort_column = column
+        self._sort_order = order
+        # 行数不变，只需通知视图重新布局
+        if self._version_filter is None and self._status_filter is None:
+            self._refresh_view()
+        else:
+            self.beginResetModel()
+            self._rows = self._visible_rows()
+            self.endResetModel()
+
+    def set_filter(self, version=None, status=None):
+        """按版本（字符串）和/或状态（STATUS_*）筛选，None 表示不限"""
+        if version == self._version_filter and status == self._status_filter:
+            return
+        self.beginResetModel()
+        self._version_filter = version
+        self._status_filter = status
+        self._rows = self._visible_rows()
+        self.endResetModel()
+
+    def versions(self):
+        """表格中出现过的版本，按版本号从高到低"""
+        return sorted(self._version_values, key=lambda v: float(v) if _is_number(v) else -1.0, reverse=True)
+
+    # ---- 读取 ----
+
+    def source_row(self, row):
+        return row if self._rows is None else self._rows[row]
+
+    def row_result(self, row):
+        """以结果字典的形式返回当前显示的第 row 行，字段与 test_catalog_support 的结果一致"""
+        i = self.source_row(row)
+        result = {
+            "version": self._version_values[self._version[i]],
+            "char": self._sequence[i],
+            "glyph_type": GLYPH_TYPES[self._glyph[i]],
+            "color": self._color[i],
+            "name": self._name[i],
+            "font": self._font_values[self._font[i]],
+            "status": self._coverage_text[i],
+            "coverage": self._coverage[i],
+            "supported": self._supported[i],
+            "total": self._total[i],
+            "release_date": self._date_values[self._date[i]],
+        }
+        for field in RENDER_FIELDS:
+            if self._render[field][i] >= 0:
+                result[field] = self._render[field][i]
+        return result
+
+    def iter_results(self):
+        """按当前排序和筛选依次产出结果字典"""
+        for row in range(self.rowCount()):
+            yield self.row_result(row)
+
+    # ---- QAbstractTableModel 接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._sequence) if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self.source_row(index.row())
+        name = COLUMNS[index.column()]
+        if role == Qt.DisplayRole:
+            if name == "version":
+                return self._version_values[self._version[i]]
+            if name == "sequence":
+                return self._sequence[i]
+            if name == "glyph":
+                return GLYPH_LABELS[self._glyph[i]]
+            if name == "status":
+                return STATUS_LABELS[self._status[i]]
+            if name == "coverage":
+                return self._coverage_text[i] or f"{self._coverage[i]:.1f}%"
+            if name == "name":
+                return self._name[i]
+            if name == "font":
+                return self._font_values[self._font[i]]
+            return self._date_values[self._date[i]]
+        if role == Qt.UserRole:
+            return self._sort_key(index.column())(i)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
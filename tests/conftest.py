@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """每个测试使用独立的缓存目录，不读写用户的缓存"""
+    import coverage_cache
+
+    monkeypatch.setenv("UNICODE_CHECKER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(coverage_cache, "_cache", None)
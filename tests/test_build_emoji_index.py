@@ -0,0 +1,43 @@
+from build_emoji_index import build_index, parse_derived_age, parse_emoji_test
+
+EMOJI_TEST = """\
+# Version: 15.1
+1F600                                                  ; fully-qualified     # \U0001F600 E1.0 grinning face
+2618 FE0F                                              ; fully-qualified     # \u2618\uFE0F E1.0 shamrock
+2618                                                   ; unqualified         # \u2618 E1.0 shamrock
+1F923                                                  ; fully-qualified     # \U0001F923 E3.0 rolling on the floor laughing
+1F441 FE0F 200D 1F5E8 FE0F                             ; fully-qualified     # \U0001F441\uFE0F\u200D\U0001F5E8\uFE0F E2.0 eye in speech bubble
+1FAE8                                                  ; fully-qualified     # \U0001FAE8 E15.0 shaking face
+"""
+
+DERIVED_AGE = """\
+# DerivedAge-14.0.0.txt
+2618          ; 4.1
+1F441         ; 7.0
+1F5E8         ; 7.0
+1F600         ; 6.1
+1F90C..1F93A  ; 9.0
+"""
+
+
+def test_single_codepoints_use_derived_age(tmp_path):
+    (tmp_path / "emoji-test.txt").write_text(EMOJI_TEST, encoding="utf-8")
+    (tmp_path / "DerivedAge.txt").write_text(DERIVED_AGE, encoding="utf-8")
+
+    unicode_version, ages = parse_derived_age(str(tmp_path / "DerivedAge.txt"))
+    source_version, entries = parse_emoji_test(str(tmp_path / "emoji-test.txt"), ages)
+    versions = {" ".join(f"{cp:04X}" for cp in codepoints): version for codepoints, version, _ in entries}
+
+    assert unicode_version == "14.0.0"
+    assert source_version == "15.1"
+    assert versions == {
+        "1F600": "6.1",
+        "2618 FE0F": "4.1",
+        "1F923": "9.0",
+        # 序列保留 emoji 版本（换算为同时发布的 Unicode 版本）
+        "1F441 FE0F 200D 1F5E8 FE0F": "8.0",
+        # DerivedAge 中没有的码位使用 emoji 版本
+        "1FAE8": "15.0",
+    }
+    index = build_index(source_version, entries)
+    assert list(index["versions"]) == ["15.0", "9.0", "8.0", "6.1", "4.1"]
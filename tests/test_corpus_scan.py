@@ -0,0 +1,57 @@
+import pytest
+
+import corpus_scan
+from corpus_scan import iter_chunks, scan_corpus
+from synthetic_font import write_font
+
+# 不含 ASCII 字节，迫使切分退回到按字符边界查找
+SEQUENCES = [
+    "\U0001F469\u200D\U0001F4BB",                 # 女技术员（ZWJ）
+    "\U0001F468\U0001F3FD\u200D\U0001F692",       # 带肤色的男消防员（修饰符 + ZWJ）
+    "\u2764\uFE0F",                               # 红心（VS16）
+    "\u2764\uFE0F\u200D\U0001F525",               # 燃烧的心（VS16 + ZWJ）
+    "\U0001F1FA\U0001F1F8",                       # 国旗（区域指示符对）
+    "\U0001F3F4\U000E0067\U000E0062\U000E0065\U000E006E\U000E0067\U000E007F",  # 英格兰旗（标签序列）
+    "\U0001F600",
+    "\u3002",
+]
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_scan, "MAX_BOUNDARY_SEARCH", 1)
+    path = tmp_path / "corpus.txt"
+    path.write_text("".join(SEQUENCES * 40), encoding="utf-8")
+    font = tmp_path / "font.ttf"
+    write_font(font, [0x200D, 0x2764, 0x1F469, 0x1F4BB, 0x1F600, 0x1F1FA, 0x1F1F8],
+               ligatures=["\U0001F469\u200D\U0001F4BB", "\U0001F1FA\U0001F1F8"])
+    return str(path), str(font)
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 12))
+def test_chunks_never_split_a_sequence(corpus, chunk_size):
+    path, _ = corpus
+    with open(path, "rb") as f:
+        data = f.read()
+    pieces = [data[start:end].decode("utf-8") for _, start, end in iter_chunks(path, chunk_size)]
+    assert "".join(pieces) == data.decode("utf-8")
+    for piece in pieces:
+        # 每块都由完整的序列拼接而成
+        rest = piece
+        while rest:
+            match = next(sequence for sequence in sorted(SEQUENCES, key=len, reverse=True)
+                         if rest.startswith(sequence))
+            rest = rest[len(match):]
+
+
+@pytest.mark.parametrize("chunk_size", [2, 7])
+def test_chunked_scan_matches_single_chunk(corpus, chunk_size):
+    path, font = corpus
+    whole = scan_corpus([path], font, workers=1, chunk_size=1 << 20, use_cache=False)
+    chunked = scan_corpus([path], font, workers=3, chunk_size=chunk_size, use_cache=False)
+
+    assert whole["emoji"] == 7 * 40
+    assert chunked["bytes"] == whole["bytes"]
+    assert chunked["emoji"] == whole["emoji"]
+    assert chunked["unrenderable"] == whole["unrenderable"]
+    assert chunked["versions"] == whole["versions"]
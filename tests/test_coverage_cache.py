@@ -0,0 +1,80 @@
+import os
+
+from coverage_cache import CoverageCache, decode_payload, encode_payload, load_font_result
+from emoji_catalog import has_codepoint
+from synthetic_font import write_font
+
+CODEPOINTS = [0x2600, 0x2665, 0x1F600, 0x1F680]
+
+
+def test_payload_round_trip():
+    payload = {"font_version": "1.0", "scores": {"6.0": [1, 2]}, "coverage": b"\x00\x01", "color": b""}
+    assert decode_payload(encode_payload(payload)) == payload
+
+
+def test_second_load_hits_cache(tmp_path):
+    path = str(tmp_path / "font.ttf")
+    write_font(path, CODEPOINTS)
+    cache = CoverageCache(str(tmp_path / "cache"))
+
+    first = load_font_result(path, cache)
+    second = load_font_result(path, cache)
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["stores"] == 1
+    assert second["coverage"] == first["coverage"]
+    # JSON 编码后计数变为列表
+    assert {version: tuple(counts) for version, counts in second["scores"].items()} == first["scores"]
+
+    # 另一个进程打开同一个缓存文件同样命中
+    other = CoverageCache(str(tmp_path / "cache"))
+    assert load_font_result(path, other)["coverage"] == first["coverage"]
+    assert other.stats()["hits"] == 1
+
+
+def test_changed_font_is_reparsed(tmp_path):
+    path = str(tmp_path / "font.ttf")
+    write_font(path, CODEPOINTS)
+    cache = CoverageCache(str(tmp_path / "cache"))
+    assert not has_codepoint(load_font_result(path, cache)["coverage"], 0x1FAE8)
+
+    write_font(path, CODEPOINTS + [0x1FAE8])
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    result = load_font_result(path, cache)
+    assert cache.stats()["misses"] == 2
+    assert has_codepoint(result["coverage"], 0x1FAE8)
+
+
+def test_catalog_change_is_a_miss(tmp_path):
+    path = str(tmp_path / "font.ttf")
+    write_font(path, CODEPOINTS)
+    cache = CoverageCache(str(tmp_path / "cache"))
+    cache.put(path, {"catalog": "old", "coverage": b"\x00"})
+    assert cache.get(path, catalog="old") is not None
+    assert cache.get(path, catalog="new") is None
+
+
+def test_derived_results_are_keyed_by_kind(tmp_path):
+    path = str(tmp_path / "font.ttf")
+    write_font(path, CODEPOINTS)
+    cache = CoverageCache(str(tmp_path / "cache"))
+    cache.put(path, {"catalog": "c", "coverage": b"\x01"})
+    cache.put(path, {"catalog": "c", "render_scores": {"6.0": [1, 0, 0]}}, kind="render")
+    assert cache.get(path, catalog="c")["coverage"] == b"\x01"
+    assert cache.get(path, catalog="c", kind="render")["render_scores"] == {"6.0": [1, 0, 0]}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = CoverageCache(str(tmp_path / "cache"), max_bytes=6000)
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"font{i}.ttf")
+        write_font(path, CODEPOINTS, family=f"Font {i}")
+        paths.append(path)
+        # 不可压缩的数据，每条约 4 KB
+        cache.put(path, {"catalog": "c", "blob": os.urandom(4096)})
+
+    assert cache.evictions == 2
+    assert cache.get(paths[0], catalog="c") is None
+    assert cache.get(paths[2], catalog="c") is not None
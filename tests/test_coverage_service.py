@@ -0,0 +1,69 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from coverage_service import CoverageIndex, CoverageServer, build_coverage_index, create_listener, \
+    load_snapshot_manifest
+from synthetic_font import write_font
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    """两个快照：旧构建缺少 U+1FAE8，构建号在清单中分别是字符串和整数"""
+    write_font(tmp_path / "old.ttf", [0x2600, 0x1F600], family="Emoji Old")
+    write_font(tmp_path / "new.ttf", [0x2600, 0x1F600, 0x1FAE8], family="Emoji New",
+               color_glyphs={"COLR": ["\U0001F600"]})
+    manifest = tmp_path / "snapshots.json"
+    manifest.write_text(json.dumps({"snapshots": [
+        {"name": "win10", "build": "19045", "fonts": ["old.ttf"]},
+        {"name": "win11", "build": 22631, "fonts": ["new.ttf"]},
+        {"name": "custom", "build": "insider", "fonts": ["new.ttf"]},
+    ]}), encoding="utf-8")
+    snapshots = load_snapshot_manifest(str(manifest))
+    assert [snapshot["build"] for snapshot in snapshots] == [19045, 22631, None]
+
+    path = str(tmp_path / "coverage_service.idx")
+    assert build_coverage_index(snapshots, path, use_cache=False) == 3
+    return path
+
+
+def test_query_by_build_and_name(index_path):
+    index = CoverageIndex(index_path)
+    assert index.query([], build=19999)["snapshot"] == "win10"
+    assert index.query([], build=30000)["snapshot"] == "win11"
+    assert index.query([], name="custom")["build"] is None
+    with pytest.raises(KeyError):
+        index.snapshot(build=10240)
+
+    results = index.query(["\U0001F600", "\U0001FAE8", "A"], build=22631)["results"]
+    assert [(r["renderable"], r["color"], r["font"]) for r in results] == \
+        [(True, True, "Emoji New"), (True, False, "Emoji New"), (False, False, None)]
+    results = index.query(["\U0001FAE8"], name="win10")["results"]
+    assert results[0]["renderable"] is False
+
+
+def test_http_query(index_path):
+    sock = create_listener("127.0.0.1", 0)
+    server = CoverageServer(sock, CoverageIndex(index_path))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = http.client.HTTPConnection(*sock.getsockname()[:2], timeout=5)
+    try:
+        def post(payload):
+            conn.request("POST", "/query", body=json.dumps(payload).encode("utf-8"),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        status, body = post({"build": 22631, "sequences": ["\U0001FAE8"]})
+        assert status == 200
+        assert (body["snapshot"], body["build"], body["results"][0]["renderable"]) == ("win11", 22631, True)
+        assert post({"build": 10240, "sequences": []})[0] == 404
+        assert post({"sequences": "\U0001F600"})[0] == 400
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        thread.join(2.0)
@@ -0,0 +1,50 @@
+from coverage_cache import analyze_font
+from emoji_catalog import bucket_sample, load_emoji_catalog, strip_variation_selectors
+from emoji_catalog import test_catalog_support as catalog_support
+from synthetic_font import write_font
+
+
+def bucket_codepoints(versions):
+    """目录中指定版本的单码位条目"""
+    catalog = load_emoji_catalog()
+    return sorted({ord(strip_variation_selectors(seq)) for i, seq in enumerate(catalog.sequences)
+                   if catalog.version_of(i) in versions and len(strip_variation_selectors(seq)) == 1})
+
+
+def bucket_font(tmp_path, versions, color=()):
+    """只覆盖目录中指定版本的单码位条目的合成字体，color 中的码位带 COLR 彩色字形，返回解析结果"""
+    path = str(tmp_path / "font.ttf")
+    write_font(path, bucket_codepoints(versions), color_glyphs={"COLR": [chr(cp) for cp in color]})
+    return analyze_font(path)
+
+
+def test_row_sample_belongs_to_its_bucket(tmp_path):
+    catalog = load_emoji_catalog()
+    buckets = {}
+    for i, sequence in enumerate(catalog.sequences):
+        buckets.setdefault(catalog.version_of(i), set()).add(strip_variation_selectors(sequence))
+
+    results, _ = catalog_support(bucket_font(tmp_path, {"6.1"}))
+    for row in results:
+        if row["version"] in buckets:
+            assert strip_variation_selectors(row["char"]) in buckets[row["version"]], row["version"]
+
+    rows = {row["version"]: row for row in results}
+    assert rows["6.1"]["status"] == "100.0% (13/13)"
+    assert rows["6.1"]["glyph_type"] != "missing"
+    assert rows["4.1"]["supported"] == 0
+    assert rows["4.1"]["glyph_type"] == "missing"
+    # 目录中没有条目的版本仍按配置的示例字符检测
+    assert rows["6.3"]["total"] == 1
+
+
+def test_glyph_type_follows_bucket_color_support(tmp_path):
+    sample, _ = bucket_sample("4.1", "")
+    colored = bucket_codepoints({"6.1"}) + [ord(sample[0])]
+    results, _ = catalog_support(bucket_font(tmp_path, {"6.1", "4.1"}, colored))
+    rows = {row["version"]: row for row in results}
+
+    assert (rows["6.1"]["glyph_type"], rows["6.1"]["color"]) == ("color", 13)
+    # 4.1 分组只有示例字符是彩色的，整行仍为单色
+    assert (rows["4.1"]["glyph_type"], rows["4.1"]["color"]) == ("mono", 1)
+    assert rows["7.0"]["glyph_type"] == "missing"
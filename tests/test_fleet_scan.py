@@ -0,0 +1,50 @@
+import io
+import json
+import shutil
+import sys
+
+from fleet_scan import scan_fonts
+from synthetic_font import write_font
+
+
+def read_records(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_identical_fonts_are_parsed_once(tmp_path):
+    fonts = tmp_path / "fleet"
+    for machine in ("pc1", "pc2", "pc3"):
+        (fonts / machine).mkdir(parents=True)
+    write_font(fonts / "pc1" / "seguiemj.ttf", [0x2600, 0x1F600])
+    shutil.copyfile(fonts / "pc1" / "seguiemj.ttf", fonts / "pc2" / "seguiemj.ttf")
+    write_font(fonts / "pc3" / "seguiemj.ttf", [0x2600, 0x1F600, 0x1F680])
+
+    out = io.StringIO()
+    summary = scan_fonts(str(fonts), out, workers=2)
+    records = read_records(out.getvalue())
+
+    files = [record for record in records if record["type"] == "file"]
+    assert sorted(record["machine"] for record in files) == ["pc1", "pc2", "pc3"]
+    hashes = {record["machine"]: record["hash"] for record in files}
+    assert hashes["pc1"] == hashes["pc2"] != hashes["pc3"]
+
+    fonts_out = {record["hash"]: record for record in records if record["type"] == "font"}
+    assert len(fonts_out) == 2
+    assert fonts_out[hashes["pc1"]]["files"] == 2
+    assert fonts_out[hashes["pc3"]]["files"] == 1
+    assert (summary["files"], summary["unique_fonts"], summary["failed"]) == (3, 2, 0)
+
+
+def test_snapshot_replay_keeps_stdout_ndjson(tmp_path, capsys):
+    write_font(tmp_path / "a.ttf", [0x1F600])
+    manifest = tmp_path / "fleet.ndjson"
+    snapshot = {"os_name": "Linux", "build": "#1 SMP"}
+    manifest.write_text(json.dumps({"machine": "pc1", "path": "a.ttf", "snapshot": snapshot}) + "\n",
+                        encoding="utf-8")
+
+    scan_fonts(str(manifest), sys.stdout, workers=1)
+    captured = capsys.readouterr()
+    records = read_records(captured.out)
+    assert [record["type"] for record in records] == ["file", "font", "summary"]
+    assert records[0]["api_version"] == "未知版本"
+    assert "获取Unicode版本失败" in captured.err
@@ -0,0 +1,59 @@
+from coverage_cache import analyze_font
+from emoji_catalog import load_emoji_catalog
+from font_chain import FallbackChain
+from synthetic_font import write_font
+
+TECHNOLOGIST = "\U0001F469\u200D\U0001F4BB"
+
+
+def load_chain(tmp_path, fonts):
+    """fonts 为 [(族名, 码位, 连字)]，返回由合成字体组成的回退链"""
+    entries = []
+    results = []
+    for family, codepoints, ligatures in fonts:
+        path = str(tmp_path / f"{family}.ttf")
+        write_font(path, codepoints, family=family, ligatures=ligatures)
+        entries.append((family, path))
+        results.append(analyze_font(path))
+    return FallbackChain(entries, results)
+
+
+def test_earlier_font_keeps_its_entries(tmp_path):
+    chain = load_chain(tmp_path, [
+        # A 有技术员序列的全部码位，但没有连字
+        ("A", [0x200D, 0x2600, 0x1F469, 0x1F4BB, 0x1F600], []),
+        ("B", [0x200D, 0x2600, 0x1F469, 0x1F4BB, 0x1F600, 0x1F680], [TECHNOLOGIST]),
+    ])
+    assert chain.font_for("\U0001F600") == "A"
+    assert chain.font_for("\u2600\uFE0F") == "A"
+    assert chain.font_for("\U0001F680") == "B"
+    assert chain.font_for(TECHNOLOGIST) == "B"
+    assert chain.font_for("\U0001FAE8") is None
+
+    catalog = load_emoji_catalog()
+    index = catalog.sequence_index()
+    owner = chain.entry_owner()
+    assert owner[index["\U0001F600"]] == 0
+    assert owner[index["\U0001F680"]] == 1
+    assert owner[index[TECHNOLOGIST]] == 1
+
+    supported = [catalog.unpack_support(result["entry_support"]).sum() for result in chain.results]
+    summary = chain.merged_result()["fallback_chain"]
+    served = [font["served"] for font in summary["fonts"]]
+    # B 支持 A 的全部条目，只提供 A 没有的条目
+    assert served[0] == supported[0]
+    assert served[1] == supported[1] - supported[0]
+    assert summary["supported"] == sum(served) == int((owner >= 0).sum())
+    assert summary["total"] == len(catalog)
+    assert sum(counts[0] for counts in chain.merged_result()["scores"].values()) == summary["supported"]
+
+
+def test_single_font_checks_ligatures(tmp_path):
+    without = load_chain(tmp_path, [("A", [0x200D, 0x1F469, 0x1F4BB], [])])
+    assert without.font_index("\U0001F469") == 0
+    assert without.font_index(TECHNOLOGIST) == -1
+
+    with_ligature = load_chain(tmp_path, [("B", [0x200D, 0x1F469, 0x1F4BB], [TECHNOLOGIST])])
+    assert with_ligature.font_for(TECHNOLOGIST) == "B"
+    # 目录以外的序列只检查码位
+    assert with_ligature.font_index("\U0001F4BB\u200D\U0001F469") == 0
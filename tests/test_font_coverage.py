@@ -0,0 +1,173 @@
+import struct
+
+import numpy as np
+import pytest
+
+from font_coverage import FontCoverage, FontFormatError, open_font_coverage
+from synthetic_font import build_font_tables, serialize_font, write_font
+
+BMP = [0x20, 0x41, 0x42, 0x43, 0x2600, 0x2601, 0x2665, 0x200D, 0xFE0F]
+SMP = [0x1F600, 0x1F601, 0x1F602, 0x1F680, 0x1FAE8]
+
+
+def covered_codepoints_from(coverage_bits):
+    bits = np.frombuffer(coverage_bits, dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(bits, bitorder="little")).tolist()
+
+
+def covered_codepoints(coverage):
+    return covered_codepoints_from(coverage.coverage_bytes())
+
+
+def assert_matches_reference(coverage, mapping):
+    """覆盖位图和字形编号与生成字体时的参考 cmap 完全一致"""
+    assert covered_codepoints(coverage) == sorted(mapping)
+    assert len(coverage) == len(mapping)
+    for cp, glyph in mapping.items():
+        assert coverage.glyph_id(cp) == glyph
+
+
+def test_format4_only(tmp_path):
+    path = tmp_path / "f4.ttf"
+    mapping = write_font(path, BMP, cmap_formats=(4,))
+    with FontCoverage(str(path)) as coverage:
+        assert_matches_reference(coverage, mapping)
+        assert 0x1F600 not in coverage
+
+
+def test_format12_covers_supplementary_planes(tmp_path):
+    path = tmp_path / "f12.ttf"
+    mapping = write_font(path, BMP + SMP, cmap_formats=(12,))
+    with FontCoverage(str(path)) as coverage:
+        assert_matches_reference(coverage, mapping)
+        assert coverage.supports_text("\U0001F600\U0001F680")
+        assert not coverage.supports_text("\U0001F603")
+
+
+def test_format4_and_12_agree(tmp_path):
+    path = tmp_path / "both.ttf"
+    mapping = write_font(path, BMP + SMP)
+    with FontCoverage(str(path)) as coverage:
+        assert_matches_reference(coverage, mapping)
+
+
+def test_format14_variation_sequences(tmp_path):
+    path = tmp_path / "f14.ttf"
+    # U+2600 的 emoji 样式是单独的字形，U+2665 使用默认字形
+    mapping = write_font(path, BMP, glyph_count=len(BMP) + 5,
+                         variation_sequences={(0x2600, 0xFE0F): len(BMP) + 3, (0x2665, 0xFE0F): None})
+    with FontCoverage(str(path)) as coverage:
+        assert coverage.variation_sequences == {(0x2600, 0xFE0F): len(BMP) + 3, (0x2665, 0xFE0F): None}
+        assert coverage.sequence_glyph("\u2600\uFE0F") == len(BMP) + 3
+        assert coverage.sequence_glyph("\u2600") == mapping[0x2600]
+        assert coverage.sequence_glyph("\u2665\uFE0F") == mapping[0x2665]
+
+
+def test_gsub_ligatures(tmp_path):
+    path = tmp_path / "lig.ttf"
+    write_font(path, BMP + SMP, ligatures=["\U0001F600\u200D\U0001F680"])
+    with FontCoverage(str(path)) as coverage:
+        assert coverage.supports_sequence("\U0001F600\u200D\U0001F680")
+        assert not coverage.supports_sequence("\U0001F601\u200D\U0001F680")
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.ttf"
+    path.write_bytes(b"")
+    with pytest.raises(FontFormatError):
+        FontCoverage(str(path))
+
+
+def test_not_a_font(tmp_path):
+    path = tmp_path / "text.ttf"
+    path.write_bytes(b"this is not a font file at all")
+    with pytest.raises(FontFormatError):
+        FontCoverage(str(path))
+    assert open_font_coverage(str(path)) is None
+
+
+@pytest.mark.parametrize("size", [6, 20, 100])
+def test_truncated_font(tmp_path, size):
+    path = tmp_path / "truncated.ttf"
+    tables, _ = build_font_tables(BMP + SMP)
+    path.write_bytes(serialize_font(tables)[:size])
+    with pytest.raises(FontFormatError):
+        FontCoverage(str(path))
+    assert open_font_coverage(str(path)) is None
+
+
+def test_missing_cmap(tmp_path):
+    path = tmp_path / "nocmap.ttf"
+    tables, _ = build_font_tables(BMP)
+    del tables["cmap"]
+    path.write_bytes(serialize_font(tables))
+    with pytest.raises(FontFormatError):
+        FontCoverage(str(path))
+
+
+def test_cmap_offset_out_of_range(tmp_path):
+    path = tmp_path / "badcmap.ttf"
+    tables, _ = build_font_tables(BMP)
+    # 子表偏移指向文件之外
+    cmap = bytearray(tables["cmap"])
+    struct.pack_into(">I", cmap, 8, 0x7FFFFFF0)
+    tables["cmap"] = bytes(cmap)
+    path.write_bytes(serialize_font(tables))
+    with pytest.raises(FontFormatError):
+        FontCoverage(str(path))
+
+
+def test_truncated_cmap_subtable(tmp_path):
+    path = tmp_path / "shortcmap.ttf"
+    tables, _ = build_font_tables(BMP + SMP, cmap_formats=(12,))
+    # 格式 12 的组数大于实际写入的组
+    cmap = bytearray(tables["cmap"])
+    struct.pack_into(">I", cmap, 12 + 12, 0xFFFF)
+    tables["cmap"] = bytes(cmap)
+    path.write_bytes(serialize_font(tables))
+    with pytest.raises(FontFormatError):
+        FontCoverage(str(path))
+
+
+COLOR_SEQUENCE = "\U0001F600\u200D\U0001F680"
+
+
+def color_font(path, color_glyphs):
+    write_font(path, BMP + SMP, ligatures=[COLOR_SEQUENCE], color_glyphs=color_glyphs)
+    return FontCoverage(str(path))
+
+
+@pytest.mark.parametrize("color_format, tables", [
+    ("COLR", ["COLR", "CPAL"]),
+    ("SVG", ["SVG"]),
+    ("CBDT", ["CBDT", "CBLC"]),
+    ("sbix", ["sbix"]),
+])
+def test_color_tables(tmp_path, color_format, tables):
+    colored = ["\U0001F600", "\U0001F680", "♥", COLOR_SEQUENCE]
+    with color_font(tmp_path / "color.ttf", {color_format: colored}) as coverage:
+        assert sorted(coverage.color_tables()) == sorted(tables)
+        assert covered_codepoints_from(coverage.color_coverage_bytes()) == [0x2665, 0x1F600, 0x1F680]
+        for text in colored:
+            assert coverage.has_color_glyph(text)
+            assert coverage.color_format(text) == color_format
+        assert not coverage.has_color_glyph("\U0001F601")
+        assert coverage.color_format("☀") == "mono"
+        assert coverage.color_format("\U0001F603") is None
+
+
+def test_color_format_priority(tmp_path):
+    # 同一字形在多个彩色表中时按 COLR、SVG、CBDT、sbix 的顺序取格式
+    glyphs = {"CBDT": ["\U0001F600", "\U0001F601"], "COLR": ["\U0001F600"], "sbix": ["\U0001F601", "\U0001F602"]}
+    with color_font(tmp_path / "mixed.ttf", glyphs) as coverage:
+        assert coverage.color_format("\U0001F600") == "COLR"
+        assert coverage.color_format("\U0001F601") == "CBDT"
+        assert coverage.color_format("\U0001F602") == "sbix"
+        assert coverage.color_format("\U0001F680") == "mono"
+
+
+def test_no_color_tables(tmp_path):
+    with color_font(tmp_path / "mono.ttf", None) as coverage:
+        assert coverage.color_tables() == []
+        assert covered_codepoints_from(coverage.color_coverage_bytes()) == []
+        assert not coverage.has_color_glyph(COLOR_SEQUENCE)
@@ -0,0 +1,41 @@
+import os
+
+from font_registry import FontDirectoryBackend, FontRegistry
+from synthetic_font import write_font
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_fingerprint_checks_top_level_and_fontconfig_cache(tmp_path):
+    fonts = tmp_path / "fonts"
+    nested = fonts / "truetype" / "emoji"
+    nested.mkdir(parents=True)
+    cache = tmp_path / "fontconfig"
+    cache.mkdir()
+    backend = FontDirectoryBackend([str(fonts)], cache_dirs=[str(cache), str(tmp_path / "missing")])
+
+    before = backend.fingerprint()
+    assert [path for path, _ in before] == [str(fonts), str(cache)]
+
+    # 子目录不在指纹中，只有 fc-cache 重写缓存后才能察觉
+    bump_mtime(nested)
+    assert backend.fingerprint() == before
+    bump_mtime(cache)
+    assert backend.fingerprint() != before
+
+
+def test_registry_rebuilds_when_fingerprint_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(FontDirectoryBackend, "entries", lambda self: self._scan())
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    write_font(fonts / "a.ttf", [0x1F600], family="Chain A")
+    registry = FontRegistry(FontDirectoryBackend([str(fonts)], cache_dirs=[]), check_interval=0)
+    assert registry.families() == ["Chain A"]
+
+    write_font(fonts / "b.ttf", [0x1F600], family="Chain B")
+    bump_mtime(fonts)
+    assert registry.families() == ["Chain A", "Chain B"]
+    assert registry.find("chain b") == str(fonts / "b.ttf")
@@ -0,0 +1,161 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+import font_registry
+from font_watch import ChainMonitor, FontWatcher, _PollingWaiter, format_diff
+from synthetic_font import write_font
+
+BASE = [0x2600, 0x2665, 0x1F600, 0x1F601]
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def fixture_registry(tmp_path, monkeypatch):
+    """两个合成字体组成的回退链，字体索引来自 JSON 夹具"""
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    write_font(fonts / "a.ttf", BASE, family="Chain A")
+    write_font(fonts / "b.ttf", [0x1F602], family="Chain B")
+    fixture = tmp_path / "fonts.json"
+    fixture.write_text(json.dumps({"fonts": [
+        {"family": "Chain A", "path": "fonts/a.ttf"},
+        {"family": "Chain B", "path": "fonts/b.ttf"},
+    ]}), encoding="utf-8")
+    monkeypatch.setenv(font_registry.FONT_FIXTURE_ENV, str(fixture))
+    previous = font_registry.set_font_registry(None)
+    yield fonts
+    font_registry.set_font_registry(previous)
+
+
+def test_monitor_reports_added_removed_and_moved(fixture_registry):
+    monitor = ChainMonitor(families=["Chain A", "Chain B"])
+    baseline = monitor.update()
+    assert baseline["fallback_chain"]["fonts"][0]["family"] == "Chain A"
+
+    # 没有变化：差异为空，不应输出
+    assert ChainMonitor.is_empty(monitor.update())
+
+    # A 失去 U+1F600，B 新增 U+1F600 和 U+1F680：一个改由 B 提供，一个新增
+    write_font(fixture_registry / "a.ttf", [cp for cp in BASE if cp != 0x1F600], family="Chain A")
+    write_font(fixture_registry / "b.ttf", [0x1F600, 0x1F602, 0x1F680], family="Chain B")
+    for name in ("a.ttf", "b.ttf"):
+        bump_mtime(fixture_registry / name)
+    diff = monitor.update()
+
+    assert not ChainMonitor.is_empty(diff)
+    assert [os.path.basename(p) for p in diff["changed_fonts"]] == ["a.ttf", "b.ttf"]
+    assert [row["char"] for row in diff["added"]] == ["\U0001F680"]
+    assert diff["removed"] == []
+    assert [(row["char"], row["previous_font"], row["font"]) for row in diff["moved"]] == \
+        [("\U0001F600", "Chain A", "Chain B")]
+    assert "新增 1，失去 0，改由其他字体提供 1" in format_diff(diff)
+
+    # 删除 B 中的字形：失去支持
+    write_font(fixture_registry / "b.ttf", [0x1F602], family="Chain B")
+    bump_mtime(fixture_registry / "b.ttf")
+    diff = monitor.update()
+    assert sorted(row["char"] for row in diff["removed"]) == ["\U0001F600", "\U0001F680"]
+
+
+def run_watcher(watcher):
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_watcher_ignores_unrelated_files(tmp_path):
+    font = tmp_path / "a.ttf"
+    write_font(font, BASE)
+    nested = tmp_path / "cache"
+    nested.mkdir()
+    calls = threading.Semaphore(0)
+    watcher = FontWatcher(calls.release, files=[str(font)], debounce=0.05)
+    thread = run_watcher(watcher)
+    try:
+        # 等待监视建立：先用字体文件确认回调可用
+        for _ in range(40):
+            bump_mtime(font)
+            if calls.acquire(timeout=0.1):
+                break
+        else:
+            pytest.fail("字体变化没有触发回调")
+        while calls.acquire(timeout=0.3):
+            pass
+
+        (tmp_path / "coverage_cache.sqlite").write_bytes(b"x")
+        (nested / "other.ttf").write_bytes(b"x")
+        assert not calls.acquire(timeout=0.5)
+
+        (tmp_path / "new.otf").write_bytes(b"x")
+        assert calls.acquire(timeout=2.0)
+    finally:
+        watcher.stop()
+        thread.join(2.0)
+
+
+def test_polling_waiter_ignores_unrelated_files(tmp_path):
+    font = tmp_path / "a.ttf"
+    write_font(font, BASE)
+    waiter = _PollingWaiter([str(tmp_path)], [str(font)], interval=0.01)
+    (tmp_path / "coverage_cache.sqlite").write_bytes(b"x")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.ttf").write_bytes(b"x")
+    assert not waiter.wait(0.05)
+
+    bump_mtime(font)
+    assert waiter.wait(0.05)
+    (tmp_path / "c.ttc").write_bytes(b"x")
+    assert waiter.wait(0.05)
+
+
+def wait_for_callback(calls, path, attempts=40):
+    """反复修改 path 直到回调被调用（等待监视建立），之后清空积压的回调"""
+    for _ in range(attempts):
+        bump_mtime(path)
+        if calls.acquire(timeout=0.1):
+            break
+    else:
+        return False
+    while calls.acquire(timeout=0.3):
+        pass
+    return True
+
+
+@pytest.mark.parametrize("poll", [False, True])
+def test_watcher_follows_new_targets(tmp_path, monkeypatch, poll):
+    if not poll and not sys.platform.startswith("linux"):
+        pytest.skip("inotify")
+    if poll:
+        monkeypatch.setattr(sys, "platform", "polling")
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    write_font(first / "a.ttf", BASE)
+    write_font(second / "b.ttf", [0x1F602])
+
+    calls = threading.Semaphore(0)
+    watcher = FontWatcher(calls.release, files=[str(first / "a.ttf")], debounce=0.05, poll_interval=0.02)
+    thread = run_watcher(watcher)
+    try:
+        assert wait_for_callback(calls, first / "a.ttf")
+        # 新目录尚未监视
+        bump_mtime(second / "b.ttf")
+        assert not calls.acquire(timeout=0.3)
+
+        # 回退链加入了另一个目录中的字体
+        watcher.set_targets(files=[str(first / "a.ttf"), str(second / "b.ttf")])
+        assert wait_for_callback(calls, second / "b.ttf")
+    finally:
+        watcher.stop()
+        thread.join(2.0)
+    assert not thread.is_alive()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from coverage_cache import analyze_font
+from emoji_catalog import load_emoji_catalog
+from glyph_raster import RENDER_GLYPH, RENDER_TOFU, RENDER_UNCHECKED, render_scores
+from synthetic_font import write_font
+
+
+def test_render_scores_count_only_rendered_entries():
+    catalog = load_emoji_catalog()
+    classes = np.full(len(catalog), RENDER_UNCHECKED, dtype=np.uint8)
+    grinning = catalog.sequence_index()["\U0001F600"]
+    shaking = catalog.sequence_index()["\U0001FAE8"]
+    classes[grinning] = RENDER_GLYPH
+    classes[shaking] = RENDER_TOFU
+
+    scores = render_scores(catalog, classes.tobytes())
+    assert scores[catalog.version_of(grinning)] == [1, 0, 0]
+    assert scores[catalog.version_of(shaking)] == [0, 1, 0]
+    assert sum(sum(counts) for counts in scores.values()) == 2
+
+
+def test_unsupported_entries_are_not_rendered(tmp_path):
+    pytest.importorskip("PySide6")
+    from glyph_raster import verify_font_rendering
+
+    path = str(tmp_path / "font.ttf")
+    write_font(path, [0x2600, 0x1F600, 0x1F680])
+    font_result = analyze_font(path)
+    verification = verify_font_rendering(font_result)
+    assert verification is not None
+
+    catalog = load_emoji_catalog()
+    supported = catalog.unpack_support(font_result["entry_support"])
+    classes = np.frombuffer(verification["classes"], dtype=np.uint8)
+    assert (classes[~supported] == RENDER_UNCHECKED).all()
+    assert (classes[supported] != RENDER_UNCHECKED).all()
+    for version, counts in render_scores(catalog, verification["classes"]).items():
+        assert sum(counts) == font_result["scores"][version][0]
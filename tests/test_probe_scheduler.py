@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+import detection
+from probe_scheduler import Probe, ProbeScheduler
+from synthetic_font import write_font
+
+
+def test_independent_probes_run_concurrently():
+    barrier = threading.Barrier(3, timeout=2.0)
+    probes = [Probe(name, lambda: barrier.wait() is not None) for name in ("a", "b", "c")]
+    started = time.monotonic()
+    results = dict(ProbeScheduler(probes).run())
+    # 三个检测项必须同时运行才能都通过屏障
+    assert results == {"a": True, "b": True, "c": True}
+    assert time.monotonic() - started < 2.0
+
+
+def test_dependencies_receive_results_in_order():
+    order = []
+
+    def record(name, value):
+        order.append(name)
+        return value
+
+    probes = [
+        Probe("total", lambda x, y: record("total", x + y), ("double", "base")),
+        Probe("double", lambda x: record("double", x * 2), ("base",)),
+        Probe("base", lambda: record("base", 21)),
+    ]
+    results = list(ProbeScheduler(probes).run())
+    assert results == [("base", 21), ("double", 42), ("total", 63)]
+    assert order == ["base", "double", "total"]
+
+
+def test_timeout_and_error_use_fallback():
+    release = threading.Event()
+    probes = [
+        Probe("slow", lambda: release.wait(5.0), timeout=0.1, fallback=lambda error: type(error).__name__),
+        Probe("broken", lambda: 1 / 0, fallback="默认"),
+        Probe("after_slow", lambda value: f"got {value}", ("slow",)),
+    ]
+    try:
+        started = time.monotonic()
+        results = dict(ProbeScheduler(probes).run())
+        assert time.monotonic() - started < 2.0
+    finally:
+        release.set()
+    assert results == {"slow": "TimeoutError", "broken": "默认", "after_slow": "got TimeoutError"}
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        ProbeScheduler([Probe("a", lambda x: x, ("missing",))])
+    with pytest.raises(ValueError):
+        ProbeScheduler([Probe("a", lambda x: x, ("b",)), Probe("b", lambda x: x, ("a",))])
+    with pytest.raises(ValueError):
+        ProbeScheduler([Probe("a", lambda: 1), Probe("a", lambda: 2)])
+
+
+def test_render_verification_runs_on_calling_thread(tmp_path, monkeypatch):
+    path = str(tmp_path / "font.ttf")
+    write_font(path, [0x2600, 0x1F600])
+    threads = []
+
+    def fake_verification(font_result, cache=None):
+        threads.append(threading.current_thread())
+        return font_result
+
+    monkeypatch.setattr(detection, "apply_render_verification", fake_verification)
+    info = detection.detect_unicode_info(path, use_cache=False, verify_render=True, families=[])
+    assert info["fallback_chain"]["fonts"][0]["path"] == path
+    assert threads == [threading.current_thread()]
+
+
+def test_dependents_start_before_result_is_yielded():
+    started = threading.Event()
+    probes = [
+        Probe("base", lambda: 1),
+        Probe("dependent", lambda value: started.set() or value + 1, ("base",)),
+    ]
+    run = ProbeScheduler(probes).run()
+    assert next(run) == ("base", 1)
+    # 调用方还在处理 base 的结果时，dependent 已经开始运行
+    assert started.wait(2.0)
+    assert list(run) == [("dependent", 2)]
+
+
+def test_dependents_of_timed_out_probe_start_before_yield():
+    release = threading.Event()
+    started = threading.Event()
+    probes = [
+        Probe("slow", lambda: release.wait(5.0), timeout=0.05, fallback="默认"),
+        Probe("dependent", lambda value: started.set() or value, ("slow",)),
+    ]
+    run = ProbeScheduler(probes).run()
+    try:
+        assert next(run) == ("slow", "默认")
+        assert started.wait(2.0)
+        assert list(run) == [("dependent", "默认")]
+    finally:
+        release.set()
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtCore import Qt  # noqa: E402
+
+from report_export import RESULT_FIELDS, write_report  # noqa: E402
+from result_model import ResultTableModel  # noqa: E402
+
+ROWS = [
+    {"version": "15.1", "char": "\U0001FAE8", "name": "颤抖的脸", "status": "50.0% (59/118)", "coverage": 50.0,
+     "supported": 59, "total": 118, "release_date": "2023-09", "glyph_type": "color", "color": 59,
+     "font": "Segoe UI Emoji", "glyph": 57, "tofu": 1, "blank": 1},
+    {"version": "6.0", "char": "\U0001F4A9", "name": "便便", "status": "100.0% (737/737)", "coverage": 100.0,
+     "supported": 737, "total": 737, "release_date": "2010-10", "glyph_type": "mono", "color": 0,
+     "font": "Segoe UI Symbol"},
+]
+
+
+def csv_export(rows):
+    out = io.StringIO()
+    write_report({}, rows, out, "csv")
+    return out.getvalue()
+
+
+def test_row_result_round_trips_every_export_field():
+    model = ResultTableModel(threshold=95.0)
+    model.set_results(ROWS)
+    for row, expected in enumerate(ROWS):
+        result = model.row_result(row)
+        assert {field: result.get(field) for field in RESULT_FIELDS} == \
+            {field: expected.get(field) for field in RESULT_FIELDS}
+
+
+def test_gui_export_matches_cli_export():
+    model = ResultTableModel(threshold=95.0)
+    model.append_results(ROWS[:1])
+    model.append_results(ROWS[1:])
+    assert csv_export(model.iter_results()) == csv_export(ROWS)
+
+    # 排序后按显示顺序导出
+    model.sort(0, Qt.AscendingOrder)
+    assert csv_export(model.iter_results()) == csv_export(ROWS[::-1])
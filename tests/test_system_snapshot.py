@@ -0,0 +1,34 @@
+import pytest
+
+from utils import SystemSnapshot, check_python_compatibility, get_system_info, get_windows_unicode_version
+
+
+def windows_provider():
+    return {"os_name": "Windows", "major": 10, "minor": 0, "build": 22631}
+
+
+def test_json_round_trip():
+    snapshot = SystemSnapshot.capture(windows_provider)
+    assert snapshot.arch and snapshot.python_version
+
+    restored = SystemSnapshot.from_json(snapshot.to_json())
+    assert restored == snapshot
+    assert restored.to_dict() == snapshot.to_dict()
+    assert restored.build_number == 22631
+    assert get_system_info(restored) == get_system_info(snapshot)
+    assert get_windows_unicode_version(restored) == "15.1"
+
+
+def test_missing_fields_are_not_filled_from_host():
+    restored = SystemSnapshot.from_json('{"os_name": "Windows", "major": 10, "minor": 0, "build": 19045}')
+    assert restored.arch is None
+    assert restored.python_version is None
+
+    info = get_system_info(restored)
+    assert (info["arch"], info["python_version"]) == ("未知架构", "未知版本")
+    assert check_python_compatibility(restored) == (False, "Python 版本未知")
+
+
+def test_snapshots_are_unhashable():
+    with pytest.raises(TypeError):
+        hash(SystemSnapshot("Windows"))
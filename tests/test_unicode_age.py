@@ -0,0 +1,85 @@
+from coverage_cache import analyze_font
+from detection import determine_actual_unicode_support
+from emoji_catalog import load_emoji_catalog
+from synthetic_font import write_font
+from unicode_age import (
+    coverage_scores, infer_supported_version, load_version_index, version_key, windows_unicode_version
+)
+
+
+def test_windows_unicode_version():
+    assert windows_unicode_version(10240) == "12.0"
+    assert windows_unicode_version(19045) == "14.0"
+    assert windows_unicode_version(22631) == "15.1"
+    assert windows_unicode_version(5, [(10, "9.0"), (0, "8.0")]) == "8.0"
+    assert windows_unicode_version(5, [(10, "9.0")]) is None
+
+
+def test_version_index_lookups():
+    index = load_version_index()
+    assert index.codepoint_version(0x1F600) == "6.1"
+    assert index.codepoint_version(0x2618) == "4.1"
+    assert index.codepoint_version(0x1FAE8) == "15.0"
+    assert index.codepoint_version(0x41) is None
+    # 已知的 ZWJ 序列按引入它的 emoji 版本，变体选择符不影响查找
+    assert index.sequence_version("\u2764\uFE0F\u200D\U0001F525") == "13.1"
+    assert index.sequence_version("\u2764\u200D\U0001F525") == "13.1"
+    # 目录以外的序列取各码位版本的最大值
+    assert index.sequence_version("\U0001F600\u200D\U0001FAE8") == "15.0"
+    assert index.sequence_version("\U0001F600A") is None
+
+    catalog = load_emoji_catalog()
+    for entry_id in range(0, len(catalog), 97):
+        assert index.sequence_version(catalog.sequences[entry_id]) == catalog.version_of(entry_id)
+
+
+def test_coverage_scores_use_version_index(tmp_path):
+    path = str(tmp_path / "font.ttf")
+    write_font(path, [0x2618, 0x1F600, 0x1F617])
+    scores = coverage_scores(analyze_font(path)["coverage"])
+    assert scores["6.1"][0] == 2
+    assert scores["4.1"][0] == 1
+    assert scores["15.0"][0] == 0
+    assert scores == load_version_index().score_coverage(analyze_font(path)["coverage"])
+
+
+def test_infer_supported_version():
+    scores = {"6.1": (13, 13), "12.0": (229, 230), "13.0": (1, 116), "9.0": (700, 752)}
+    # 9.0 未达到 95%，比它新的 12.0 也不算支持
+    assert infer_supported_version(scores, 95.0) == "6.1"
+    assert infer_supported_version(scores, 90.0) == "12.0"
+    assert infer_supported_version(scores, 99.9) == "6.1"
+    assert infer_supported_version({"6.0": (0, 737), "6.1": (13, 13)}, 95.0) is None
+    assert infer_supported_version({"15.1": (0, 118)}, 95.0) is None
+
+
+def write_catalog_font(path, versions):
+    """完整覆盖目录中指定版本的全部条目（含连字序列）的合成字体"""
+    catalog = load_emoji_catalog()
+    entries = [seq for i, seq in enumerate(catalog.sequences) if catalog.version_of(i) in versions]
+    codepoints = sorted({ord(ch) for seq in entries for ch in seq})
+    ligatures = [seq for seq in entries if len(seq.replace("\uFE0F", "")) > 1]
+    write_font(path, codepoints, ligatures=ligatures)
+
+
+def test_inference_requires_every_older_version(tmp_path):
+    catalog = load_emoji_catalog()
+    old = {version for version in catalog.versions if version_key(version) <= (6, 1)}
+    path = str(tmp_path / "font.ttf")
+    write_catalog_font(path, old)
+    font_result = analyze_font(path)
+
+    assert determine_actual_unicode_support(font_result) == "6.1"
+    assert determine_actual_unicode_support({"coverage": font_result["coverage"]}) == "6.1"
+    assert determine_actual_unicode_support(None) == "检测失败"
+
+
+def test_gap_in_older_versions_is_not_supported(tmp_path):
+    # 只有 U+1F600..U+1F64F：6.1 分组全部覆盖，但 6.0 及更早的版本大多缺失
+    path = str(tmp_path / "font.ttf")
+    write_font(path, range(0x1F600, 0x1F650))
+    font_result = analyze_font(path)
+
+    assert font_result["scores"]["6.1"][0] == font_result["scores"]["6.1"][1]
+    assert determine_actual_unicode_support(font_result) == "不支持"
+    assert determine_actual_unicode_support({"coverage": font_result["coverage"]}) == "不支持"
@@ -0,0 +1,119 @@
+"""将 Unicode emoji-test.txt 预编译为程序自带的 emoji_index.json
+
+    python tools/build_emoji_index.py path/to/emoji-test.txt --derived-age DerivedAge.txt [-o emoji_index.json]
+
+只保留 fully-qualified 条目（即 RGI emoji 集合），并按引入该 emoji 的
+Unicode 版本分组，版本号与 config.UNICODE_TEST_CHARS 中的版本号对齐：
+    单个码位（可带变体选择符）  取 DerivedAge.txt 中该码位的 Unicode 版本（Age），
+                                例如 U+1F600 为 6.1，U+2618 为 4.1
+    多码位序列                  取 emoji-test.txt 中的 emoji 版本，Emoji 1.0 ~ 5.0
+                                换算为同时发布的 Unicode 版本
+DerivedAge.txt 比 emoji-test.txt 旧时，其中没有的码位使用 emoji 版本（Emoji 11.0 起两者一致）。
+"""
+import argparse
+import bisect
+import json
+import os
+import re
+import sys
+
+# 多码位序列的 Emoji 版本 -> 同时发布的 Unicode 版本（Emoji 11.0 起两者一致）
+EMOJI_TO_UNICODE_VERSION = {
+    "0.6": "6.0",
+    "0.7": "7.0",
+    "1.0": "8.0",
+    "2.0": "8.0",
+    "3.0": "9.0",
+    "4.0": "9.0",
+    "5.0": "10.0",
+}
+
+# 判断是否为单个码位时忽略的变体选择符
+VARIATION_SELECTORS = {0xFE0E, 0xFE0F}
+
+_LINE_RE = re.compile(r"^([0-9A-F ]+?)\s*;\s*fully-qualified\s*#\s*\S+\s+E(\d+\.\d+)\s+(.+)$")
+_AGE_RE = re.compile(r"^([0-9A-F]+)(?:\.\.([0-9A-F]+))?\s*;\s*(\d+\.\d+)")
+
+
+def parse_derived_age(path):
+    """解析 DerivedAge.txt，返回 (Unicode 版本, [(起点, 终点, 版本)])，按起点排序"""
+    ranges = []
+    unicode_version = ""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("# DerivedAge-"):
+                unicode_version = line[len("# DerivedAge-"):].split(".txt")[0]
+                continue
+            match = _AGE_RE.match(line)
+            if match:
+                start = int(match.group(1), 16)
+                end = int(match.group(2), 16) if match.group(2) else start
+                ranges.append((start, end, match.group(3)))
+    ranges.sort()
+    return unicode_version, ranges
+
+
+def codepoint_age(age_ranges, codepoint):
+    """在按起点排序的 DerivedAge 区间中查找码位的 Unicode 版本，没有时返回 None"""
+    i = bisect.bisect_right(age_ranges, (codepoint, 0x10FFFF, "")) - 1
+    if i >= 0 and age_ranges[i][0] <= codepoint <= age_ranges[i][1]:
+        return age_ranges[i][2]
+    return None
+
+
+def parse_emoji_test(path, age_ranges=()):
+    """解析 emoji-test.txt，返回 (emoji 版本, [(码位列表, Unicode 版本, 英文名称)])
+
+    age_ranges 为 parse_derived_age 的区间，单个码位的条目按其中的 Age 归入版本。
+    """
+    entries = []
+    source_version = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("# Version:"):
+                source_version = line.split(":", 1)[1].strip()
+                continue
+            match = _LINE_RE.match(line)
+            if not match:
+                continue
+            codepoints = [int(cp, 16) for cp in match.group(1).split()]
+            emoji_version = match.group(2)
+            version = EMOJI_TO_UNICODE_VERSION.get(emoji_version, emoji_version)
+            core = [cp for cp in codepoints if cp not in VARIATION_SELECTORS]
+            if len(core) == 1:
+                version = codepoint_age(age_ranges, core[0]) or version
+            entries.append((codepoints, version, match.group(3)))
+    return source_version, entries
+
+
+def build_index(source_version, entries):
+    """按版本分组，每个条目为 ["码位 码位 ...", 名称]"""
+    versions = {}
+    for codepoints, version, name in entries:
+        key = " ".join(f"{cp:04X}" for cp in codepoints)
+        versions.setdefault(version, []).append([key, name])
+    ordered = dict(sorted(versions.items(), key=lambda item: float(item[0]), reverse=True))
+    return {"emoji_version": source_version, "count": len(entries), "versions": ordered}
+
+
+def main():
+    default_output = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "emoji_index.json")
+    parser = argparse.ArgumentParser(description="将 emoji-test.txt 预编译为按 Unicode 版本分组的 emoji 目录")
+    parser.add_argument("source", help="Unicode emoji-test.txt")
+    parser.add_argument("--derived-age", required=True, help="Unicode DerivedAge.txt，单个码位的引入版本")
+    parser.add_argument("-o", "--output", default=default_output, help="输出文件")
+    args = parser.parse_args()
+
+    unicode_version, age_ranges = parse_derived_age(args.derived_age)
+    source_version, entries = parse_emoji_test(args.source, age_ranges)
+    index = build_index(source_version, entries)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"已写入 {index['count']} 个 emoji（Emoji {source_version}，Unicode Age {unicode_version}）到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""生成程序自带的版本区间索引 version_index.json
+
+    python tools/build_version_index.py <emoji-test.txt | emoji_index.json> [--derived-age DerivedAge.txt]
+                                        [-o version_index.json]
+
+索引把码位映射到引入它的版本：
+    emoji 码位    取包含该码位的 RGI 序列中最早的 emoji 版本（已换算为 Unicode 版本）
+    其他码位      提供 DerivedAge.txt 时取其中的 Unicode 版本（Age），否则不收录
+相邻且版本相同的码位合并为区间 [start, end]，按起点排序，查询时二分查找。
+多码位序列（ZWJ、旗帜、键帽等）按去掉变体选择符后的文本排序存放，同样二分查找。
+"""
+import argparse
+import json
+import os
+import sys
+
+from build_emoji_index import parse_derived_age, parse_emoji_test
+
+# 序列中不参与版本判断的码位：ZWJ 和变体选择符
+IGNORABLE = {0x200D, 0xFE0E, 0xFE0F}
+
+def read_catalog_entries(path):
+    """从 emoji_index.json 读取 (码位列表, 版本) 条目"""
+    with open(path, encoding="utf-8") as f:
+        index = json.load(f)
+    entries = [([int(cp, 16) for cp in key.split()], version)
+               for version, items in index["versions"].items() for key, _ in items]
+    return index.get("emoji_version", ""), entries
+
+
+def version_key(version):
+    return tuple(int(part) for part in version.split("."))
+
+
+def build_index(emoji_version, entries, age_ranges=(), unicode_version=""):
+    """entries 为 [(码位列表, 版本)]，返回可写入 JSON 的索引字典"""
+    emoji_ages = {}
+    sequences = {}
+    for codepoints, version in entries:
+        core = [cp for cp in codepoints if cp not in IGNORABLE]
+        for cp in core:
+            if cp not in emoji_ages or version_key(version) < version_key(emoji_ages[cp]):
+                emoji_ages[cp] = version
+        if len(core) > 1:
+            key = "".join(chr(cp) for cp in codepoints if cp not in (0xFE0E, 0xFE0F))
+            if key not in sequences or version_key(version) < version_key(sequences[key]):
+                sequences[key] = version
+
+    # 逐码位的 (版本, 是否为 emoji)；DerivedAge 只补充 emoji 以外的码位
+    ages = {cp: (version, 1) for cp, version in emoji_ages.items()}
+    for start, end, version in age_ranges:
+        for cp in range(start, end + 1):
+            ages.setdefault(cp, (version, 0))
+
+    versions = sorted({version for version, _ in ages.values()} | set(sequences.values()), key=version_key)
+    version_ids = {version: i for i, version in enumerate(versions)}
+
+    starts, ends, ids, emoji = [], [], [], []
+    for cp in sorted(ages):
+        version, is_emoji = ages[cp]
+        if starts and ends[-1] == cp - 1 and ids[-1] == version_ids[version] and emoji[-1] == is_emoji:
+            ends[-1] = cp
+            continue
+        starts.append(cp)
+        ends.append(cp)
+        ids.append(version_ids[version])
+        emoji.append(is_emoji)
+
+    return {
+        "unicode_version": unicode_version,
+        "emoji_version": emoji_version,
+        "versions": versions,
+        "starts": starts,
+        "ends": ends,
+        "version_ids": ids,
+        "emoji": emoji,
+        "sequences": [[key, version_ids[sequences[key]]] for key in sorted(sequences)],
+    }
+
+
+def main():
+    default_output = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "version_index.json")
+    parser = argparse.ArgumentParser(description="生成码位/序列到引入版本的区间索引")
+    parser.add_argument("source", help="Unicode emoji-test.txt，或已生成的 emoji_index.json")
+    parser.add_argument("--derived-age", help="Unicode DerivedAge.txt，收录 emoji 以外码位的版本")
+    parser.add_argument("-o", "--output", default=default_output, help="输出文件")
+    args = parser.parse_args()
+
+    unicode_version, age_ranges = parse_derived_age(args.derived_age) if args.derived_age else ("", [])
+    if args.source.lower().endswith(".json"):
+        emoji_version, entries = read_catalog_entries(args.source)
+    else:
+        emoji_version, parsed = parse_emoji_test(args.source, age_ranges)
+        entries = [(codepoints, version) for codepoints, version, _ in parsed]
+
+    index = build_index(emoji_version, entries, age_ranges, unicode_version)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"已写入 {len(index['starts'])} 个码位区间、{len(index['sequences'])} 个序列到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""生成用于检测和基准测试的最小 TrueType 字体
+
+    python tools/synthetic_font.py out.ttf 1F600-1F64F 2600 2665
+
+字体只包含矩形轮廓字形和 cmap（格式 4/12，可选格式 14），可选 GSUB 连字和
+彩色字形表（COLR/CPAL、SVG、CBDT/CBLC、sbix），足够让 font_coverage 及 Qt 加载，但不适合实际排版。
+"""
+import struct
+import sys
+
+UNITS_PER_EM = 1000
+
+# 彩色位图占位数据：只有 PNG 文件头，font_coverage 只检查位图是否存在
+_PNG_STUB = b"\x89PNG\r\n\x1a\n"
+
+
+def _checksum(data):
+    data = data + b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+
+def _box_glyph(x0, y0, x1, y1):
+    """单个矩形轮廓的简单字形"""
+    points = [(x0, y0), (x0, y1), (x1, y1), (x1, y0)]
+    header = struct.pack(">hhhhh", 1, x0, y0, x1, y1)
+    body = struct.pack(">H", 3) + struct.pack(">H", 0)
+    body += bytes([0x01] * 4)
+    prev_x = prev_y = 0
+    xs = ys = b""
+    for x, y in points:
+        xs += struct.pack(">h", x - prev_x)
+        ys += struct.pack(">h", y - prev_y)
+        prev_x, prev_y = x, y
+    return header + body + xs + ys
+
+
+def _cmap_format4(mapping):
+    bmp = sorted((cp, gid) for cp, gid in mapping.items() if cp <= 0xFFFF)
+    segments = []
+    for cp, gid in bmp:
+        if segments and segments[-1][1] == cp - 1 and segments[-1][2] + (cp - segments[-1][0]) == gid:
+            segments[-1][1] = cp
+        else:
+            segments.append([cp, cp, gid])
+    segments.append([0xFFFF, 0xFFFF, 1])
+
+    seg_count = len(segments)
+    search_range = 2 * (1 << (seg_count.bit_length() - 1))
+    entry_selector = (seg_count.bit_length() - 1)
+    range_shift = 2 * seg_count - search_range
+    ends = b"".join(struct.pack(">H", s[1]) for s in segments)
+    starts = b"".join(struct.pack(">H", s[0]) for s in segments)
+    deltas = b"".join(struct.pack(">H", (s[2] - s[0]) & 0xFFFF) for s in segments)
+    range_offsets = b"\0\0" * seg_count
+    body = ends + b"\0\0" + starts + deltas + range_offsets
+    length = 14 + len(body)
+    return struct.pack(">HHHHHHH", 4, length, 0, 2 * seg_count,
+                       search_range, entry_selector, range_shift) + body
+
+
+def _cmap_format12(mapping):
+    groups = []
+    for cp, gid in sorted(mapping.items()):
+        if groups and groups[-1][1] == cp - 1 and groups[-1][2] + (cp - groups[-1][0]) == gid:
+            groups[-1][1] = cp
+        else:
+            groups.append([cp, cp, gid])
+    body = b"".join(struct.pack(">III", *g) for g in groups)
+    return struct.pack(">HHIII", 12, 0, 16 + len(body), 0, len(groups)) + body
+
+
+def _cmap_format14(variation_sequences):
+    """variation_sequences: {(基础字符, 选择符): 字形编号或 None（默认变体）}"""
+    selectors = sorted({vs for _, vs in variation_sequences})
+    header_len = 10 + 11 * len(selectors)
+    records = b""
+    payload = b""
+    for vs in selectors:
+        defaults = sorted(cp for (cp, s), g in variation_sequences.items() if s == vs and g is None)
+        explicit = sorted((cp, g) for (cp, s), g in variation_sequences.items() if s == vs and g is not None)
+        default_offset = non_default_offset = 0
+        if defaults:
+            default_offset = header_len + len(payload)
+            payload += struct.pack(">I", len(defaults))
+            payload += b"".join(cp.to_bytes(3, "big") + b"\0" for cp in defaults)
+        if explicit:
+            non_default_offset = header_len + len(payload)
+            payload += struct.pack(">I", len(explicit))
+            payload += b"".join(cp.to_bytes(3, "big") + struct.pack(">H", g) for cp, g in explicit)
+        records += vs.to_bytes(3, "big") + struct.pack(">II", default_offset, non_default_offset)
+    length = header_len + len(payload)
+    return struct.pack(">HII", 14, length, len(selectors)) + records + payload
+
+
+def _cmap_table(mapping, variation_sequences, cmap_formats=(4, 12)):
+    subtables = []
+    if 4 in cmap_formats:
+        subtables.append(((3, 1), _cmap_format4(mapping)))
+    if 12 in cmap_formats:
+        subtables.append(((3, 10), _cmap_format12(mapping)))
+    if variation_sequences:
+        subtables.append(((0, 5), _cmap_format14(variation_sequences)))
+    header = struct.pack(">HH", 0, len(subtables))
+    offset = 4 + 8 * len(subtables)
+    records = b""
+    body = b""
+    for (platform_id, encoding_id), data in subtables:
+        records += struct.pack(">HHI", platform_id, encoding_id, offset + len(body))
+        body += data + b"\0" * (-len(data) % 4)
+    return header + records + body
+
+
+def _gsub_table(rules):
+    """rules: [(组件字形编号元组, 连字字形编号)]，生成单个 ccmp 连字查找"""
+    by_first = {}
+    for components, ligature in rules:
+        by_first.setdefault(components[0], []).append((components[1:], ligature))
+    firsts = sorted(by_first)
+
+    coverage = struct.pack(">HH", 1, len(firsts)) + struct.pack(f">{len(firsts)}H", *firsts)
+    sets = []
+    for first in firsts:
+        ligs = [struct.pack(">HH", lig, len(rest) + 1) + struct.pack(f">{len(rest)}H", *rest)
+                for rest, lig in by_first[first]]
+        offset = 2 + 2 * len(ligs)
+        offsets = []
+        for lig in ligs:
+            offsets.append(offset)
+            offset += len(lig)
+        sets.append(struct.pack(">H", len(ligs)) + struct.pack(f">{len(ligs)}H", *offsets) + b"".join(ligs))
+
+    header_len = 6 + 2 * len(sets)
+    offset = header_len + len(coverage)
+    set_offsets = []
+    for lig_set in sets:
+        set_offsets.append(offset)
+        offset += len(lig_set)
+    subtable = struct.pack(">HHH", 1, header_len, len(sets)) + struct.pack(f">{len(sets)}H", *set_offsets)
+    subtable += coverage + b"".join(sets)
+
+    lookup = struct.pack(">HHHH", 4, 0, 1, 8) + subtable
+    lookup_list = struct.pack(">HH", 1, 4) + lookup
+    feature = struct.pack(">HH", 0, 1) + struct.pack(">H", 0)
+    feature_list = struct.pack(">H4sH", 1, b"ccmp", 8) + feature
+    lang_sys = struct.pack(">HHHH", 0, 0xFFFF, 1, 0)
+    script = struct.pack(">HH", 4, 0) + lang_sys
+    script_list = struct.pack(">H4sH", 1, b"DFLT", 8) + script
+
+    script_at = 10
+    feature_at = script_at + len(script_list)
+    lookup_at = feature_at + len(feature_list)
+    return struct.pack(">HHHHH", 1, 0, script_at, feature_at, lookup_at) + script_list + feature_list + lookup_list
+
+
+def _colr_tables(glyphs):
+    """COLR 版本 0（每个字形一个图层，使用自身轮廓）及只有一种颜色的 CPAL"""
+    glyphs = sorted(glyphs)
+    base_records = b"".join(struct.pack(">HHH", g, i, 1) for i, g in enumerate(glyphs))
+    layer_records = b"".join(struct.pack(">HH", g, 0) for g in glyphs)
+    colr = struct.pack(">HHIIH", 0, len(glyphs), 14, 14 + len(base_records), len(glyphs))
+    cpal = struct.pack(">HHHHIH", 0, 1, 1, 1, 14, 0) + bytes([0x00, 0x80, 0xFF, 0xFF])
+    return colr + base_records + layer_records, cpal
+
+
+def _svg_table(glyphs):
+    """每个字形一个 SVG 文档"""
+    glyphs = sorted(glyphs)
+    records = b""
+    docs = b""
+    offset = 2 + 12 * len(glyphs)
+    for g in glyphs:
+        doc = f'<svg xmlns="http://www.w3.org/2000/svg"><rect id="glyph{g}" width="1" height="1"/></svg>'
+        doc = doc.encode("utf-8")
+        records += struct.pack(">HHII", g, g, offset + len(docs), len(doc))
+        docs += doc
+    return struct.pack(">HIIH", 0, 10, 0, len(glyphs)) + records + docs
+
+
+def _cbdt_tables(glyphs, ppem=109):
+    """CBLC 中一个尺寸、一个格式 1 索引子表（字形编号连续区间，没有位图的字形偏移相同），
+    CBDT 中为格式 17 的 PNG 位图"""
+    glyphs = set(glyphs)
+    first, last = min(glyphs), max(glyphs)
+    cbdt = struct.pack(">HH", 3, 0)
+    image_data_offset = len(cbdt)
+    offsets = []
+    for g in range(first, last + 1):
+        offsets.append(len(cbdt) - image_data_offset)
+        if g in glyphs:
+            cbdt += struct.pack(">BBbbB", ppem, ppem, 0, ppem, ppem) + struct.pack(">I", len(_PNG_STUB)) + _PNG_STUB
+    offsets.append(len(cbdt) - image_data_offset)
+
+    subtable = struct.pack(">HHI", 1, 17, image_data_offset) + struct.pack(f">{len(offsets)}I", *offsets)
+    subtable_array = struct.pack(">HHI", first, last, 8) + subtable
+    line_metrics = struct.pack(">bbBbbbbbbbbb", ppem, 0, ppem, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+    size = struct.pack(">IIII", 8 + 48, len(subtable_array), 1, 0) + line_metrics * 2
+    size += struct.pack(">HHBBBb", first, last, ppem, ppem, 32, 1)
+    cblc = struct.pack(">HHI", 3, 0, 1) + size + subtable_array
+    return cblc, cbdt
+
+
+def _sbix_table(glyphs, num_glyphs, ppem=160):
+    """sbix 中一个尺寸，没有位图的字形偏移相同"""
+    strike_header = 4 + 4 * (num_glyphs + 1)
+    offsets = []
+    data = b""
+    for g in range(num_glyphs):
+        offsets.append(strike_header + len(data))
+        if g in glyphs:
+            data += struct.pack(">hh4s", 0, 0, b"png ") + _PNG_STUB
+    offsets.append(strike_header + len(data))
+    strike = struct.pack(">HH", ppem, 72) + struct.pack(f">{len(offsets)}I", *offsets) + data
+    return struct.pack(">HHII", 1, 1, 1, 12) + strike
+
+
+def _name_table(family):
+    names = {1: family, 2: "Regular", 4: family, 6: family.replace(" ", "")}
+    records = b""
+    strings = b""
+    for name_id, text in sorted(names.items()):
+        raw = text.encode("utf-16-be")
+        records += struct.pack(">HHHHHH", 3, 1, 0x409, name_id, len(raw), len(strings))
+        strings += raw
+    return struct.pack(">HHH", 0, len(names), 6 + 12 * len(names)) + records + strings
+
+
+def build_font_tables(codepoints, family="Synthetic Emoji", variation_sequences=None,
+                      ligatures=None, glyph_count=None, blank_codepoints=None, cmap_formats=(4, 12),
+                      color_glyphs=None):
+    """构建字体各表的字节内容，返回 ({tag: bytes}, {码位: 字形编号})
+
+    ligatures 为需要合成单个字形的序列（字符串），序列中的字符必须在 codepoints 中。
+    blank_codepoints 中的码位映射到没有轮廓的空字形（用于模拟渲染为空白的字符）。
+    cmap_formats 为要写入的 cmap 子表格式（4 只含基本多文种平面，12 含全部码位）。
+    color_glyphs 为 {"COLR"/"SVG"/"CBDT"/"sbix": 字符或 ligatures 中的序列}，
+    对应的字形写入该彩色表。
+    """
+    codepoints = sorted(set(codepoints))
+    mapping = {cp: i + 1 for i, cp in enumerate(codepoints)}
+    rules = []
+    for i, sequence in enumerate(ligatures or ()):
+        components = tuple(mapping[ord(ch)] for ch in sequence)
+        rules.append((components, len(codepoints) + 1 + i))
+    num_glyphs = max(glyph_count or 0, len(codepoints) + len(rules) + 1)
+
+    glyphs = [_box_glyph(100, 0, 600, 700)]
+    glyphs += [_box_glyph(50, -100, 950, 800)] * (num_glyphs - 1)
+    for cp in blank_codepoints or ():
+        glyphs[mapping[cp]] = b""
+    loca = [0]
+    glyf = b""
+    for g in glyphs:
+        glyf += g + b"\0" * (-len(g) % 4)
+        loca.append(len(glyf))
+
+    advance = UNITS_PER_EM
+    tables = {
+        "cmap": _cmap_table(mapping, variation_sequences or {}, cmap_formats),
+        "glyf": glyf,
+        "loca": struct.pack(f">{len(loca)}I", *loca),
+        "head": struct.pack(">IIIIHHqqhhhhHHhhh", 0x00010000, 0x00010000, 0, 0x5F0F3CF5,
+                            0x000B, UNITS_PER_EM, 0, 0, 0, -100, advance, 800, 0, 8, 2, 1, 0),
+        "hhea": struct.pack(">IhhhHhhhhhhhhhhhH", 0x00010000, 800, -200, 0, advance,
+                            0, -100, 950, 950, 1, 0, 0, 0, 0, 0, 0, num_glyphs),
+        "maxp": struct.pack(">IHHHHHHHHHHHHHH", 0x00010000, num_glyphs, 4, 1, 0, 0,
+                            2, 0, 0, 0, 0, 0, 0, 0, 0),
+        "hmtx": struct.pack(">Hh", advance, 0) * num_glyphs,
+        "post": struct.pack(">IIhhIIIII", 0x00030000, 0, -100, 50, 0, 0, 0, 0, 0),
+        "name": _name_table(family),
+        "OS/2": struct.pack(">HhHHHhhhhhhhhhhh10sIIII4sHHHhhhHH", 1, advance, 400, 5, 0,
+                            650, 600, 0, 75, 650, 600, 0, 350, 50, 300, 0, b"\0" * 10,
+                            0, 0, 0, 0, b"NONE", 0x40, min(min(codepoints or [0x20]), 0xFFFF), 0xFFFF,
+                            800, -200, 0, 800, 200),
+    }
+    if rules:
+        tables["GSUB"] = _gsub_table(rules)
+
+    ligature_glyphs = {sequence: glyph for sequence, (_, glyph) in zip(ligatures or (), rules)}
+    for color_format, sequences in (color_glyphs or {}).items():
+        glyph_ids = {mapping[ord(seq)] if len(seq) == 1 else ligature_glyphs[seq] for seq in sequences}
+        if color_format == "COLR":
+            tables["COLR"], tables["CPAL"] = _colr_tables(glyph_ids)
+        elif color_format == "SVG":
+            tables["SVG "] = _svg_table(glyph_ids)
+        elif color_format == "CBDT":
+            tables["CBLC"], tables["CBDT"] = _cbdt_tables(glyph_ids)
+        elif color_format == "sbix":
+            tables["sbix"] = _sbix_table(glyph_ids, num_glyphs)
+        else:
+            raise ValueError(f"不支持的彩色格式: {color_format}")
+    return tables, mapping
+
+
+def serialize_font(tables):
+    """按 OpenType 规范拼接表目录和表数据"""
+    tags = sorted(tables)
+    num_tables = len(tags)
+    entry_selector = num_tables.bit_length() - 1
+    search_range = 16 * (1 << entry_selector)
+    header = struct.pack(">IHHHH", 0x00010000, num_tables, search_range,
+                         entry_selector, 16 * num_tables - search_range)
+    offset = 12 + 16 * num_tables
+    directory = b""
+    body = b""
+    for tag in tags:
+        data = tables[tag]
+        directory += struct.pack(">4sIII", tag.encode("latin-1"), _checksum(data),
+                                 offset + len(body), len(data))
+        body += data + b"\0" * (-len(data) % 4)
+    return header + directory + body
+
+
+def write_font(path, codepoints, **kwargs):
+    """生成字体文件，返回 {码位: 字形编号}"""
+    tables, mapping = build_font_tables(codepoints, **kwargs)
+    with open(path, "wb") as f:
+        f.write(serialize_font(tables))
+    return mapping
+
+
+def parse_codepoints(args):
+    """解析 "1F600" 或 "1F600-1F64F" 形式的码位参数"""
+    codepoints = []
+    for arg in args:
+        if "-" in arg:
+            start, end = (int(x, 16) for x in arg.split("-", 1))
+            codepoints.extend(range(start, end + 1))
+        else:
+            codepoints.append(int(arg, 16))
+    return codepoints
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    write_font(sys.argv[1], parse_codepoints(sys.argv[2:]))
@@ -0,0 +1,158 @@
+"""码位/序列到引入版本的区间索引，以及由实测覆盖率推断实际支持的 Unicode 版本
+
+版本索引由 tools/build_version_index.py 从 emoji_index.json 预编译为 version_index.json，
+随程序发布：码位按区间 [start, end] 存放，多码位序列按文本排序存放，查询都是二分查找，
+不依赖 NumPy。单个码位按 DerivedAge 的 Unicode 版本，多码位序列按引入它的 emoji 版本，
+与 emoji 目录的分组一致（见 tools/build_emoji_index.py）。
+
+“实际支持版本”不再根据字体版本和系统版本查表，而是由实测覆盖率推断：
+从最旧的版本起覆盖率连续达到阈值的最高版本，见 infer_supported_version。没有逐条目录统计的结果用版本索引按码位给覆盖位图打分。
+
+Windows 构建号对照表是 config.WINDOWS_UNICODE_VERSIONS，新系统发布时只需修改配置。
+"""
+import bisect
+import json
+import os
+import sys
+from array import array
+
+VERSION_INDEX_FILE = "version_index.json"
+
+_index = None
+
+
+def _index_path():
+    # PyInstaller 单文件模式下数据文件被解压到 sys._MEIPASS
+    base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, VERSION_INDEX_FILE)
+
+
+def version_key(version):
+    """把 "12.1" 之类的版本号转成可比较的元组"""
+    return tuple(int(part) for part in version.split("."))
+
+
+def windows_unicode_version(build_number, builds=None):
+    """Windows 构建号对应的系统 API 支持版本，早于对照表第一项时返回 None
+
+    builds 为 [(最低构建号, Unicode 版本)]，默认使用 config.WINDOWS_UNICODE_VERSIONS。
+    """
+    if builds is None:
+        from config import WINDOWS_UNICODE_VERSIONS
+        builds = WINDOWS_UNICODE_VERSIONS
+
+    builds = sorted(builds)
+    i = bisect.bisect_right([build for build, _ in builds], build_number) - 1
+    return builds[i][1] if i >= 0 else None
+
+
+class VersionIndex:
+    """versions 按从旧到新排列，区间和序列中保存的是版本在 versions 中的下标"""
+
+    def __init__(self, index):
+        self.unicode_version = index.get("unicode_version", "")
+        self.emoji_version = index.get("emoji_version", "")
+        self.versions = list(index["versions"])
+        self.starts = array("I", index["starts"])
+        self.ends = array("I", index["ends"])
+        self.version_ids = array("B", index["version_ids"])
+        self.emoji = array("B", index.get("emoji") or [1] * len(self.starts))
+        self.sequence_keys = [key for key, _ in index.get("sequences", [])]
+        self.sequence_ids = array("B", [version_id for _, version_id in index.get("sequences", [])])
+        self._emoji_codepoints = None
+
+    def codepoint_version_id(self, codepoint):
+        i = bisect.bisect_right(self.starts, codepoint) - 1
+        if i >= 0 and codepoint <= self.ends[i]:
+            return self.version_ids[i]
+        return None
+
+    def codepoint_version(self, codepoint):
+        """码位的引入版本，索引中没有时返回 None"""
+        version_id = self.codepoint_version_id(codepoint)
+        return None if version_id is None else self.versions[version_id]
+
+    def sequence_version(self, text):
+        """序列的引入版本：已知的多码位序列直接查表，否则取各码位版本的最大值"""
+        key = text.replace("\uFE0F", "").replace("\uFE0E", "")
+        i = bisect.bisect_left(self.sequence_keys, key)
+        if i < len(self.sequence_keys) and self.sequence_keys[i] == key:
+            return self.versions[self.sequence_ids[i]]
+        newest = None
+        for ch in key:
+            if ch == "\u200D":
+                continue
+            version_id = self.codepoint_version_id(ord(ch))
+            if version_id is None:
+                return None
+            newest = version_id if newest is None else max(newest, version_id)
+        return None if newest is None else self.versions[newest]
+
+    def emoji_codepoints(self):
+        """展开全部 emoji 区间，返回 (码位数组, 版本下标数组)"""
+        if self._emoji_codepoints is None:
+            codepoints = array("I")
+            version_ids = array("B")
+            for start, end, version_id, is_emoji in zip(self.starts, self.ends, self.version_ids, self.emoji):
+                if is_emoji:
+                    codepoints.extend(range(start, end + 1))
+                    version_ids.extend([version_id] * (end - start + 1))
+            self._emoji_codepoints = codepoints, version_ids
+        return self._emoji_codepoints
+
+    def score_coverage(self, coverage_bits):
+        """按引入版本统计码位位图覆盖的 emoji 码位，返回 {版本: (覆盖数, 总数)}
+
+        没有逐条目录统计（scores）时用它代替，只看单个码位，不检查序列连字。
+        """
+        covered = [0] * len(self.versions)
+        totals = [0] * len(self.versions)
+        codepoints, version_ids = self.emoji_codepoints()
+        for cp, version_id in zip(codepoints, version_ids):
+            totals[version_id] += 1
+            if coverage_bits[cp >> 3] & (1 << (cp & 7)):
+                covered[version_id] += 1
+        return {version: (covered[i], totals[i]) for i, version in enumerate(self.versions) if totals[i]}
+
+
+def load_version_index():
+    """加载并缓存自带的版本索引，失败时返回 None"""
+    global _index
+    if _index is None:
+        try:
+            with open(_index_path(), encoding="utf-8") as f:
+                _index = VersionIndex(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"加载版本索引失败: {str(e)}")
+            return None
+    return _index
+
+
+def coverage_scores(coverage_bits):
+    """没有逐条目录统计（scores）时，用版本索引按码位给覆盖位图打分，返回 {版本: (覆盖数, 总数)}
+
+    只看码位，不检查序列连字；版本索引无法加载时返回 None。
+    """
+    index = load_version_index()
+    return index.score_coverage(coverage_bits) if index is not None else None
+
+
+def infer_supported_version(scores, threshold=None):
+    """{版本: (支持数, 总数)} 中从最旧的版本起覆盖率（百分比）连续达到阈值的最高版本
+
+    某个版本未达到阈值时，比它新的版本即使达到也不算支持（只有新 emoji 的字体不能
+    算作支持这些版本）；最旧的版本就未达到时返回 None。
+    """
+    if threshold is None:
+        from config import VERSION_INFERENCE_THRESHOLD
+        threshold = VERSION_INFERENCE_THRESHOLD
+
+    best = None
+    for version in sorted(scores, key=version_key):
+        supported, total = scores[version]
+        if not total:
+            continue
+        if supported * 100.0 / total < threshold:
+            break
+        best = version
+    return best
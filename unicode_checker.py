@@ -1,4 +1,3 @@
-from tkinter import ttk
 import unicodedata
 
 class UnicodeChecker:
@@ -7,48 +6,18 @@ class UnicodeChecker:
 
     def test_unicode_support(self):
         """增强的Unicode测试（兼容旧系统）"""
-        from config import UNICODE_TEST_CHARS
-        results = []
-        max_supported = "0.0"
+        from detection import test_unicode_support
 
-        versions = sorted(UNICODE_TEST_CHARS.keys(), key=float, reverse=True)
+        # 查询字体cmap覆盖位图（字体未变化时使用缓存），按版本统计完整emoji目录的覆盖率
+        results, max_supported, _ = test_unicode_support()
 
-        for version in versions:
-            char_info = UNICODE_TEST_CHARS[version]
-            char = char_info["char"]
-            name = char_info["name"]
+        for result in results:
+            if result["supported"]:
+                try:
+                    result["char_name"] = unicodedata.name(result["char"], "Unknown")
+                except:
+                    result["char_name"] = "名称未知"
+            else:
+                result["char_name"] = "N/A"
 
-            try:
-                test_label = ttk.Label(self.root, text=char, font=("Arial", 12))
-                test_label.update()
-
-                actual_text = test_label.cget("text")
-
-                if actual_text != char or len(actual_text) != len(char):
-                    status = f"✗ 不支持"
-                    char_name = "N/A"
-                else:
-                    status = "✓ 支持"
-                    try:
-                        char_name = unicodedata.name(char, "Unknown")
-                    except:
-                        char_name = "名称未知"
-
-                    if float(version) > float(max_supported):
-                        max_supported = version
-
-                test_label.destroy()
-            except Exception:
-                status = f"✗ 不支持"
-                char_name = "N/A"
-
-            results.append({
-                "version": version,
-                "char": char,
-                "name": name,
-                "status": status,
-                "char_name": char_name,
-                "release_date": UNICODE_TEST_CHARS[version]["version"]
-            })
-
-        return results, max_supported
\ No newline at end of file
+        return results, max_supported
@@ -2,90 +2,166 @@ import platform
 import os
 import sys
 import ctypes
-from win32api import GetFileVersionInfo, LOWORD, HIWORD
+import json
 
-def get_system_info():
+
+class OSVERSIONINFOEXW(ctypes.Structure):
+    _fields_ = [
+        ("dwOSVersionInfoSize", ctypes.c_ulong),
+        ("dwMajorVersion", ctypes.c_ulong),
+        ("dwMinorVersion", ctypes.c_ulong),
+        ("dwBuildNumber", ctypes.c_ulong),
+        ("dwPlatformId", ctypes.c_ulong),
+        ("szCSDVersion", ctypes.c_wchar * 128),
+        ("wServicePackMajor", ctypes.c_ushort),
+        ("wServicePackMinor", ctypes.c_ushort),
+        ("wSuiteMask", ctypes.c_ushort),
+        ("wProductType", ctypes.c_byte),
+        ("wReserved", ctypes.c_byte)
+    ]
+
+
+def windows_system_provider():
+    """调用一次RtlGetVersion读取系统版本（GetVersionEx会受兼容性清单影响）"""
+    ver = OSVERSIONINFOEXW()
+    ver.dwOSVersionInfoSize = ctypes.sizeof(OSVERSIONINFOEXW)
+    ctypes.windll.Ntdll.RtlGetVersion(ctypes.byref(ver))
+    return {
+        "os_name": "Windows",
+        "major": ver.dwMajorVersion,
+        "minor": ver.dwMinorVersion,
+        "build": ver.dwBuildNumber,
+    }
+
+
+def platform_system_provider():
+    """非Windows主机（无界面模式、CI）直接使用platform模块的信息"""
+    return {
+        "os_name": platform.system(),
+        "os_version": platform.release(),
+        "build": platform.version(),
+    }
+
+
+def default_system_provider():
+    return windows_system_provider() if os.name == "nt" else platform_system_provider()
+
+
+class SystemSnapshot:
+    """一次检测所需的系统信息，只采集一次并传给所有检测项
+
+    可以序列化为JSON，从终端收集的快照在其他机器上重放时不会调用任何系统API。
+    采集失败时 build 为 None，各检测项按原来的方式返回“未知”。
+    架构和 Python 版本只在 capture 时取自本机，重放的快照中缺少的字段保持为 None。
+    """
+
+    __slots__ = ("os_name", "major", "minor", "os_version", "build", "arch", "python_version")
+
+    def __init__(self, os_name, major=None, minor=None, os_version=None, build=None,
+                 arch=None, python_version=None):
+        self.os_name = os_name
+        self.major = major
+        self.minor = minor
+        self.os_version = os_version if os_version is not None or major is None else f"{major}.{minor}"
+        self.build = build
+        self.arch = arch
+        self.python_version = python_version
+
+    @staticmethod
+    def _host_fields():
+        """本机的架构和 Python 版本"""
+        return {"arch": "x64" if sys.maxsize > 2**32 else "x86", "python_version": platform.python_version()}
+
+    @classmethod
+    def minimal(cls):
+        """只包含本机系统名称、架构和 Python 版本的快照，采集失败或超时时使用"""
+        return cls("Windows" if os.name == "nt" else platform.system(), **cls._host_fields())
+
+    @classmethod
+    def capture(cls, provider=None):
+        """通过provider（默认根据平台选择）采集快照"""
+        try:
+            return cls(**{**cls._host_fields(), **(provider or default_system_provider)()})
+        except Exception as e:
+            print(f"获取系统信息失败: {str(e)}")
+            # 返回最小化信息保证程序继续运行
+            return cls.minimal()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    @property
+    def is_windows(self):
+        return self.os_name == "Windows"
+
+    @property
+    def build_number(self):
+        """Windows构建号（整数），未知时为 None"""
+        if not self.is_windows or self.build is None:
+            return None
+        try:
+            return int(str(self.build).split('.')[-1])
+        except ValueError:
+            return None
+
+    def __eq__(self, other):
+        return isinstance(other, SystemSnapshot) and self.to_dict() == other.to_dict()
+
+    # 快照的字段可以修改，不能用作字典键或集合元素
+    __hash__ = None
+
+    def __repr__(self):
+        return f"SystemSnapshot({self.to_json()})"
+
+
+def load_system_snapshot(path):
+    """读取保存为JSON的快照"""
+    with open(path, encoding="utf-8") as f:
+        return SystemSnapshot.from_json(f.read())
+
+
+def get_system_info(snapshot=None):
     """获取系统基本信息"""
-    try:
-        # 使用ctypes获取完整系统信息
-        class OSVERSIONINFOEXW(ctypes.Structure):
-            _fields_ = [
-                ("dwOSVersionInfoSize", ctypes.c_ulong),
-                ("dwMajorVersion", ctypes.c_ulong),
-                ("dwMinorVersion", ctypes.c_ulong),
-                ("dwBuildNumber", ctypes.c_ulong),
-                ("dwPlatformId", ctypes.c_ulong),
-                ("szCSDVersion", ctypes.c_wchar * 128),
-                ("wServicePackMajor", ctypes.c_ushort),
-                ("wServicePackMinor", ctypes.c_ushort),
-                ("wSuiteMask", ctypes.c_ushort),
-                ("wProductType", ctypes.c_byte),
-                ("wReserved", ctypes.c_byte)
-            ]
-        
-        ver = OSVERSIONINFOEXW()
-        ver.dwOSVersionInfoSize = ctypes.sizeof(OSVERSIONINFOEXW)
-        ctypes.windll.Ntdll.RtlGetVersion(ctypes.byref(ver))
-        
-        # 获取系统架构
-        arch = "x64" if sys.maxsize > 2**32 else "x86"
-        
-        return {
-            "os_name": "Windows",
-            "os_version": f"{ver.dwMajorVersion}.{ver.dwMinorVersion}",
-            "build": f"{ver.dwBuildNumber}",
-            "arch": arch,
-            "python_version": platform.python_version()
-        }
-    except Exception as e:
-        print(f"获取系统信息失败: {str(e)}")
-        # 返回最小化信息保证程序继续运行
+    snapshot = snapshot or SystemSnapshot.capture()
+    if snapshot.build is None:
         return {
-            "os_name": "Windows",
+            "os_name": snapshot.os_name,
             "os_version": "未知版本",
             "build": "未知构建",
-            "arch": "未知架构",
-            "python_version": platform.python_version()
+            "arch": snapshot.arch or "未知架构",
+            "python_version": snapshot.python_version or "未知版本"
         }
+    return {
+        "os_name": snapshot.os_name,
+        "os_version": snapshot.os_version,
+        "build": f"{snapshot.build}",
+        "arch": snapshot.arch or "未知架构",
+        "python_version": snapshot.python_version or "未知版本"
+    }
 
-def get_windows_unicode_version():
-    """通过Windows API获取精确的Unicode版本"""
-    try:
-        # 使用ctypes调用Windows API
-        class OSVERSIONINFOEXW(ctypes.Structure):
-            _fields_ = [
-                ("dwOSVersionInfoSize", ctypes.c_ulong),
-                ("dwMajorVersion", ctypes.c_ulong),
-                ("dwMinorVersion", ctypes.c_ulong),
-                ("dwBuildNumber", ctypes.c_ulong),
-                ("dwPlatformId", ctypes.c_ulong),
-                ("szCSDVersion", ctypes.c_wchar * 128),
-                ("wServicePackMajor", ctypes.c_ushort),
-                ("wServicePackMinor", ctypes.c_ushort),
-                ("wSuiteMask", ctypes.c_ushort),
-                ("wProductType", ctypes.c_byte),
-                ("wReserved", ctypes.c_byte)
-            ]
-        
-        ver = OSVERSIONINFOEXW()
-        ver.dwOSVersionInfoSize = ctypes.sizeof(OSVERSIONINFOEXW)
-        ctypes.windll.Ntdll.RtlGetVersion(ctypes.byref(ver))
-        
-        build_number = ver.dwBuildNumber
-        
-        # 根据构建号映射Unicode版本
-        if build_number >= 22000:  # Windows 11
-            return "15.1"
-        elif build_number >= 19041:  # Windows 10 2004+
-            return "14.0"
-        elif build_number >= 14393:  # Windows 10 Anniversary Update
-            return "12.1"
-        else:
-            return "12.0"
-    except Exception as e:
-        print(f"获取Unicode版本失败: {str(e)}")
+def get_windows_unicode_version(snapshot=None):
+    """根据Windows构建号获取Unicode版本（对照表见 config.WINDOWS_UNICODE_VERSIONS）"""
+    from unicode_age import windows_unicode_version
+
+    snapshot = snapshot or SystemSnapshot.capture()
+    build_number = snapshot.build_number
+    if build_number is None:
+        print(f"获取Unicode版本失败: 无法获取 {snapshot.os_name} 的Windows构建号")
         return "未知版本"
 
+    return windows_unicode_version(build_number) or "未知版本"
+
 def get_segoe_emoji_version():
     """增强的字体检测 - 获取Segoe UI Emoji字体版本"""
     try:
@@ -95,6 +171,8 @@ def get_segoe_emoji_version():
         if os.path.exists(font_path):
             # 检查文件是否包含资源区域
             try:
+                # pywin32 仅在此处需要，延迟导入以加快启动
+                from win32api import GetFileVersionInfo, LOWORD, HIWORD
                 info = GetFileVersionInfo(font_path, '\\')
                 ms = info['FileVersionMS']
                 ls = info['FileVersionLS']
@@ -118,65 +196,56 @@ def get_segoe_emoji_version():
         print(f"获取字体版本失败: {str(e)}")
         return "未知版本"
 
+def _find_emoji_font_entry():
+    """在字体索引中按 EMOJI_FONT_FAMILIES 的顺序查找，返回 (字体名称, 字体文件)；未找到时返回 (None, None)"""
+    from config import EMOJI_FONT_FAMILIES
+    from font_registry import get_font_registry
+
+    return get_font_registry().find_first(EMOJI_FONT_FAMILIES)
+
 def get_segoe_font_name():
     """获取系统中安装的Segoe UI字体名称（支持Emoji/Symbol版本）"""
     try:
-        import winreg
-        
-        # 注册表路径
-        key_path = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"
-        
-        # 打开注册表项
-        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
-            i = 0
-            while True:
-                try:
-                    # 枚举所有键值
-                    name, value, _ = winreg.EnumValue(key, i)
-                    
-                    # 查找Segoe UI相关字体
-                    if "Segoe UI" in name:
-                        # 移除(TrueType)标识
-                        if " (" in name:
-                            name = name.split(" (")[0]
-                        
-                        # 优先返回Emoji版本
-                        if "Emoji" in name:
-                            return name
-                        
-                        # 备选Symbol版本
-                        if "Symbol" in name:
-                            return name
-                            
-                    i += 1
-                except OSError:
-                    break
-                    
+        name, _ = _find_emoji_font_entry()
         # 默认回退值
-        return "Segoe UI Emoji"
-        
+        return name or "Segoe UI Emoji"
+
     except Exception as e:
         print(f"获取Segoe字体失败: {str(e)}")
         return "Segoe UI Emoji"
 
-def check_python_compatibility():
+def get_segoe_font_path():
+    """获取 get_segoe_font_name 对应的字体文件完整路径"""
+    try:
+        _, font_path = _find_emoji_font_entry()
+    except Exception as e:
+        print(f"获取Segoe字体文件失败: {str(e)}")
+        font_path = None
+
+    if not font_path:
+        return os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts', 'seguiemj.ttf')
+    return font_path
+
+def check_python_compatibility(snapshot=None):
     """检查 Python 版本兼容性"""
+    snapshot = snapshot or SystemSnapshot.capture()
+    if not snapshot.python_version:
+        return False, "Python 版本未知"
     try:
         # 获取Python版本
-        major, minor, patch = map(int, platform.python_version_tuple())
+        major, minor = map(int, snapshot.python_version.split('.')[:2])
         
         # 检查与PySide6的兼容性
         if major != 3 or minor < 6 or minor > 11:
             return False, f"Python {major}.{minor} 不符合要求（需3.6-3.11）"
             
         # 检查与Windows版本的兼容性
-        sys_info = get_system_info()
-        if sys_info["os_name"] == "Windows":
-            build = int(sys_info["build"].split('.')[-1])
+        build = snapshot.build_number
+        if build is not None:
             if build < 19041 and major >= 3 and minor >= 9:
                 return False, "Python 3.9+ 需要 Windows 10 2004+ 或更高版本"
                 
         return True, "兼容性检查通过"
     except Exception as e:
         print(f"兼容性检查失败: {str(e)}")
-        return False, f"检查失败: {str(e)}"
\ No newline at end of file
+        return False, f"检查失败: {str(e)}"